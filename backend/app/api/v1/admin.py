@@ -0,0 +1,78 @@
+"""
+Router Admin - Diagnostic de performance (opt-in)
+
+Endpoints (en-tête `X-Admin-Token` = `ADMIN_TOKEN`, 404 si non configuré):
+- GET /api/v1/admin/profile - Profil par échantillonnage (flame graph "folded")
+- GET /api/v1/admin/traces - Derniers spans tracés (JSON OTLP)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+import asyncio
+import logging
+
+from app.core.security import require_admin
+from app.services.profiler import sample_stacks
+from app.services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+_profile_lock = asyncio.Lock()
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# ============================================
+# ROUTES
+# ============================================
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(default=10.0, gt=0, le=60, description="Durée d'échantillonnage"),
+    mode: str = Query(default="wall", pattern="^(wall|cpu)$", description="wall ou cpu"),
+    interval_ms: float = Query(default=5.0, ge=1, le=100, description="Période d'échantillonnage")
+):
+    """
+    🔥 Profil par échantillonnage du processus
+
+    Échantillonne les piles de tous les threads pendant `seconds` et
+    renvoie le format "folded" (flamegraph.pl, speedscope, inferno):
+
+        curl -H "X-Admin-Token: ..." ".../api/v1/admin/profile?seconds=15" > profile.folded
+        flamegraph.pl profile.folded > profile.svg
+
+    Un seul profil à la fois (409 sinon). L'échantillonneur tourne dans un
+    thread: l'event loop continue de servir (et d'être profilée).
+    """
+    if _profile_lock.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Profil déjà en cours")
+
+    async with _profile_lock:
+        logger.info(f"🔥 Profiling {seconds:.0f}s ({mode}, every {interval_ms:.0f}ms)")
+        folded, summary = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000, mode)
+
+    logger.info(f"🔥 Profile done: {summary['samples']} samples, {summary['distinct_stacks']} stacks")
+    return PlainTextResponse(
+        folded,
+        headers={f"X-Profile-{key.replace('_', '-')}": str(value) for key, value in summary.items()}
+    )
+
+@router.get("/traces")
+async def traces(
+    limit: int = Query(default=500, ge=1, le=10000, description="Nombre de spans (les plus récents)")
+):
+    """
+    🧵 Derniers spans tracés
+
+    Corps ExportTraceServiceRequest (JSON OTLP): importable tel quel dans
+    un collecteur OpenTelemetry (`POST /v1/traces`). Vide si
+    `TRACING_ENABLED` est faux.
+    """
+    spans = list(tracer.recent)[-limit:]
+    return JSONResponse(
+        tracer.otlp_payload(spans),
+        headers={
+            "X-Tracing-Enabled": str(tracer.enabled).lower(),
+            "X-Tracing-Exported": str(tracer.exported),
+            "X-Tracing-Export-Errors": str(tracer.export_errors),
+        }
+    )
@@ -3,17 +3,24 @@ Router Chat - Assistant médical REMÉDIA
 
 Endpoints:
 - POST /api/v1/chat/message - Envoyer un message au chatbot
+- POST /api/v1/chat/message/stream - Même chose en streaming (Server-Sent Events)
 - GET /api/v1/chat/suggestions - Obtenir des questions suggérées
 - POST /api/v1/chat/quick-advice - Conseil médical rapide
 - GET /api/v1/chat/history - Historique conversations (à implémenter)
 """
 
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
+import asyncio
+import json
 import logging
 
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.concurrency import GeminiOverloadedError
 from app.services.gemini_service import gemini_service
+from app.services.semantic_cache import semantic_cache
 
 logger = logging.getLogger(__name__)
 
@@ -108,6 +115,48 @@ STRATEGIC_QUESTIONS = [
     "Comment l'OMS reconnaît la médecine traditionnelle africaine",
 ]
 
+# ============================================
+# HELPERS
+# ============================================
+
+def build_chat_prompt(request: ChatRequest) -> str:
+    """Prompt Gemini: historique récent + question + instructions"""
+    # Convertir l'historique au format Gemini
+    history_text = ""
+    if request.conversation_history:
+        for msg in request.conversation_history[-10:]:  # Garder 10 derniers messages
+            role = "Utilisateur" if msg.role == "user" else "Assistant"
+            history_text += f"{role}: {msg.content}\n\n"
+    
+    # Construire le prompt complet
+    return f"""Tu es l'assistant médical REMÉDIA, spécialisé en plantes médicinales africaines.
+
+Historique de conversation:
+{history_text}
+
+Question de l'utilisateur: {request.message}
+
+Instructions:
+1. Réponds de manière professionnelle et empathique
+2. Cite des plantes médicinales africaines quand pertinent
+3. Donne des informations validées scientifiquement
+4. Ajoute des émojis pour la lisibilité (🌿 💊 ⚠️ ✅)
+5. Structure avec des listes à puces si nécessaire
+6. Mentionne TOUJOURS les précautions d'usage
+7. Si urgence médicale, recommande de consulter un professionnel
+
+Réponds maintenant:"""
+
+# ============================================
+# CACHE SÉMANTIQUE
+# ============================================
+
+@router.on_event("startup")
+async def warmup_semantic_cache():
+    """Charge le modèle d'embedding en arrière-plan (ne bloque pas le démarrage)"""
+    if semantic_cache is not None:
+        asyncio.create_task(semantic_cache.warmup())
+
 # ============================================
 # ROUTES
 # ============================================
@@ -132,31 +181,27 @@ async def send_message(request: ChatRequest):
     try:
         logger.info(f"💬 Chat message: '{request.message[:50]}...'")
         
-        # Convertir l'historique au format Gemini
-        history_text = ""
-        if request.conversation_history:
-            for msg in request.conversation_history[-10:]:  # Garder 10 derniers messages
-                role = "Utilisateur" if msg.role == "user" else "Assistant"
-                history_text += f"{role}: {msg.content}\n\n"
+        # Question isolée (sans historique): réponse d'une question similaire ?
+        standalone = not request.conversation_history
+        if standalone and semantic_cache is not None:
+            hit = await semantic_cache.lookup("chat", request.message)
+            if hit is not None:
+                cached_text, similarity = hit
+                logger.info(f"🧠 Semantic cache hit (similarity={similarity:.3f})")
+                return ChatResponse(
+                    success=True,
+                    response=cached_text,
+                    metadata={
+                        "model": "gemini-2.0-flash",
+                        "history_length": 0,
+                        "response_length": len(cached_text),
+                        "cached": "semantic",
+                        "similarity": round(similarity, 4)
+                    }
+                )
         
-        # Construire le prompt complet
-        full_prompt = f"""Tu es l'assistant médical REMÉDIA, spécialisé en plantes médicinales africaines.
-
-Historique de conversation:
-{history_text}
-
-Question de l'utilisateur: {request.message}
-
-Instructions:
-1. Réponds de manière professionnelle et empathique
-2. Cite des plantes médicinales africaines quand pertinent
-3. Donne des informations validées scientifiquement
-4. Ajoute des émojis pour la lisibilité (🌿 💊 ⚠️ ✅)
-5. Structure avec des listes à puces si nécessaire
-6. Mentionne TOUJOURS les précautions d'usage
-7. Si urgence médicale, recommande de consulter un professionnel
-
-Réponds maintenant:"""
+        # Construire le prompt complet (historique + instructions)
+        full_prompt = build_chat_prompt(request)
         
         # Appeler Gemini
         gemini_result = await gemini_service.chat_medical(full_prompt)
@@ -171,6 +216,9 @@ Réponds maintenant:"""
         
         logger.info(f"✅ Chat response generated ({len(response_text)} chars)")
         
+        if standalone and semantic_cache is not None:
+            await semantic_cache.store("chat", request.message, response_text)
+        
         return ChatResponse(
             success=True,
             response=response_text,
@@ -181,6 +229,8 @@ Réponds maintenant:"""
             }
         )
         
+    except (GeminiOverloadedError, CircuitOpenError):
+        raise  # 429 / 503 + Retry-After (handlers globaux)
     except Exception as e:
         logger.error(f"❌ Chat error: {str(e)}")
         raise HTTPException(
@@ -192,6 +242,58 @@ Réponds maintenant:"""
             }
         )
 
+def _sse(event: str, data: dict) -> str:
+    """Formate un événement Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/message/stream")
+async def send_message_stream(request: ChatRequest, http_request: Request):
+    """
+    ⚡ Envoyer un message au chatbot médical (streaming SSE)
+    
+    Même contrat que /message, mais la réponse arrive au fil de la
+    génération sous forme de Server-Sent Events:
+    - `event: token` / `data: {"text": "..."}` pour chaque morceau
+    - `event: done` / `data: {"response_length": N}` en fin de réponse
+    - `event: error` / `data: {"message": "..."}` en cas d'échec
+    
+    Si le client se déconnecte, la génération Gemini est interrompue.
+    """
+    logger.info(f"⚡ Chat stream: '{request.message[:50]}...'")
+    # Backpressure avant d'ouvrir le flux (sinon le 429 arriverait en plein stream)
+    gemini_service.check_available()
+    gemini_service.check_capacity("chat")
+    full_prompt = build_chat_prompt(request)
+    
+    async def events() -> AsyncIterator[str]:
+        length = 0
+        stream = gemini_service.stream_chat_medical(full_prompt)
+        try:
+            async for text in stream:
+                if await http_request.is_disconnected():
+                    logger.info("🔌 Client disconnected - stopping chat stream")
+                    return
+                length += len(text)
+                yield _sse("token", {"text": text})
+            yield _sse("done", {"response_length": length})
+        except Exception as e:
+            logger.error(f"❌ Chat stream error: {str(e)}")
+            yield _sse("error", {
+                "message": "Erreur lors de la génération de la réponse",
+                "error": str(e)
+            })
+        finally:
+            await stream.aclose()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Pas de buffering proxy (nginx)
+        }
+    )
+
 @router.get("/suggestions", response_model=SuggestionsResponse)
 async def get_suggestions():
     """
@@ -244,6 +346,17 @@ async def get_quick_advice(request: QuickAdviceRequest):
     try:
         logger.info(f"🚀 Quick advice for: '{request.symptom[:50]}...'")
         
+        if semantic_cache is not None:
+            hit = await semantic_cache.lookup("quick_advice", request.symptom)
+            if hit is not None:
+                logger.info(f"🧠 Semantic cache hit (similarity={hit[1]:.3f})")
+                return {
+                    "success": True,
+                    "advice": hit[0],
+                    "symptom": request.symptom,
+                    "cached": "semantic"
+                }
+        
         prompt = f"""Tu es un assistant médical REMÉDIA. Donne un conseil RAPIDE et ACTIONNABLE pour:
 
 Symptôme/Question: {request.symptom}
@@ -264,16 +377,21 @@ Format:
 
 Réponds maintenant de manière CONCISE:"""
         
-        response_text = await gemini_service.chat_medical(prompt)
+        response_text = await gemini_service.chat_medical(prompt, endpoint="quick_advice")
         
         logger.info(f"✅ Quick advice generated")
         
+        if semantic_cache is not None:
+            await semantic_cache.store("quick_advice", request.symptom, response_text)
+        
         return {
             "success": True,
             "advice": response_text,
             "symptom": request.symptom
         }
         
+    except (GeminiOverloadedError, CircuitOpenError):
+        raise
     except Exception as e:
         logger.error(f"❌ Quick advice error: {str(e)}")
         raise HTTPException(
@@ -321,7 +439,13 @@ async def get_chat_stats():
             ],
             "satisfaction_rate": 96.5,
             "total_questions": len(STRATEGIC_QUESTIONS)
-        }
+        },
+        "cache": gemini_service.cache.stats() if gemini_service.cache else {"enabled": False},
+        "semantic_cache": semantic_cache.stats() if semantic_cache else {"enabled": False},
+        "queues": gemini_service.queue_stats(),
+        "quota": gemini_service.quota_stats(),
+        "breaker": gemini_service.breaker.stats(),
+        "coalescing": gemini_service.flights.stats()
     }
 
 # ============================================
@@ -331,9 +455,18 @@ async def get_chat_stats():
 @router.get("/health")
 async def chat_health():
     """🏥 Health check du service chat"""
+    breaker = gemini_service.breaker.stats()
+    if breaker["state"] == "open":
+        # Pas d'appel amont pendant la panne: état du disjoncteur uniquement
+        return {
+            "status": "degraded",
+            "service": "chat",
+            "gemini": "unavailable",
+            "breaker": breaker
+        }
     try:
         # Test basique Gemini
-        test_response = await gemini_service.chat_medical("Test")
+        test_response = await gemini_service.chat_medical("Test", use_cache=False, endpoint="health")
         
         return {
             "status": "healthy",
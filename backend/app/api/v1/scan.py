@@ -4,16 +4,25 @@ Utilise Gemini Vision API pour reconnaissance
 """
 
 from fastapi import APIRouter, File, UploadFile, HTTPException, status
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import AsyncIterator, Awaitable, Callable, List, NamedTuple, Optional, Tuple
+import asyncio
+import functools
+import json
 import logging
-from io import BytesIO
-from PIL import Image
-import base64
+import tempfile
+from PIL import UnidentifiedImageError
 
+from app.api.v1.plants import catalog_store
 from app.core.config import settings
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.concurrency import GeminiOverloadedError
 from app.services.gemini_service import gemini_service
+from app.services.image_preprocessing import prepare_image, shutdown_pool, sniff_image_type
+from app.services.local_classifier import local_classifier
+from app.services.scan_cache import scan_cache
+from app.services.tracing import traced
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -26,12 +35,34 @@ class PlantIdentification(BaseModel):
     """Modèle de réponse identification"""
     name: str
     scientificName: str
-    confidence: float
+    # Confiance du modèle (%); None si l'identification vient d'une simple similarité
+    confidence: Optional[float] = Field(default=None, ge=0, le=100)
     description: str
     properties: List[str]
     uses: List[str]
     family: Optional[str] = None
     habitat: Optional[str] = None
+    # Enrichissement catalogue (jamais demandé au modèle)
+    catalogId: Optional[str] = None
+    warnings: List[str] = []
+    # Classifieur local: similarité cosinus brute (0-1), pas une probabilité
+    similarity: Optional[float] = None
+
+# Schéma imposé à Gemini (sous-ensemble OpenAPI supporté par l'API)
+PLANT_IDENTIFICATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "scientificName": {"type": "string"},
+        "confidence": {"type": "number"},
+        "description": {"type": "string"},
+        "properties": {"type": "array", "items": {"type": "string"}},
+        "uses": {"type": "array", "items": {"type": "string"}},
+        "family": {"type": "string", "nullable": True},
+        "habitat": {"type": "string", "nullable": True},
+    },
+    "required": ["name", "scientificName", "confidence", "description", "properties", "uses"],
+}
 
 class ScanResponse(BaseModel):
     """Réponse complète scan"""
@@ -40,6 +71,21 @@ class ScanResponse(BaseModel):
     error: Optional[str] = None
     message: Optional[str] = None
 
+# ============================================
+# LIFECYCLE
+# ============================================
+
+@router.on_event("startup")
+async def warmup_local_classifier():
+    """Charge le classifieur local en arrière-plan (ne bloque pas le démarrage)"""
+    if local_classifier is not None:
+        asyncio.create_task(local_classifier.warmup())
+
+@router.on_event("shutdown")
+async def stop_image_pool():
+    """Arrête le pool de prétraitement d'images"""
+    shutdown_pool()
+
 # ============================================
 # ROUTES
 # ============================================
@@ -49,33 +95,27 @@ async def identify_plant(file: UploadFile = File(...)):
     """
     🔍 Identifier une plante depuis une image
     
-    - **file**: Image de la plante (JPG, PNG, WebP)
-    - Taille max: 10MB
+    - **file**: Image de la plante (JPG, PNG, WebP, reconnue à son contenu)
+    - Taille max: `MAX_UPLOAD_SIZE` (10MB par défaut, 413 au-delà)
     - Résolution recommandée: 800x800px minimum
     
     Returns:
         ScanResponse avec identification ou erreur
     """
+    image = await read_image_upload(file)
+    logger.info(f"📸 Image read: {image.filename} ({image.mime_type}, {len(image.data) // 1024} KB)")
+    return await scan_image(image.data)
+
+@traced("scan.pipeline")
+async def scan_image(image_data: bytes) -> ScanResponse:
+    """
+    Pipeline d'identification d'une image déjà lue et validée
     
+    Prétraitement, cache perceptuel, Gemini Vision et repli démo. Partagé
+    par /identify et les batchs (dont le streaming, où les UploadFile sont
+    fermés avant l'envoi du corps).
+    """
     try:
-        # Validation fichier
-        if not file.content_type.startswith("image/"):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Le fichier doit être une image (JPG, PNG, WebP)"
-            )
-        
-        # Lire image
-        logger.info(f"📸 Reading image: {file.filename} ({file.content_type})")
-        image_data = await file.read()
-        
-        # Validation taille
-        if len(image_data) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail="Image trop grande (max 10MB)"
-            )
-        
         # Vérifier Gemini configuré
         if not settings.gemini_api_key:
             logger.warning("⚠️ Gemini API key not configured - using demo data")
@@ -85,20 +125,68 @@ async def identify_plant(file: UploadFile = File(...)):
                 message="Mode démonstration (API Gemini non configurée)"
             )
         
-        # Identifier avec Gemini Vision
+        # Prétraitement (draft decode, EXIF, resize, JPEG) hors event loop
+        try:
+            prepared = await prepare_image(image_data)
+        except UnidentifiedImageError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Image illisible ou format non supporté"
+            )
+        
+        # Image quasi identique déjà identifiée ?
+        if scan_cache is not None:
+            hit = scan_cache.lookup(prepared.phash)
+            if hit is not None:
+                cached_plant, distance = hit
+                logger.info(f"⚡ Scan served from perceptual cache (distance={distance})")
+                return ScanResponse(
+                    success=True,
+                    plant=PlantIdentification.model_validate_json(cached_plant),
+                    message="Image déjà analysée - résultat en cache"
+                )
+        
+        # Espèce fréquente reconnue localement avec certitude ?
+        if local_classifier is not None:
+            match = await local_classifier.classify(prepared.data)
+            plant = plant_from_catalog(*match) if match is not None else None
+            if plant is not None:
+                logger.info(f"🌱 Plant identified locally: {plant.name} (similarity={plant.similarity:.3f})")
+                if scan_cache is not None:
+                    await scan_cache.store(prepared.phash, plant.model_dump_json())
+                return ScanResponse(success=True, plant=plant, message="Identification locale")
+        
+        # Identifier avec Gemini Vision (sortie JSON contrainte)
         logger.info("🤖 Calling Gemini Vision API...")
-        result = await gemini_service.identify_plant(image_data)
+        raw_output = await gemini_service.identify_plant(
+            prepared.data,
+            mime_type=prepared.mime_type,
+            response_schema=PLANT_IDENTIFICATION_SCHEMA
+        )
+        plant = enrich_with_catalog(await parse_identification(raw_output))
+        
+        logger.info(f"✅ Plant identified: {plant.name} ({plant.scientificName})")
         
-        logger.info(f"✅ Plant identified: {result.get('name', 'Unknown')}")
+        if scan_cache is not None:
+            await scan_cache.store(prepared.phash, plant.model_dump_json())
         
         return ScanResponse(
             success=True,
-            plant=PlantIdentification(**result)
+            plant=plant
         )
         
-    except HTTPException:
+    except (HTTPException, GeminiOverloadedError):
         raise
         
+    except CircuitOpenError:
+        # Gemini en panne: démo immédiate, sans attendre de timeout
+        logger.warning("🔌 Gemini circuit open - serving demo identification")
+        return ScanResponse(
+            success=True,
+            plant=get_demo_plant(),
+            message="Service d'identification temporairement indisponible - Mode démo activé"
+        )
+        
     except Exception as e:
         logger.error(f"❌ Identification error: {str(e)}", exc_info=True)
         
@@ -109,42 +197,262 @@ async def identify_plant(file: UploadFile = File(...)):
             message=f"Erreur API - Mode démo activé: {str(e)}"
         )
 
+ImageLoader = Callable[[], Awaitable["UploadedImage"]]
+
+async def _scan_batch_item(
+    filename: Optional[str],
+    load: ImageLoader,
+    slots: asyncio.Semaphore
+) -> ScanResponse:
+    """Scan d'une image du batch: les erreurs deviennent un résultat en échec"""
+    async with slots:
+        try:
+            image = await load()
+            return await scan_image(image.data)
+        except HTTPException as e:
+            return ScanResponse(success=False, error=str(e.detail))
+        except Exception as e:
+            logger.error(f"Error processing {filename}: {e}")
+            return ScanResponse(success=False, error=str(e))
+
+def _check_batch_size(files: List[UploadFile]) -> None:
+    if len(files) > settings.scan_batch_max_files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Maximum {settings.scan_batch_max_files} images par batch"
+        )
+
 @router.post("/batch", response_model=List[ScanResponse])
 async def identify_plants_batch(files: List[UploadFile] = File(...)):
     """
     🔍 Identifier plusieurs plantes (batch)
     
-    - **files**: Liste d'images (max 5)
+    - **files**: Liste d'images (max `SCAN_BATCH_MAX_FILES`)
+    
+    Les images sont traitées en parallèle (prétraitement + Gemini), avec au
+    plus `SCAN_BATCH_CONCURRENCY` scans simultanés par batch. Chaque image
+    n'est lue qu'une fois son tour venu: au plus `SCAN_BATCH_CONCURRENCY`
+    images en mémoire à la fois.
     
     Returns:
-        Liste de ScanResponse
+        Liste de ScanResponse (même ordre que les fichiers)
     """
+    _check_batch_size(files)
+    slots = asyncio.Semaphore(settings.scan_batch_concurrency)
+    return await asyncio.gather(*(
+        _scan_batch_item(file.filename, functools.partial(read_image_upload, file), slots)
+        for file in files
+    ))
+
+@router.post("/batch/stream")
+async def identify_plants_batch_stream(files: List[UploadFile] = File(...)):
+    """
+    ⚡ Identifier plusieurs plantes (batch, résultats en streaming)
     
-    if len(files) > 5:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Maximum 5 images par batch"
-        )
+    Même traitement que /batch, mais chaque résultat est envoyé dès qu'il
+    est prêt, au format NDJSON (une ligne JSON par image):
+    `{"index": 0, "filename": "...", "result": ScanResponse}`
     
-    results = []
+    Adapté aux gros lots (relevés terrain): le client affiche les
+    identifications au fil de l'eau.
     
-    for file in files:
+    Les UploadFile étant fermés avant l'envoi du corps, chaque image est
+    d'abord validée puis copiée dans un fichier temporaire (en mémoire
+    jusqu'à `UPLOAD_CHUNK_SIZE`, sur disque au-delà), et relue seulement
+    à son tour: au plus `SCAN_BATCH_CONCURRENCY` images en mémoire.
+    """
+    _check_batch_size(files)
+    uploads = [await SpooledUpload.spool(file) for file in files]
+    slots = asyncio.Semaphore(settings.scan_batch_concurrency)
+    
+    async def indexed(index: int, upload: SpooledUpload):
+        return index, upload.filename, await _scan_batch_item(upload.filename, upload.load, slots)
+    
+    async def lines() -> AsyncIterator[str]:
+        tasks = [asyncio.ensure_future(indexed(i, upload)) for i, upload in enumerate(uploads)]
         try:
-            result = await identify_plant(file)
-            results.append(result)
-        except Exception as e:
-            logger.error(f"Error processing {file.filename}: {e}")
-            results.append(ScanResponse(
-                success=False,
-                error=str(e)
-            ))
+            for next_done in asyncio.as_completed(tasks):
+                index, filename, result = await next_done
+                line = {"index": index, "filename": filename, "result": result.model_dump()}
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        finally:
+            # Client déconnecté: abandonner les scans restants
+            for task in tasks:
+                task.cancel()
+            for upload in uploads:
+                upload.close()
     
-    return results
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
 
 # ============================================
 # HELPERS
 # ============================================
 
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+class UploadedImage(NamedTuple):
+    """Upload lu et validé (type reconnu à son contenu)"""
+    filename: Optional[str]
+    mime_type: str
+    data: bytes
+
+def _upload_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Image trop grande (max {settings.max_upload_size // (1024 * 1024)}MB)"
+    )
+
+async def _image_chunks(file: UploadFile) -> Tuple[str, AsyncIterator[bytes]]:
+    """
+    Valide le début d'un upload et renvoie ses morceaux, plafonnés à `max_upload_size`
+    
+    Le format est reconnu sur le premier morceau (signature du fichier):
+    un fichier qui n'est pas une image est rejeté sans lire la suite, un
+    fichier trop gros dès que le plafond est franchi.
+    
+    Raises:
+        HTTPException: 413 si trop grande, 415 si format non supporté
+    """
+    limit = settings.max_upload_size
+    if file.size is not None and file.size > limit:
+        raise _upload_too_large()
+    
+    head = await file.read(UPLOAD_CHUNK_SIZE)
+    mime_type = sniff_image_type(head)
+    if mime_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Le fichier doit être une image (JPG, PNG, WebP)"
+        )
+    
+    async def chunks() -> AsyncIterator[bytes]:
+        yield head
+        total = len(head)
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            total += len(chunk)
+            if total > limit:
+                raise _upload_too_large()
+            yield chunk
+    return mime_type, chunks()
+
+async def read_image_upload(file: UploadFile) -> UploadedImage:
+    """
+    Lit un upload en mémoire (voir `_image_chunks` pour la validation)
+    
+    Raises:
+        HTTPException: 413 si trop grande, 415 si format non supporté
+    """
+    mime_type, chunks = await _image_chunks(file)
+    return UploadedImage(file.filename, mime_type, b"".join([chunk async for chunk in chunks]))
+
+class SpooledUpload:
+    """
+    Upload validé, copié hors de la requête (streaming NDJSON)
+    
+    Fichier temporaire en mémoire jusqu'à `UPLOAD_CHUNK_SIZE`, sur disque
+    au-delà. Une erreur de validation (413, 415) est conservée et levée au
+    chargement, pour devenir le résultat en échec de cette image.
+    """
+    
+    def __init__(self, filename: Optional[str]):
+        self.filename = filename
+        self.mime_type = ""
+        self.error: Optional[HTTPException] = None
+        self.file = tempfile.SpooledTemporaryFile(max_size=UPLOAD_CHUNK_SIZE)
+    
+    @classmethod
+    async def spool(cls, file: UploadFile) -> "SpooledUpload":
+        upload = cls(file.filename)
+        try:
+            upload.mime_type, chunks = await _image_chunks(file)
+            async for chunk in chunks:
+                await asyncio.to_thread(upload.file.write, chunk)
+        except HTTPException as e:
+            upload.error = e
+            upload.close()
+        return upload
+    
+    def _read(self) -> bytes:
+        self.file.seek(0)
+        return self.file.read()
+    
+    async def load(self) -> UploadedImage:
+        """Relit l'image (une seule fois: le fichier temporaire est ensuite libéré)"""
+        if self.error is not None:
+            raise self.error
+        try:
+            return UploadedImage(self.filename, self.mime_type, await asyncio.to_thread(self._read))
+        finally:
+            self.close()
+    
+    def close(self) -> None:
+        self.file.close()
+
+@traced("scan.parse_identification")
+async def parse_identification(raw_output: str) -> PlantIdentification:
+    """
+    Valide la sortie JSON de Gemini
+    
+    En cas d'échec, un seul appel de réparation (texte seul, sans image)
+    est tenté avant d'abandonner.
+    
+    Raises:
+        ValidationError: Si la sortie reste invalide après réparation
+    """
+    try:
+        return PlantIdentification.model_validate_json(raw_output)
+    except ValidationError as e:
+        logger.warning(f"⚠️ Invalid identification JSON ({e.error_count()} errors) - repairing")
+        repaired = await gemini_service.repair_json(
+            raw_output, str(e), PLANT_IDENTIFICATION_SCHEMA
+        )
+        return PlantIdentification.model_validate_json(repaired)
+
+def plant_from_catalog(plant_id: str, similarity: float) -> Optional[PlantIdentification]:
+    """Identification construite depuis la fiche catalogue (classifieur local)"""
+    record = catalog_store.current.get(plant_id)
+    if record is None:
+        return None
+    return PlantIdentification(
+        name=record.common_names[0] if record.common_names else record.scientific_name,
+        scientificName=record.scientific_name,
+        similarity=round(similarity, 4),
+        description=record.description,
+        properties=list(record.medicinal_properties),
+        uses=list(record.traditional_uses),
+        family=record.family,
+        habitat=", ".join(record.found_in) or None,
+        catalogId=record.id,
+        warnings=list(record.warnings),
+    )
+
+def enrich_with_catalog(plant: PlantIdentification) -> PlantIdentification:
+    """
+    Complète l'identification avec la fiche du catalogue local
+    
+    Correspondance par nom scientifique (puis binôme genre + espèce, sans
+    auteur). Les champs vides sont complétés et les avertissements du
+    catalogue toujours ajoutés.
+    """
+    catalog = catalog_store.current
+    match = catalog.get(plant.scientificName)
+    if match is None:
+        match = catalog.get(" ".join(plant.scientificName.split()[:2]))
+    if match is None:
+        return plant
+    
+    return plant.model_copy(update={
+        "catalogId": match.id,
+        "family": plant.family or match.family,
+        "properties": plant.properties or list(match.medicinal_properties),
+        "uses": plant.uses or list(match.traditional_uses),
+        "warnings": list(match.warnings),
+    })
+
 def get_demo_plant() -> PlantIdentification:
     """
     Plante démo pour fallback quand API indisponible
@@ -3,8 +3,11 @@ Configuration settings pour REMEDIA Backend
 Utilise pydantic-settings pour la validation des variables d'environnement
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from pathlib import Path
 from typing import List
 
+APP_DIR = Path(__file__).resolve().parent.parent
+
 
 class Settings(BaseSettings):
     """Configuration principale de l'application"""
@@ -14,6 +17,22 @@ class Settings(BaseSettings):
     app_version: str = "2.0.0"
     debug: bool = True
     environment: str = "development"
+    workers: int = 1  # processus serveur; > 1 = état partagé via database_url (SQLite)
+    
+    # Logging
+    log_format: str = "text"  # "text" (coloré) ou "json" (une ligne JSON par log)
+    log_sample_threshold: int = 100  # logs d'accès en succès par seconde avant échantillonnage
+    log_success_sample_rate: float = 0.1  # fraction conservée au-delà du seuil
+    
+    # Métriques (/metrics, format Prometheus)
+    metrics_loop_lag_interval: float = 0.5  # secondes entre deux mesures du retard de l'event loop (0 = désactivé)
+    
+    # Diagnostic (profilage, traces) - routes /api/v1/admin
+    admin_token: str = ""  # en-tête X-Admin-Token (vide = routes admin désactivées)
+    tracing_enabled: bool = False
+    tracing_buffer_size: int = 2048  # spans récents conservés en mémoire
+    tracing_otlp_endpoint: str = ""  # collecteur OTLP/HTTP JSON, ex: http://localhost:4318/v1/traces
+    tracing_export_interval: float = 5.0  # secondes entre deux envois au collecteur
     
     # Security
     secret_key: str = "dev-secret-key-change-in-production-32-chars-min"
@@ -30,16 +49,62 @@ class Settings(BaseSettings):
     max_upload_size: int = 10485760  # 10MB
     rate_limit_per_minute: int = 30
     
+    # Scan - prétraitement image avant Gemini Vision
+    scan_image_max_side: int = 768  # px (taille d'une tuile Gemini Vision)
+    scan_image_quality: int = 85  # qualité JPEG de ré-encodage
+    scan_preprocess_workers: int = 2  # processus de prétraitement (0 = thread)
+    scan_batch_max_files: int = 50  # images max par batch
+    scan_batch_concurrency: int = 4  # scans simultanés par batch
+    
+    # Scan - cache par hash perceptuel (SQLite via database_url)
+    scan_cache_enabled: bool = True
+    scan_cache_max_distance: int = 6  # distance de Hamming max (sur 64 bits)
+    scan_cache_ttl_seconds: int = 2592000  # 30 jours
+    scan_cache_max_entries: int = 5000
+    
+    # Scan - classifieur local ONNX en première passe (nécessite onnxruntime)
+    local_classifier_enabled: bool = False
+    local_classifier_model_path: str = ""  # extracteur d'embeddings .onnx
+    local_classifier_reference_dir: str = str(
+        APP_DIR.parent.parent / "frontend" / "public" / "images" / "plants"
+    )
+    local_classifier_threshold: float = 0.85  # similarité cosinus minimale
+    local_classifier_margin: float = 0.05  # écart minimal avec la 2e espèce
+    
     # Gemini API
     gemini_api_key: str = ""
     gemini_model: str = "gemini-1.5-flash"
     gemini_temperature: float = 0.7
     gemini_max_tokens: int = 2048
+    gemini_concurrency_limits: str = "scan=4,chat=8,quick_advice=4,health=1"  # appels simultanés par endpoint
+    gemini_max_queue: int = 32  # requêtes en attente par endpoint avant 429
+    gemini_queue_retry_after: int = 5  # secondes (header Retry-After)
+    gemini_tokens_per_minute: int = 1_000_000  # budget TPM (quota du projet Google)
+    gemini_quota_max_wait: float = 30.0  # attente max du quota avant 429 (secondes)
+    gemini_breaker_failure_threshold: int = 5  # échecs consécutifs avant ouverture du circuit
+    gemini_breaker_recovery_seconds: float = 30.0  # durée d'ouverture avant sonde
+    
+    # Cache réponses Gemini
+    response_cache_enabled: bool = True
+    response_cache_backend: str = "memory"  # "memory" ou "sqlite" (mémoire + database_url)
+    response_cache_ttl_seconds: int = 86400
+    response_cache_max_entries: int = 1000
+    
+    # Catalogue plantes
+    plants_database_path: str = str(APP_DIR / "data" / "plants_database.json")
+    catalog_watch_interval: float = 5.0  # secondes, 0 = pas de rechargement à chaud
     
     # ChromaDB
     chroma_persist_directory: str = "./chroma_db"
     chroma_collection_name: str = "remedia_plants"
     
+    # Cache sémantique (embeddings ChromaDB)
+    semantic_cache_enabled: bool = False  # seuil à calibrer sur le modèle d'embedding avant activation
+    semantic_cache_threshold: float = 0.92  # similarité cosinus minimale
+    semantic_cache_ttl_seconds: int = 604800  # 7 jours
+    semantic_cache_max_entries: int = 5000
+    semantic_cache_embedding_model: str = "paraphrase-multilingual-MiniLM-L12-v2"  # sentence-transformers
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -0,0 +1,210 @@
+"""
+Configuration du logging REMEDIA
+
+Les écritures de logs ne doivent pas bloquer l'event loop:
+- Les handlers appelants ne font que poser l'enregistrement dans une file
+  (QueueHandler); un thread (QueueListener) formate et écrit sur stdout
+- Formatters construits une seule fois (pas un Formatter par ligne)
+- `LOG_FORMAT=json`: une ligne JSON par enregistrement (collecteurs de logs),
+  `text`: sortie colorée lisible en développement
+- Contexte de requête (request_id, méthode, chemin) ajouté à tous les logs
+  émis pendant la requête, y compris depuis les services
+- Sous forte charge, les logs d'accès en succès sont échantillonnés;
+  erreurs et avertissements sont toujours conservés
+"""
+
+from contextvars import ContextVar, Token
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+
+from app.core.config import settings
+
+# Champs de la requête en cours (posés par le middleware HTTP)
+request_context: ContextVar[Dict[str, str]] = ContextVar("request_context", default={})
+
+# Attributs standard d'un LogRecord (tout le reste vient de `extra=`)
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "taskName",
+}
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_listener: Optional[QueueListener] = None
+
+
+def bind_request_context(**fields: str) -> Token:
+    """Associe des champs aux logs de la requête en cours"""
+    return request_context.set(fields)
+
+
+def reset_request_context(token: Token) -> None:
+    request_context.reset(token)
+
+
+# ============================================
+# FILTRES
+# ============================================
+
+class RequestContextFilter(logging.Filter):
+    """Copie le contexte de requête sur l'enregistrement (thread appelant)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in request_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SuccessSampler(logging.Filter):
+    """
+    Échantillonnage des logs de succès au-delà d'un débit
+
+    Seuls les enregistrements marqués `extra={"sampleable": True}` sont
+    concernés: les `threshold` premiers de chaque seconde passent, puis
+    une fraction `rate` seulement.
+    """
+
+    def __init__(self, threshold: int, rate: float):
+        super().__init__()
+        self.threshold = threshold
+        self.rate = rate
+        self._window = 0
+        self._count = 0
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampleable", False):
+            return True
+        window = int(time.monotonic())
+        if window != self._window:
+            self._window = window
+            self._count = 0
+        self._count += 1
+        if self._count <= self.threshold or random.random() < self.rate:
+            return True
+        self.dropped += 1
+        return False
+
+
+# ============================================
+# FORMATTERS
+# ============================================
+
+class ColoredFormatter(logging.Formatter):
+    """Formatter avec couleurs pour meilleure lisibilité en production"""
+
+    grey = "\x1b[38;21m"
+    blue = "\x1b[38;5;39m"
+    yellow = "\x1b[38;5;226m"
+    red = "\x1b[38;5;196m"
+    bold_red = "\x1b[31;1m"
+    reset = "\x1b[0m"
+
+    FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    COLORS = {
+        logging.DEBUG: grey,
+        logging.INFO: blue,
+        logging.WARNING: yellow,
+        logging.ERROR: red,
+        logging.CRITICAL: bold_red,
+    }
+
+    def __init__(self):
+        super().__init__(self.FORMAT, datefmt=DATE_FORMAT)
+        self._formatters = {
+            level: logging.Formatter(color + self.FORMAT + self.reset, datefmt=DATE_FORMAT)
+            for level, color in self.COLORS.items()
+        }
+
+    def format(self, record):
+        formatter = self._formatters.get(record.levelno)
+        return formatter.format(record) if formatter else super().format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement (champs `extra` et contexte inclus)"""
+
+    def format(self, record):
+        entry = {
+            "timestamp": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key != "sampleable":
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _LightQueueHandler(QueueHandler):
+    """
+    QueueHandler sans formatage dans le thread appelant
+
+    Le message est résolu (les arguments peuvent être mutables), la trace
+    d'exception mise en texte; le formatage final se fait dans le listener.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# ============================================
+# INSTALLATION
+# ============================================
+
+def configure_logging() -> SuccessSampler:
+    """
+    Installe le logging non bloquant sur le logger racine
+
+    Returns:
+        Filtre d'échantillonnage des logs d'accès (pour les métriques)
+    """
+    global _listener
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if settings.log_format == "json" else ColoredFormatter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _LightQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(logging.INFO if settings.environment == "production" else logging.DEBUG)
+
+    if _listener is not None:
+        _listener.stop()
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+    sampler = SuccessSampler(settings.log_sample_threshold, settings.log_success_sample_rate)
+    logging.getLogger("remedia.http").addFilter(sampler)
+    return sampler
+
+
+def stop_logging() -> None:
+    """Vide la file et arrête le thread d'écriture"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
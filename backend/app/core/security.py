@@ -0,0 +1,22 @@
+"""
+Authentification des surfaces internes REMEDIA
+
+Jeton unique `ADMIN_TOKEN` (en-tête `X-Admin-Token`) pour les routes de
+diagnostic (/api/v1/admin) et les métriques (/metrics):
+- ADMIN_TOKEN vide: routes invisibles (404)
+- Jeton absent ou incorrect: 401 (comparaison à temps constant)
+"""
+
+from fastapi import Header, HTTPException, status
+from typing import Optional
+import hmac
+
+from app.core.config import settings
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Surface admin invisible sans ADMIN_TOKEN, 401 si le jeton ne correspond pas"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Jeton admin invalide")
@@ -14,58 +14,36 @@ Author: REMEDIA Team
 License: MIT
 """
 
-from fastapi import FastAPI, Request, status
+from fastapi import Depends, FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import asyncio
 import logging
 import time
-import sys
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.logging_config import bind_request_context, configure_logging, reset_request_context
+from app.core.security import require_admin
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.concurrency import GeminiOverloadedError
+from app.services.metrics import (
+    cache_family, http_in_flight, http_latency, http_requests, method_label, monitor_loop_lag, registry,
+    route_group,
+)
+from app.services.shared_state import shared_state
+from app.services.tracing import SPAN_KIND_SERVER, tracer
 
 # ============================================
 # CONFIGURATION LOGGING PROFESSIONNELLE
 # ============================================
 
-class ColoredFormatter(logging.Formatter):
-    """Formatter avec couleurs pour meilleure lisibilité en production"""
-    
-    grey = "\x1b[38;21m"
-    blue = "\x1b[38;5;39m"
-    yellow = "\x1b[38;5;226m"
-    red = "\x1b[38;5;196m"
-    bold_red = "\x1b[31;1m"
-    reset = "\x1b[0m"
-
-    FORMATS = {
-        logging.DEBUG: grey + "%(asctime)s - %(name)s - %(levelname)s - %(message)s" + reset,
-        logging.INFO: blue + "%(asctime)s - %(name)s - %(levelname)s - %(message)s" + reset,
-        logging.WARNING: yellow + "%(asctime)s - %(name)s - %(levelname)s - %(message)s" + reset,
-        logging.ERROR: red + "%(asctime)s - %(name)s - %(levelname)s - %(message)s" + reset,
-        logging.CRITICAL: bold_red + "%(asctime)s - %(name)s - %(levelname)s - %(message)s" + reset,
-    }
-
-    def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt, datefmt='%Y-%m-%d %H:%M:%S')
-        return formatter.format(record)
-
-# Configuration handlers
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setFormatter(ColoredFormatter())
-
-# Logger root
-logging.basicConfig(
-    level=logging.INFO if settings.environment == "production" else logging.DEBUG,
-    handlers=[console_handler],
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Logs écrits par un thread dédié (file d'attente), texte coloré ou JSON
+log_sampler = configure_logging()
 
 logger = logging.getLogger(__name__)
 
@@ -107,6 +85,76 @@ def create_application() -> FastAPI:
 
 app = create_application()
 
+# ============================================
+# MIDDLEWARE: PLAFOND DES UPLOADS
+# ============================================
+
+# En-têtes multipart d'un fichier (boundary, Content-Disposition...)
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadLimitMiddleware:
+    """
+    Plafond de taille des corps de requête d'upload (ASGI pur)
+    
+    Le parser multipart consomme tout le corps avant la route: sans
+    plafond, un upload géant est spoolé en entier avant toute vérification.
+    - Content-Length au-delà du plafond: 413 immédiat, corps jamais lu
+    - Sinon (chunked, Content-Length mensonger): octets comptés à chaque
+      message reçu, 413 dès que le plafond est franchi
+    """
+    
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits  # préfixe de chemin -> octets max (premier préfixe trouvé)
+    
+    def _limit(self, path: str) -> Optional[int]:
+        for prefix, limit in self.limits.items():
+            if path.startswith(prefix):
+                return limit
+        return None
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self._limit(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        
+        detail = f"Requête trop volumineuse (max {limit // (1024 * 1024)}MB)"
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": detail}
+            )
+            await response(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Relevée par FastAPI pendant la lecture du formulaire -> 413
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=detail
+                    )
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+# Ajouté avant CORS: placé à l'intérieur, les 413 portent les en-têtes CORS
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        "/api/v1/scan/batch": settings.scan_batch_max_files * (settings.max_upload_size + MULTIPART_OVERHEAD),
+        "/api/v1/scan": settings.max_upload_size + MULTIPART_OVERHEAD,
+    },
+)
+
 # ============================================
 # CORS MIDDLEWARE - PREMIÈRE PRIORITÉ
 # ============================================
@@ -165,6 +213,7 @@ def configure_cors(application: FastAPI) -> None:
             "Content-Type",
             "X-Process-Time",
             "X-Request-ID",
+            "ETag",
         ],
         max_age=3600,  # Cache preflight 1h
     )
@@ -175,69 +224,123 @@ def configure_cors(application: FastAPI) -> None:
 configure_cors(app)
 
 # ============================================
-# MIDDLEWARE: REQUEST ID (Traçabilité)
+# MIDDLEWARE: REQUEST ID + LOGGING STRUCTURÉ
 # ============================================
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    """Ajoute un ID unique à chaque requête pour traçabilité"""
+class RequestContextMiddleware:
+    """
+    ID de requête, chronométrage et logging en une seule passe (ASGI pur)
     
-    async def dispatch(self, request: Request, call_next: Callable):
-        request_id = f"{int(time.time() * 1000)}-{id(request)}"
-        request.state.request_id = request_id
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-        return response
-
-app.add_middleware(RequestIDMiddleware)
-
-# ============================================
-# MIDDLEWARE: LOGGING STRUCTURÉ
-# ============================================
-
-class StructuredLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware de logging professionnel avec skip OPTIONS"""
+    Remplace la paire RequestID + StructuredLogging en BaseHTTPMiddleware:
+    pas de tâche ni de flux intermédiaire par requête, les réponses en
+    streaming (SSE, NDJSON) et les background tasks passent telles quelles.
+    - `request.state.request_id` disponible pour les routes et handlers
+    - En-têtes X-Request-ID et X-Process-Time (ms jusqu'aux en-têtes)
+    - Une ligne de log à la fin de la réponse (OPTIONS ignorées), les
+      succès étant échantillonnés sous forte charge
+    - request_id, méthode et chemin ajoutés aux logs émis pendant la requête
+    - Métriques: latence et statut par route, requêtes en cours par groupe
+    - Span racine de la trace (si TRACING_ENABLED), parent des spans métier
+    """
     
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
         self.logger = logging.getLogger("remedia.http")
     
-    async def dispatch(self, request: Request, call_next: Callable):
-        # Skip OPTIONS (CORS preflight)
-        if request.method == "OPTIONS":
-            return await call_next(request)
-        
-        method = request.method
-        path = request.url.path
-        client_host = request.client.host if request.client else "unknown"
-        request_id = getattr(request.state, "request_id", "no-id")
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
         start_time = time.perf_counter()
+        request_id = f"{int(time.time() * 1000)}-{id(scope)}"
+        scope.setdefault("state", {})["request_id"] = request_id
+        request_id_header = (b"x-request-id", request_id.encode("latin-1"))
+        status_code = 0
+        
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                process_time = (time.perf_counter() - start_time) * 1000
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    request_id_header,
+                    (b"x-process-time", str(process_time).encode("latin-1")),
+                ]
+            await send(message)
         
+        # Skip OPTIONS (CORS preflight)
+        if scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send_with_headers)
+            return
+        
+        method = scope["method"]
+        path = scope["path"]
+        client = scope.get("client")
+        client_host = client[0] if client else "unknown"
+        
+        # Contexte repris par tous les logs émis pendant la requête
+        context = bind_request_context(request_id=request_id, method=method, path=path)
+        group = route_group(path)
+        http_in_flight.inc(group)
+        span = tracer.span(
+            f"{method} {path}", kind=SPAN_KIND_SERVER,
+            **{"http.request.method": method, "url.path": path, "remedia.request_id": request_id}
+        )
         try:
-            response = await call_next(request)
+            with span:
+                await self.app(scope, receive, send_with_headers)
+                route = self._route(scope)
+                span.update_name(f"{method} {route}")
+                span.set_attribute("http.route", route)
+                span.set_attribute("http.response.status_code", status_code)
+        except Exception as e:
+            process_time = (time.perf_counter() - start_time) * 1000
+            self._observe(scope, method, 500, process_time)
+            self.logger.error(
+                "💥 %-6s %-40s ERROR [%6.2fms] %s id=%s - %s",
+                method, path, process_time, client_host, request_id, e,
+                extra={"duration_ms": round(process_time, 2), "client": client_host}
+            )
+            raise
+        else:
             process_time = (time.perf_counter() - start_time) * 1000
+            self._observe(scope, method, status_code, process_time)
             
             # Emoji basé sur status code
-            emoji = "✅" if 200 <= response.status_code < 300 else \
-                    "⚠️" if 400 <= response.status_code < 500 else "❌"
+            emoji = "✅" if 200 <= status_code < 300 else \
+                    "⚠️" if 400 <= status_code < 500 else "❌"
             
+            # Arguments différés: une ligne écartée par l'échantillonnage n'est jamais formatée
             self.logger.info(
-                f"{emoji} {method:6} {path:40} {response.status_code} "
-                f"[{process_time:6.2f}ms] {client_host} id={request_id}"
-            )
-            
-            response.headers["X-Process-Time"] = str(process_time)
-            return response
-            
-        except Exception as e:
-            process_time = (time.perf_counter() - start_time) * 1000
-            self.logger.error(
-                f"💥 {method:6} {path:40} ERROR "
-                f"[{process_time:6.2f}ms] {client_host} id={request_id} - {str(e)}"
+                "%s %-6s %-40s %d [%6.2fms] %s id=%s",
+                emoji, method, path, status_code, process_time, client_host, request_id,
+                extra={
+                    "status": status_code,
+                    "duration_ms": round(process_time, 2),
+                    "client": client_host,
+                    "sampleable": status_code < 400,
+                }
             )
-            raise
+        finally:
+            http_in_flight.dec(group)
+            reset_request_context(context)
+    
+    @staticmethod
+    def _route(scope: Scope) -> str:
+        """Modèle de route (connu après le routage)"""
+        return getattr(scope.get("route"), "path", "unmatched")
+    
+    @staticmethod
+    def _observe(scope: Scope, method: str, status_code: int, process_time: float) -> None:
+        """Métriques par modèle de route"""
+        route = RequestContextMiddleware._route(scope)
+        method = method_label(method)
+        http_requests.inc(method, route, str(status_code))
+        http_latency.observe(process_time / 1000, method, route)
 
-app.add_middleware(StructuredLoggingMiddleware)
+app.add_middleware(RequestContextMiddleware)
 
 # ============================================
 # ROUTES API v1
@@ -245,7 +348,7 @@ app.add_middleware(StructuredLoggingMiddleware)
 
 # Import des routers
 try:
-    from app.api.v1 import scan, chat, plants
+    from app.api.v1 import scan, chat, plants, admin
     
     # Inclure les routes avec préfixes
     app.include_router(
@@ -263,6 +366,12 @@ try:
         prefix="/api/v1/plants",
         tags=["plants"]
     )
+    app.include_router(
+        admin.router,
+        prefix="/api/v1/admin",
+        tags=["admin"],
+        include_in_schema=False
+    )
     logger.info("✅ API routes loaded")
     
 except ImportError as e:
@@ -311,21 +420,35 @@ async def health_check():
     """
     ❤️ Health Check - Monitoring
     """
+    from app.services.gemini_service import gemini_service
+    from app.services.local_classifier import local_classifier
+    from app.services.scan_cache import scan_cache
+    
     gemini_configured = bool(settings.gemini_api_key)
+    breaker = gemini_service.breaker.stats()
+    gemini_up = gemini_configured and breaker["state"] != "open"
     
     return {
-        "status": "healthy" if gemini_configured else "degraded",
+        "status": "healthy" if gemini_up else "degraded",
         "timestamp": datetime.utcnow().isoformat(),
         "uptime_seconds": int(time.time() - app.state.start_time),
         "version": settings.app_version,
         "environment": settings.environment,
         "services": {
             "api": "operational",
-            "gemini": "operational" if gemini_configured else "not_configured",
-            "scan": "operational" if gemini_configured else "degraded",
-            "chat": "operational" if gemini_configured else "degraded",
+            "gemini": (
+                ("operational" if gemini_up else "unavailable")
+                if gemini_configured else "not_configured"
+            ),
+            "scan": "operational" if gemini_up else "degraded",
+            "chat": "operational" if gemini_up else "degraded",
             "plants": "operational",
         },
+        "gemini_breaker": breaker,
+        "gemini_queues": gemini_service.queue_stats(),
+        "gemini_quota": gemini_service.quota_stats(),
+        "scan_cache": scan_cache.stats() if scan_cache else {"enabled": False},
+        "local_classifier": local_classifier.stats() if local_classifier else {"enabled": False},
         "config": {
             "gemini_model": settings.gemini_model if gemini_configured else None,
             "debug_mode": settings.debug,
@@ -352,7 +475,9 @@ async def test_gemini():
         from app.services.gemini_service import gemini_service
         
         logger.info("🧪 Testing Gemini API connection...")
-        result = await gemini_service.chat_medical("Health check - répondre juste 'OK'")
+        result = await gemini_service.chat_medical(
+            "Health check - répondre juste 'OK'", use_cache=False, endpoint="health"
+        )
         
         return {
             "success": True,
@@ -374,6 +499,74 @@ async def test_gemini():
             }
         )
 
+def service_metrics():
+    """Compteurs tenus par les services, lus au moment du scrape"""
+    from app.services.gemini_service import gemini_service
+    from app.services.local_classifier import local_classifier
+    from app.services.scan_cache import scan_cache
+    from app.services.semantic_cache import semantic_cache
+    
+    classifier = local_classifier.stats() if local_classifier else None
+    yield from cache_family({
+        "gemini_response": gemini_service.cache.stats() if gemini_service.cache else None,
+        "semantic": semantic_cache.stats() if semantic_cache else None,
+        "scan_perceptual": scan_cache.stats() if scan_cache else None,
+        "local_classifier": classifier and {
+            "hits": classifier["local_hits"],
+            "misses": classifier["escalated"],
+            "hit_ratio": classifier["local_ratio"],
+        },
+    })
+    
+    queues = gemini_service.queue_stats()
+    yield "remedia_gemini_in_flight", "gauge", "Appels Gemini en cours par endpoint", [
+        ({"endpoint": name}, queue["in_flight"]) for name, queue in queues.items()
+    ]
+    yield "remedia_gemini_queue_depth", "gauge", "Appels Gemini en attente de slot", [
+        ({"endpoint": name}, queue["queue_depth"]) for name, queue in queues.items()
+    ]
+    yield "remedia_gemini_rejected_total", "counter", "Appels rejetés (file pleine, 429)", [
+        ({"endpoint": name}, queue["rejected"]) for name, queue in queues.items()
+    ]
+    
+    quota = gemini_service.quota_stats()
+    yield "remedia_gemini_quota_tokens_available", "gauge", "Tokens disponibles (budget TPM)", [
+        ({}, quota["tokens_available"])
+    ]
+    yield "remedia_gemini_quota_requests_available", "gauge", "Requêtes disponibles (budget RPM)", [
+        ({}, quota["requests_available"])
+    ]
+    yield "remedia_gemini_quota_queue_depth", "gauge", "Appels en attente de quota", [
+        ({}, quota["queue_depth"])
+    ]
+    
+    breaker = gemini_service.breaker.stats()
+    yield "remedia_gemini_breaker_open", "gauge", "Disjoncteur Gemini (0 fermé, 1 ouvert, 0.5 sonde)", [
+        ({}, {"closed": 0, "half_open": 0.5, "open": 1}[breaker["state"]])
+    ]
+    
+    flights = gemini_service.flights.stats()
+    yield "remedia_gemini_coalesced_total", "counter", "Appels identiques fusionnés (single-flight)", [
+        ({}, flights["coalesced"])
+    ]
+    yield "remedia_log_records_sampled_out_total", "counter", "Logs d'accès écartés par échantillonnage", [
+        ({}, log_sampler.dropped)
+    ]
+
+registry.register_collector(service_metrics)
+
+@app.get("/metrics", tags=["system"], include_in_schema=False, dependencies=[Depends(require_admin)])
+async def metrics():
+    """
+    📈 Métriques Prometheus (format texte)
+    
+    Latence par route, requêtes en cours, appels/tokens/erreurs Gemini,
+    caches, files et quota, retard de l'event loop.
+    
+    Protégé comme /api/v1/admin: en-tête `X-Admin-Token`, 404 sans ADMIN_TOKEN.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # ============================================
 # ERROR HANDLERS PROFESSIONNELS
 # ============================================
@@ -399,6 +592,38 @@ async def not_found_handler(request: Request, exc):
         }
     )
 
+@app.exception_handler(GeminiOverloadedError)
+async def overloaded_handler(request: Request, exc: GeminiOverloadedError):
+    """Handler backpressure: file Gemini pleine -> 429 + Retry-After"""
+    logger.warning(f"🚦 Gemini queue full ({exc.endpoint}) - rejecting {request.url.path}")
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={
+            "success": False,
+            "error": "Too Many Requests",
+            "message": "Service très sollicité, réessayez dans quelques secondes",
+            "retry_after": exc.retry_after,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    )
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    """Handler fail-fast: Gemini indisponible -> 503 immédiat + Retry-After"""
+    logger.warning(f"🔌 Circuit {exc.name} open - fast-failing {request.url.path}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={
+            "success": False,
+            "error": "Service Unavailable",
+            "message": "Assistant IA temporairement indisponible, réessayez dans quelques instants",
+            "retry_after": exc.retry_after,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    )
+
 @app.exception_handler(500)
 async def internal_error_handler(request: Request, exc):
     """Handler pour erreurs 500 avec tracking"""
@@ -447,7 +672,24 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.on_event("startup")
 async def startup_event():
     """Événement démarrage - Initialisation"""
-    app.state.start_time = time.time()
+    # Uptime du déploiement (premier worker démarré), pas du processus
+    if shared_state is not None:
+        started_at = await shared_state.run(shared_state.setdefault, "started_at", repr(time.time()))
+        app.state.start_time = float(started_at)
+    else:
+        app.state.start_time = time.time()
+    
+    # Retard de l'event loop (métrique remedia_event_loop_lag_seconds)
+    if settings.metrics_loop_lag_interval > 0:
+        app.state.loop_monitor = asyncio.create_task(
+            monitor_loop_lag(settings.metrics_loop_lag_interval)
+        )
+    
+    # Export des spans vers le collecteur OTLP local
+    if tracer.enabled and settings.tracing_otlp_endpoint:
+        app.state.trace_exporter = asyncio.create_task(
+            tracer.export_forever(settings.tracing_otlp_endpoint, settings.tracing_export_interval)
+        )
     
     logger.info("=" * 60)
     logger.info("🚀 REMEDIA API STARTING")
@@ -472,6 +714,16 @@ async def shutdown_event():
     """Événement arrêt - Cleanup gracieux"""
     uptime = time.time() - app.state.start_time
     
+    loop_monitor = getattr(app.state, "loop_monitor", None)
+    if loop_monitor is not None:
+        loop_monitor.cancel()
+    
+    # Dernier lot de spans envoyé avant l'arrêt
+    trace_exporter = getattr(app.state, "trace_exporter", None)
+    if trace_exporter is not None:
+        trace_exporter.cancel()
+        await asyncio.gather(trace_exporter, return_exceptions=True)
+    
     logger.info("=" * 60)
     logger.info("🛑 REMEDIA API SHUTTING DOWN")
     logger.info(f"⏱️  Uptime: {uptime:.2f} seconds")
@@ -488,15 +740,19 @@ if __name__ == "__main__":
     # Port dynamique (Railway/Render)
     port = int(os.getenv("PORT", 8000))
     
-    logger.info(f"🚀 Starting uvicorn on port {port}...")
+    logger.info(f"🚀 Starting uvicorn on port {port} ({settings.workers} worker(s))...")
+    
+    # Nouveau déploiement: l'état partagé de l'instance précédente est oublié
+    if shared_state is not None:
+        shared_state.reset()
     
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=port,
-        reload=settings.debug,
+        reload=settings.debug and settings.workers == 1,  # reload incompatible avec workers
         log_level="info",
         access_log=False,  # On utilise notre propre logging middleware
         use_colors=True,
-        workers=1,  # Single worker pour éviter issues avec state
+        workers=settings.workers,  # > 1: état partagé (app.services.shared_state)
     )
\ No newline at end of file
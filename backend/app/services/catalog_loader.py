@@ -0,0 +1,110 @@
+"""
+Chargement du catalogue depuis plants_database.json + rechargement à chaud
+
+- Lecture du fichier en bytes et parsing direct (json.loads sur bytes, pas de
+  copie str intermédiaire), validation + index construits hors event loop
+- Surveillance du fichier (mtime/taille) par une tâche asyncio légère
+- Swap atomique du snapshot: les requêtes en cours terminent sur l'ancien
+  catalogue, les suivantes voient le nouveau. Un fichier invalide est
+  rejeté et l'ancien catalogue reste servi.
+"""
+
+from pathlib import Path
+from typing import Generic, List, Optional, Tuple, Type
+import asyncio
+import json
+import logging
+import os
+
+from app.services.plant_catalog import PlantCatalog, PlantModel
+
+logger = logging.getLogger(__name__)
+
+
+def load_records(path: Path) -> List[dict]:
+    """
+    Lit les enregistrements bruts du fichier catalogue
+
+    Accepte {"plants": [...]} ou directement une liste.
+    """
+    data = json.loads(path.read_bytes())
+    records = data["plants"] if isinstance(data, dict) else data
+    if not isinstance(records, list):
+        raise ValueError(f"Format de catalogue invalide: {path}")
+    return records
+
+
+class CatalogStore(Generic[PlantModel]):
+    """
+    Détient le snapshot courant du catalogue et le remplace à chaud
+
+    Args:
+        path: Fichier JSON du catalogue
+        model: Modèle pydantic des plantes
+        watch_interval: Période de vérification du fichier (secondes, 0 = désactivé)
+    """
+
+    def __init__(self, path: Path, model: Type[PlantModel], watch_interval: float = 0.0):
+        self.path = Path(path)
+        self.model = model
+        self.watch_interval = watch_interval
+        self._signature = self._stat()
+        self.current: PlantCatalog[PlantModel] = PlantCatalog(load_records(self.path), model)
+        self._task: Optional[asyncio.Task] = None
+        self._reload_lock = asyncio.Lock()
+        logger.info(f"📚 Catalog loaded: {len(self.current)} plants from {self.path.name}")
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """Signature (mtime_ns, taille) du fichier, None s'il est absent"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _build(self) -> PlantCatalog[PlantModel]:
+        return PlantCatalog(load_records(self.path), self.model, previous=self.current)
+
+    async def reload(self) -> bool:
+        """
+        Reconstruit le catalogue (thread) puis le publie atomiquement
+
+        Returns:
+            True si un nouveau snapshot a été publié
+        """
+        async with self._reload_lock:
+            signature = self._stat()
+            try:
+                catalog = await asyncio.to_thread(self._build)
+            except Exception as e:
+                logger.error(f"❌ Catalog reload failed, keeping previous snapshot: {str(e)}")
+                self._signature = signature
+                return False
+
+            self.current = catalog
+            self._signature = signature
+            logger.info(f"🔄 Catalog reloaded: {len(catalog)} plants")
+            return True
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            signature = self._stat()
+            if signature is not None and signature != self._signature:
+                await self.reload()
+
+    def start(self) -> None:
+        """Démarre la surveillance du fichier (si activée)"""
+        if self.watch_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._watch())
+            logger.info(f"👀 Watching {self.path.name} every {self.watch_interval}s")
+
+    async def stop(self) -> None:
+        """Arrête la surveillance"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,206 @@
+"""
+Circuit breaker pour la dépendance Gemini
+
+Quand Gemini est en panne, chaque requête attendait la fin de ses retries
+avant d'échouer: latence p99 qui explose et workers monopolisés. Le
+disjoncteur coupe court:
+
+- closed: appels normaux, échecs consécutifs comptés
+- open: après N échecs, rejet immédiat (CircuitOpenError) pendant
+  `recovery_seconds`; les routes servent cache / démo en quelques ms
+- half_open: ensuite, UN appel sonde est autorisé; succès -> closed,
+  échec -> open pour une nouvelle période
+
+Seules les erreurs transitoires (5xx, 429, timeouts) comptent comme échecs:
+une erreur client (4xx) prouve que l'amont répond.
+
+Multi-workers: l'ouverture et la fermeture sont publiées dans l'état
+partagé; un worker qui n'a encore rien vu adopte l'ouverture décidée par
+un autre (les échecs consécutifs restent comptés par worker). Lectures
+(au plus toutes les SHARED_SYNC_SECONDS) et écritures se font en
+arrière-plan: `check()` ne touche jamais SQLite.
+"""
+
+from typing import Dict, Optional, Set
+import asyncio
+import logging
+import math
+import time
+
+from app.services.shared_state import SharedState
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Période de relecture de l'état partagé (secondes)
+SHARED_SYNC_SECONDS = 1.0
+
+
+class CircuitOpenError(Exception):
+    """Dépendance indisponible: échec immédiat sans appel amont"""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} temporairement indisponible, réessayer dans {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur à sonde unique (half-open)
+
+    Args:
+        name: Nom de la dépendance (logs, erreurs)
+        failure_threshold: Échecs consécutifs avant ouverture
+        recovery_seconds: Durée d'ouverture avant sonde
+        shared: État partagé des workers (None = état local uniquement)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        recovery_seconds: float,
+        shared: Optional[SharedState] = None,
+    ):
+        self.name = name
+        self.shared = shared
+        self._shared_key = f"breaker:{name}:opened_at"
+        self._seen_opened_at = 0.0  # dernière ouverture partagée adoptée/publiée (epoch)
+        self._shared_opened_at = 0.0  # dernière valeur lue dans l'état partagé
+        self._next_sync = 0.0
+        self._sync_task: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.opened_count = 0
+        self.rejected = 0
+
+    def _retry_after(self) -> int:
+        remaining = self._opened_at + self.recovery_seconds - time.monotonic()
+        return max(1, math.ceil(remaining))
+
+    def _background(self, coro_factory) -> Optional[asyncio.Task]:
+        """Lance un accès à l'état partagé sans bloquer (None hors event loop)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        task = loop.create_task(coro_factory())
+        # Référence forte jusqu'à la fin (l'event loop ne garde que des références faibles)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _refresh_shared(self) -> None:
+        try:
+            value = await self.shared.run(self.shared.get, self._shared_key)
+            self._shared_opened_at = float(value) if value else 0.0
+        except Exception as e:
+            logger.warning(f"⚠️ Circuit '{self.name}' shared state read failed: {str(e)}")
+        finally:
+            self._sync_task = None
+
+    async def _write_shared(self, value: str) -> None:
+        try:
+            await self.shared.run(self.shared.set, self._shared_key, value)
+        except Exception as e:
+            logger.warning(f"⚠️ Circuit '{self.name}' shared state write failed: {str(e)}")
+
+    def _sync_shared(self) -> None:
+        """Adopte une ouverture publiée par un autre worker (dernière valeur lue)"""
+        if self.shared is None:
+            return
+        now = time.monotonic()
+        if self._sync_task is None and now >= self._next_sync:
+            self._next_sync = now + SHARED_SYNC_SECONDS
+            self._sync_task = self._background(self._refresh_shared)
+        opened_at = self._shared_opened_at
+        if self.state != CLOSED or opened_at <= self._seen_opened_at:
+            return
+        self._seen_opened_at = opened_at
+        elapsed = time.time() - opened_at
+        if elapsed < self.recovery_seconds:
+            self.state = OPEN
+            self._opened_at = time.monotonic() - elapsed
+            logger.warning(f"🚨 Circuit '{self.name}' opened by another worker")
+
+    def _publish(self, opened: bool) -> None:
+        if self.shared is None:
+            return
+        value = "0"
+        if opened:
+            self._seen_opened_at = time.time()
+            value = repr(self._seen_opened_at)
+        # Écritures dans l'ordre (thread unique de l'état partagé)
+        self._background(lambda: self._write_shared(value))
+
+    def check(self) -> None:
+        """Lève CircuitOpenError si un appel serait rejeté (sans réserver la sonde)"""
+        self._sync_shared()
+        if self.state == OPEN and time.monotonic() - self._opened_at < self.recovery_seconds:
+            raise CircuitOpenError(self.name, self._retry_after())
+        if self.state == HALF_OPEN and self._probe_in_flight:
+            raise CircuitOpenError(self.name, 1)
+
+    def before_call(self) -> None:
+        """
+        Autorise un appel (ou la sonde half-open)
+
+        Raises:
+            CircuitOpenError: Si le circuit est ouvert ou la sonde déjà en cours
+        """
+        try:
+            self.check()
+        except CircuitOpenError:
+            self.rejected += 1
+            raise
+        if self.state == OPEN:
+            self.state = HALF_OPEN
+            logger.info(f"🔌 Circuit '{self.name}' half-open - probing upstream")
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info(f"✅ Circuit '{self.name}' closed - upstream recovered")
+            self._publish(opened=False)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.opened_count += 1
+                logger.error(
+                    f"🚨 Circuit '{self.name}' open after {self.consecutive_failures} failures "
+                    f"- failing fast for {self.recovery_seconds:.0f}s"
+                )
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self._publish(opened=True)
+
+    def release(self) -> None:
+        """Appel terminé sans verdict (annulé): libère la sonde"""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, object]:
+        """État du disjoncteur"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "retry_in_seconds": self._retry_after() if self.state == OPEN else 0,
+            "opened_count": self.opened_count,
+            "rejected": self.rejected,
+        }
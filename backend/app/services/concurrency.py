@@ -0,0 +1,86 @@
+"""
+Concurrence bornée par endpoint + backpressure
+
+Chaque endpoint consommateur de Gemini (scan, chat, quick-advice, health)
+dispose de son propre budget d'appels simultanés: un pic de scans ne peut
+plus affamer le chat ni les health checks. Au-delà de la file d'attente
+autorisée, la requête est refusée immédiatement (429 + Retry-After) plutôt
+que d'attendre indéfiniment.
+"""
+
+from typing import Dict
+import asyncio
+
+
+class GeminiOverloadedError(Exception):
+    """File d'attente pleine: le client doit réessayer plus tard"""
+
+    def __init__(self, endpoint: str, retry_after: int):
+        super().__init__(f"Service saturé ({endpoint}), réessayer dans {retry_after}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """
+    Sémaphore avec file d'attente bornée et métriques
+
+    Args:
+        name: Nom de l'endpoint (pour les métriques et erreurs)
+        max_concurrency: Appels simultanés maximum
+        max_queue: Requêtes en attente maximum avant rejet
+        retry_after: Délai suggéré au client (secondes)
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, retry_after: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.completed = 0
+
+    def check(self) -> None:
+        """Rejette immédiatement si la file est pleine"""
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise GeminiOverloadedError(self.name, self.retry_after)
+
+    async def __aenter__(self) -> "ConcurrencyLimiter":
+        self.check()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.in_flight -= 1
+        self.completed += 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Profondeur de file et compteurs"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "completed": self.completed,
+        }
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """'scan=4,chat=8' -> {'scan': 4, 'chat': 8}"""
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            limits[name.strip()] = max(1, int(value))
+    return limits
@@ -2,21 +2,132 @@
 Service Gemini - Interface avec Google Gemini AI
 
 Gestion professionnelle:
-- Retry automatique sur erreurs temporaires
-- Rate limiting
+- Retry avec backoff + jitter sur erreurs temporaires uniquement (429, 5xx)
+- Circuit breaker (fail-fast en quelques ms quand Gemini est en panne)
+- Quota RPM/TPM centralisé, file à priorité (scan > chat > quick-advice > health)
+- Client async natif (grpc.aio, connexions keep-alive), aucun thread bloqué
+- Concurrence bornée par endpoint + backpressure (429 + Retry-After)
+- Streaming natif async (chat token par token)
+- Cache des réponses chat (mémoire + SQLite optionnel)
+- Coalescence des prompts identiques en cours (single-flight, streams inclus)
 - Logging détaillé
 - Error handling gracieux
 """
 
 import google.generativeai as genai
-from typing import Optional, Dict, Any
+from typing import AsyncIterator, Optional, Dict, Any
 import logging
 from functools import lru_cache
 import asyncio
+import time
+from contextlib import asynccontextmanager
 from app.core.config import settings
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.concurrency import ConcurrencyLimiter, GeminiOverloadedError, parse_limits
+from app.services.metrics import gemini_errors, gemini_latency, record_gemini_usage
+from app.services.quota_scheduler import (
+    IMAGE_TOKENS,
+    QuotaScheduler,
+    backoff_delay,
+    estimate_tokens,
+    is_rate_limited,
+    is_retryable,
+    retry_after_hint,
+)
+from app.services.response_cache import cache_key, create_response_cache
+from app.services.shared_state import shared_state
+from app.services.single_flight import SingleFlight
+from app.services.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+# Prompt système pour contexte médical
+CHAT_SYSTEM_PROMPT = """Tu es un assistant médical expert en plantes médicinales africaines.
+
+RÈGLES IMPORTANTES:
+1. Réponds TOUJOURS en français
+2. Sois professionnel mais empathique
+3. Utilise des emojis pour la lisibilité (🌿 💊 ⚠️ ✅)
+4. Structure tes réponses avec des listes à puces
+5. Cite TOUJOURS les sources scientifiques si disponibles
+6. Mentionne TOUJOURS les précautions d'usage
+7. Si c'est une urgence médicale, recommande de consulter un professionnel
+8. Base-toi sur des connaissances validées scientifiquement
+
+CONTEXTE:
+Tu travailles pour REMÉDIA, une plateforme qui démocratise l'accès aux plantes médicinales africaines en combinant savoirs traditionnels et validation scientifique.
+
+RÉPONDEZ MAINTENANT:"""
+
+
+# Prompt identification (sortie JSON contrainte par schéma)
+SCAN_SYSTEM_PROMPT = """Tu es un expert botaniste spécialisé dans les plantes médicinales africaines.
+
+MISSION:
+Identifie la plante dans cette image. Réponds en JSON (en français) avec:
+- name: nom commun principal
+- scientificName: nom scientifique (latin, genre + espèce)
+- confidence: confiance de l'identification en pourcentage (0-100)
+- description: description courte (2-3 phrases)
+- properties: propriétés médicinales validées scientifiquement
+- uses: usages médicinaux traditionnels
+- family: famille botanique
+- habitat: habitat / régions d'Afrique où la plante pousse
+
+IMPORTANT:
+- Si l'identification est incertaine, baisse la confiance et dis-le dans la description
+- Si la plante est toxique, commence la description par "TOXIQUE:"
+- Ne jamais inventer de propriétés non documentées"""
+
+# Prompt de réparation d'une sortie JSON invalide
+REPAIR_PROMPT = """La sortie JSON suivante ne respecte pas le schéma attendu.
+
+ERREURS DE VALIDATION:
+{error}
+
+SORTIE À CORRIGER:
+{raw_output}
+
+Renvoie uniquement le JSON corrigé, en conservant les informations existantes."""
+
+
+def _json_config(response_schema: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """generation_config du mode JSON contraint (None = texte libre)"""
+    if response_schema is None:
+        return None
+    return {"response_mime_type": "application/json", "response_schema": response_schema}
+
+
+def flight_key(key: str, endpoint: str, use_cache: bool) -> str:
+    """
+    Clé de coalescence: même prompt, même endpoint, même politique de cache
+
+    Un appel sans cache (health check) ne rejoint jamais un chat et ne le
+    mène pas: l'écriture du cache du meneur serait perdue pour tous.
+    """
+    return f"{endpoint}\x00{int(use_cache)}\x00{key}"
+
+
+class UpstreamUsage:
+    """Issue d'un appel gardé, renseignée par l'appelant (réconciliation TPM)"""
+
+    def __init__(self):
+        self.responded = False  # au moins une réponse (ou un morceau) reçue
+        self.total_tokens: Optional[int] = None  # usage réel si connu
+
+    def record(self, usage: Any) -> None:
+        self.responded = True
+        total = getattr(usage, "total_token_count", None)
+        if total is not None:
+            self.total_tokens = total
+
+    def settled_tokens(self) -> Optional[int]:
+        """Usage à facturer: réel, 0 sans réponse, None = estimation conservée"""
+        if self.total_tokens is not None:
+            return self.total_tokens
+        return None if self.responded else 0
+
+
 class GeminiService:
     """
     Service wrapper pour Google Gemini AI
@@ -25,7 +136,7 @@ class GeminiService:
     - Configuration centralisée
     - Retry logic
     - Error handling
-    - Caching (pour prompts système)
+    - Caching (réponses chat par prompt normalisé + modèle + température)
     """
     
     def __init__(self):
@@ -34,6 +145,29 @@ class GeminiService:
         self.model_name = settings.gemini_model
         self._model = None
         self._configured = False
+        self.cache = create_response_cache()
+        self.limiters: Dict[str, ConcurrencyLimiter] = {
+            endpoint: ConcurrencyLimiter(
+                endpoint,
+                max_concurrency=limit,
+                max_queue=settings.gemini_max_queue,
+                retry_after=settings.gemini_queue_retry_after,
+            )
+            for endpoint, limit in parse_limits(settings.gemini_concurrency_limits).items()
+        }
+        self.flights = SingleFlight()
+        self.breaker = CircuitBreaker(
+            "gemini",
+            failure_threshold=settings.gemini_breaker_failure_threshold,
+            recovery_seconds=settings.gemini_breaker_recovery_seconds,
+            shared=shared_state,
+        )
+        self.scheduler = QuotaScheduler(
+            requests_per_minute=settings.rate_limit_per_minute,
+            tokens_per_minute=settings.gemini_tokens_per_minute,
+            max_wait=settings.gemini_quota_max_wait,
+            shared=shared_state,
+        )
         
         if self.api_key:
             self._configure()
@@ -49,18 +183,148 @@ class GeminiService:
             logger.error(f"❌ Gemini configuration failed: {str(e)}")
             self._configured = False
     
-    async def chat_medical(self, prompt: str, max_retries: int = 3) -> str:
+    def limiter(self, endpoint: str) -> ConcurrencyLimiter:
+        """Limiteur de concurrence d'un endpoint (chat par défaut)"""
+        return self.limiters.get(endpoint) or self.limiters["chat"]
+    
+    def check_capacity(self, endpoint: str) -> None:
+        """Lève GeminiOverloadedError si la file de l'endpoint est pleine"""
+        self.limiter(endpoint).check()
+    
+    def queue_stats(self) -> Dict[str, Dict[str, int]]:
+        """Profondeur des files d'attente par endpoint"""
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+    
+    def quota_stats(self) -> Dict[str, Any]:
+        """Budgets RPM/TPM et file à priorité"""
+        return self.scheduler.stats()
+    
+    def check_available(self) -> None:
+        """Lève CircuitOpenError si Gemini est considéré indisponible"""
+        self.breaker.check()
+    
+    @asynccontextmanager
+    async def _upstream_call(self, endpoint: str, reserved_tokens: int) -> AsyncIterator[UpstreamUsage]:
+        """
+        Garde autour d'un appel Gemini: disjoncteur, slot de concurrence, quota
+        
+        L'issue de l'appel alimente le disjoncteur (seules les erreurs
+        transitoires comptent comme échecs) et les métriques (durée hors
+        attente de slot/quota). Un 429 serveur suspend l'ordonnanceur le
+        temps indiqué par RetryInfo. La réservation TPM est toujours
+        réconciliée avec l'usage noté par l'appelant: un appel échoué sans
+        réponse rend ses tokens.
+        """
+        self.breaker.before_call()
+        started = None
+        usage = UpstreamUsage()
+        try:
+            async with self.limiter(endpoint):
+                await self.scheduler.acquire(endpoint, reserved_tokens)
+                started = time.perf_counter()
+                try:
+                    yield usage
+                finally:
+                    self.scheduler.settle(reserved_tokens, usage.settled_tokens())
+        except GeminiOverloadedError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            if started is not None:
+                gemini_latency.observe(time.perf_counter() - started, endpoint, "error")
+                gemini_errors.inc(endpoint, type(e).__name__)
+            if is_rate_limited(e):
+                self.scheduler.penalize(retry_after_hint(e))
+            if is_retryable(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        except BaseException:
+            # Annulation (client parti): pas de verdict sur l'amont
+            if started is not None:
+                gemini_latency.observe(time.perf_counter() - started, endpoint, "cancelled")
+            self.breaker.release()
+            raise
+        else:
+            gemini_latency.observe(time.perf_counter() - started, endpoint, "success")
+            self.breaker.record_success()
+    
+    async def _generate(
+        self,
+        endpoint: str,
+        contents: Any,
+        reserved_tokens: int,
+        generation_config: Optional[Dict[str, Any]] = None
+    ):
+        """Appel Gemini unique (gardé), puis ajustement TPM avec l'usage réel"""
+        async with self._upstream_call(endpoint, reserved_tokens) as call:
+            response = await self._model.generate_content_async(
+                contents, generation_config=generation_config
+            )
+            usage = getattr(response, "usage_metadata", None)
+            call.record(usage)
+        
+        record_gemini_usage(endpoint, usage)
+        return response
+    
+    async def _generate_with_retry(
+        self,
+        endpoint: str,
+        contents: Any,
+        reserved_tokens: int,
+        max_retries: int,
+        generation_config: Optional[Dict[str, Any]] = None
+    ):
+        """
+        `_generate` avec retry sur erreurs transitoires uniquement
+        
+        Délai = indication serveur si présente, sinon backoff exponentiel
+        avec jitter. Les erreurs client (4xx, prompt bloqué...) échouent
+        immédiatement sans consommer de quota supplémentaire.
+        """
+        for attempt in range(max_retries):
+            try:
+                logger.info(f"🤖 Calling Gemini API ({endpoint}, attempt {attempt + 1}/{max_retries})")
+                return await self._generate(
+                    endpoint, contents, reserved_tokens, generation_config
+                )
+                
+            except (GeminiOverloadedError, CircuitOpenError):
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Gemini attempt {attempt + 1} failed: {str(e)}")
+                
+                if not is_retryable(e) or attempt == max_retries - 1:
+                    raise
+                
+                wait_time = retry_after_hint(e) or backoff_delay(attempt)
+                logger.info(f"⏳ Retrying in {wait_time:.1f}s...")
+                await asyncio.sleep(wait_time)
+    
+    @traced("gemini.chat_medical")
+    async def chat_medical(
+        self,
+        prompt: str,
+        max_retries: int = 3,
+        use_cache: bool = True,
+        endpoint: str = "chat"
+    ) -> str:
         """
         Chat médical avec Gemini
         
         Args:
             prompt: Question ou contexte utilisateur
             max_retries: Nombre de tentatives en cas d'erreur
+            use_cache: Lire/écrire le cache de réponses (False pour les health checks)
+            endpoint: Budget de concurrence utilisé ("chat", "quick_advice", "health")
             
         Returns:
             str: Réponse textuelle de Gemini
             
         Raises:
+            GeminiOverloadedError: Si la file de l'endpoint ou le quota est saturé
+            CircuitOpenError: Si Gemini est indisponible (disjoncteur ouvert)
             Exception: Si toutes les tentatives échouent
         """
         if not self._configured:
@@ -68,121 +332,170 @@ class GeminiService:
             logger.error(f"❌ {error_msg}")
             raise ValueError(error_msg)
         
-        # Prompt système pour contexte médical
-        system_prompt = """Tu es un assistant médical expert en plantes médicinales africaines.
-
-RÈGLES IMPORTANTES:
-1. Réponds TOUJOURS en français
-2. Sois professionnel mais empathique
-3. Utilise des emojis pour la lisibilité (🌿 💊 ⚠️ ✅)
-4. Structure tes réponses avec des listes à puces
-5. Cite TOUJOURS les sources scientifiques si disponibles
-6. Mentionne TOUJOURS les précautions d'usage
-7. Si c'est une urgence médicale, recommande de consulter un professionnel
-8. Base-toi sur des connaissances validées scientifiquement
-
-CONTEXTE:
-Tu travailles pour REMÉDIA, une plateforme qui démocratise l'accès aux plantes médicinales africaines en combinant savoirs traditionnels et validation scientifique.
-
-RÉPONDEZ MAINTENANT:"""
-        
         # Combiner système + user prompt
-        full_prompt = f"{system_prompt}\n\n{prompt}"
+        full_prompt = f"{CHAT_SYSTEM_PROMPT}\n\n{prompt}"
         
-        # Retry loop
-        for attempt in range(max_retries):
+        # Cache: réponse déjà générée pour ce prompt ?
+        key = cache_key(full_prompt, self.model_name, settings.gemini_temperature)
+        if use_cache and self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                logger.info(f"⚡ Gemini response served from cache ({len(cached)} chars)")
+                return cached
+        
+        # Prompts identiques concurrents: une seule génération partagée
+        return await self.flights.do(
+            flight_key(key, endpoint, use_cache),
+            lambda: self._generate_chat(
+                full_prompt, key if use_cache else None, endpoint, max_retries
+            ),
+        )
+    
+    async def _generate_chat(
+        self,
+        full_prompt: str,
+        key: Optional[str],
+        endpoint: str,
+        max_retries: int
+    ) -> str:
+        """Génération chat amont (avec retry) + écriture cache si `key`"""
+        reserved = estimate_tokens(full_prompt) + settings.gemini_max_tokens
+        try:
+            response = await self._generate_with_retry(endpoint, full_prompt, reserved, max_retries)
+        except (GeminiOverloadedError, CircuitOpenError):
+            raise
+        except Exception as e:
+            logger.error(f"❌ Gemini call failed: {str(e)}")
+            raise Exception(f"Erreur Gemini: {str(e)}")
+        
+        # Extraire texte de la réponse
+        if hasattr(response, 'text'):
+            response_text = response.text
+        elif hasattr(response, 'parts'):
+            # Si réponse en parties, combiner
+            response_text = ' '.join([part.text for part in response.parts if hasattr(part, 'text')])
+        else:
+            # Fallback: convertir en string
+            response_text = str(response)
+        
+        logger.info(f"✅ Gemini response received ({len(response_text)} chars)")
+        
+        if key is not None and self.cache is not None and response_text:
+            await self.cache.set(key, response_text)
+        
+        # CRITIQUE: Retourner STRING, pas dict
+        return response_text
+    
+    async def stream_chat_medical(self, prompt: str, use_cache: bool = True) -> AsyncIterator[str]:
+        """
+        Chat médical en streaming (morceaux de texte au fil de la génération)
+        
+        Utilise l'API async native de Gemini (aucun thread bloqué par flux).
+        Les flux identiques concurrents partagent une seule génération; elle
+        est annulée quand plus aucun consommateur n'écoute (clients
+        déconnectés). La réponse complète alimente le cache de réponses.
+        
+        Args:
+            prompt: Question ou contexte utilisateur
+            use_cache: Lire/écrire le cache de réponses
+            
+        Yields:
+            str: Morceaux de la réponse
+        """
+        if not self._configured:
+            error_msg = "Gemini API non configurée. Vérifier GEMINI_API_KEY."
+            logger.error(f"❌ {error_msg}")
+            raise ValueError(error_msg)
+        
+        full_prompt = f"{CHAT_SYSTEM_PROMPT}\n\n{prompt}"
+        
+        key = cache_key(full_prompt, self.model_name, settings.gemini_temperature)
+        if use_cache and self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                logger.info(f"⚡ Gemini stream served from cache ({len(cached)} chars)")
+                yield cached
+                return
+        
+        stream = self.flights.stream(
+            flight_key(key, "chat", use_cache), lambda: self._stream_chat(full_prompt, key if use_cache else None)
+        )
+        try:
+            async for text in stream:
+                yield text
+        finally:
+            await stream.aclose()
+    
+    async def _stream_chat(self, full_prompt: str, key: Optional[str]) -> AsyncIterator[str]:
+        """Flux chat amont (un par groupe d'abonnés) + écriture cache si `key`"""
+        logger.info("🤖 Streaming Gemini response")
+        parts = []
+        reserved = estimate_tokens(full_prompt) + settings.gemini_max_tokens
+        async with self._upstream_call("chat", reserved) as call:
+            response = await self._model.generate_content_async(full_prompt, stream=True)
+            completed = False
+            usage = None
             try:
-                logger.info(f"🤖 Calling Gemini API (attempt {attempt + 1}/{max_retries})")
-                
-                # Générer réponse (sync call dans async context)
-                response = await asyncio.to_thread(
-                    self._model.generate_content,
-                    full_prompt
-                )
-                
-                # Extraire texte de la réponse
-                if hasattr(response, 'text'):
-                    response_text = response.text
-                elif hasattr(response, 'parts'):
-                    # Si réponse en parties, combiner
-                    response_text = ' '.join([part.text for part in response.parts if hasattr(part, 'text')])
-                else:
-                    # Fallback: convertir en string
-                    response_text = str(response)
-                
-                logger.info(f"✅ Gemini response received ({len(response_text)} chars)")
-                
-                # CRITIQUE: Retourner STRING, pas dict
-                return response_text
-                
-            except Exception as e:
-                logger.warning(f"⚠️ Gemini attempt {attempt + 1} failed: {str(e)}")
-                
-                if attempt < max_retries - 1:
-                    # Attendre avant retry (exponential backoff)
-                    wait_time = 2 ** attempt  # 1s, 2s, 4s
-                    logger.info(f"⏳ Retrying in {wait_time}s...")
-                    await asyncio.sleep(wait_time)
-                else:
-                    # Toutes tentatives échouées
-                    logger.error(f"❌ All Gemini attempts failed: {str(e)}")
-                    raise Exception(f"Erreur Gemini après {max_retries} tentatives: {str(e)}")
-    
-    async def identify_plant(self, image_data: bytes, prompt: Optional[str] = None) -> str:
+                async for chunk in response:
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    call.record(usage)
+                    text = getattr(chunk, "text", "")
+                    if text:
+                        parts.append(text)
+                        yield text
+                completed = True
+            finally:
+                record_gemini_usage("chat", usage)
+                if not completed:
+                    # Consommateur parti: annuler l'appel amont (libère la connexion)
+                    call = getattr(response, "_iterator", None)
+                    cancel = getattr(call, "cancel", None)
+                    if callable(cancel):
+                        cancel()
+                    logger.info(f"🛑 Gemini stream cancelled after {len(parts)} chunks")
+        
+        response_text = "".join(parts)
+        logger.info(f"✅ Gemini stream completed ({len(response_text)} chars)")
+        if key is not None and self.cache is not None and response_text:
+            await self.cache.set(key, response_text)
+    
+    @traced("gemini.identify_plant")
+    async def identify_plant(
+        self,
+        image_data: bytes,
+        prompt: Optional[str] = None,
+        mime_type: str = "image/jpeg",
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
         Identifier une plante depuis une image
         
         Args:
-            image_data: Bytes de l'image
+            image_data: Bytes de l'image (déjà prétraitée, cf. image_preprocessing)
             prompt: Prompt additionnel optionnel
+            mime_type: Type MIME des bytes envoyés
+            response_schema: Schéma JSON imposé à la sortie (mode JSON contraint)
             
         Returns:
-            str: Identification de la plante
+            str: Identification de la plante (JSON si `response_schema`)
         """
         if not self._configured:
             raise ValueError("Gemini API non configurée")
         
         try:
-            # Prompt système pour identification
-            system_prompt = """Tu es un expert botaniste spécialisé dans les plantes médicinales africaines.
-
-MISSION:
-Identifie la plante dans cette image et fournis:
-1. Nom scientifique (latin)
-2. Noms communs (français + locaux africains)
-3. Famille botanique
-4. Usages médicinaux traditionnels
-5. Propriétés médicinales validées scientifiquement
-6. Préparation recommandée
-7. Dosage sûr
-8. Précautions et contre-indications
-
-FORMAT:
-Utilise emojis (🌿 pour le nom, 💊 pour usages, ⚠️ pour précautions).
-Structure en sections claires.
-
-IMPORTANT:
-- Si l'identification est incertaine, le dire clairement
-- Si la plante est toxique, l'indiquer en GRAS
-- Toujours mentionner de consulter un expert en cas de doute
-
-RÉPONDEZ MAINTENANT:"""
-            
-            full_prompt = system_prompt
+            full_prompt = SCAN_SYSTEM_PROMPT
             if prompt:
                 full_prompt += f"\n\nContexte additionnel: {prompt}"
             
-            # Préparer image pour Gemini
-            from PIL import Image
-            import io
-            
-            image = Image.open(io.BytesIO(image_data))
+            # Image envoyée telle quelle (blob inline, pas de ré-encodage SDK)
+            image = {"mime_type": mime_type, "data": image_data}
             
             # Générer avec image
             logger.info("🔍 Identifying plant with Gemini Vision...")
-            response = await asyncio.to_thread(
-                self._model.generate_content,
-                [full_prompt, image]
+            reserved = estimate_tokens(full_prompt) + IMAGE_TOKENS + settings.gemini_max_tokens
+            response = await self._generate_with_retry(
+                "scan", [full_prompt, image], reserved, max_retries=2,
+                generation_config=_json_config(response_schema),
             )
             
             # Extraire texte
@@ -196,10 +509,46 @@ RÉPONDEZ MAINTENANT:"""
             # CRITIQUE: Retourner STRING
             return response_text
             
+        except (GeminiOverloadedError, CircuitOpenError):
+            raise
         except Exception as e:
             logger.error(f"❌ Plant identification failed: {str(e)}")
             raise Exception(f"Erreur identification plante: {str(e)}")
     
+    async def repair_json(
+        self,
+        raw_output: str,
+        error: str,
+        response_schema: Dict[str, Any],
+        endpoint: str = "scan"
+    ) -> str:
+        """
+        Répare une sortie JSON invalide (appel texte seul, sans image)
+        
+        Bien moins coûteux que de relancer l'identification: le modèle
+        reçoit uniquement la sortie fautive et les erreurs de validation.
+        
+        Args:
+            raw_output: Sortie du modèle rejetée par la validation
+            error: Erreurs de validation
+            response_schema: Schéma JSON attendu
+            endpoint: Budget de concurrence / quota utilisé
+            
+        Returns:
+            str: JSON corrigé
+        """
+        if not self._configured:
+            raise ValueError("Gemini API non configurée")
+        
+        repair_prompt = REPAIR_PROMPT.format(error=error, raw_output=raw_output)
+        reserved = estimate_tokens(repair_prompt) + settings.gemini_max_tokens
+        logger.info("🩹 Repairing invalid structured output")
+        response = await self._generate_with_retry(
+            endpoint, repair_prompt, reserved, max_retries=1,
+            generation_config=_json_config(response_schema),
+        )
+        return response.text
+    
     @lru_cache(maxsize=100)
     def get_cached_plant_info(self, plant_name: str) -> Optional[Dict[str, Any]]:
         """
@@ -0,0 +1,157 @@
+"""
+Prétraitement des images avant Gemini Vision
+
+Les photos de téléphone font 4-12 MB alors que le modèle découpe l'image
+en tuiles de 768 px: envoyer la pleine résolution coûte de la bande
+passante et de la latence pour rien. Chaque upload est donc:
+
+1. Décodé en mode draft (JPEG: décodage DCT réduit, 2-8x plus rapide)
+2. Redressé selon l'orientation EXIF
+3. Réduit à `scan_image_max_side` px sur le plus grand côté
+4. Débarrassé de ses métadonnées (EXIF, GPS, profils)
+5. Ré-encodé en JPEG compact
+6. Résumé par un hash perceptuel (dHash) pour le cache des scans
+
+Le travail CPU tourne dans un pool de processus (le GIL n'est pas bloqué,
+l'event loop reste réactive pendant les rafales de scans).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple, Optional, Tuple
+import asyncio
+import io
+import logging
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+from app.services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+# Signatures (premiers octets) des formats acceptés: le type annoncé par
+# le client n'est pas fiable, le contenu l'est
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+)
+
+
+class PreparedImage(NamedTuple):
+    """Image prête pour l'upload Gemini"""
+    data: bytes
+    mime_type: str
+    original_size: Tuple[int, int]
+    size: Tuple[int, int]
+    original_bytes: int
+    phash: int
+
+    def as_part(self) -> dict:
+        """Blob inline accepté par generate_content"""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Type MIME réel d'après les premiers octets (None si format non supporté)"""
+    for signature, mime_type in _SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def dhash(image: Image.Image, size: int = 8) -> int:
+    """Hash de différence (gradients horizontaux) sur size*size bits"""
+    small = image.convert("L").resize((size + 1, size), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return value
+
+
+def preprocess_image(data: bytes, max_side: int, quality: int) -> PreparedImage:
+    """
+    Décode, redresse, réduit et ré-encode une image (exécuté hors event loop)
+
+    Raises:
+        PIL.UnidentifiedImageError: Si les bytes ne sont pas une image
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        original_size = image.size
+        # JPEG: décodage directement à une échelle réduite (>= taille cible)
+        image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+        # Nouvelle image sans exif/icc: métadonnées supprimées à l'encodage
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=quality, optimize=True)
+        return PreparedImage(
+            data=output.getvalue(),
+            mime_type="image/jpeg",
+            original_size=original_size,
+            size=image.size,
+            original_bytes=len(data),
+            phash=dhash(image),
+        )
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if _pool is None and settings.scan_preprocess_workers > 0:
+        _pool = ProcessPoolExecutor(max_workers=settings.scan_preprocess_workers)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Arrête le pool de processus (shutdown de l'application)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+@traced("image.prepare")
+async def prepare_image(data: bytes) -> PreparedImage:
+    """
+    Prétraite un upload dans le pool de processus
+
+    Sans pool (workers=0) ou si le pool est cassé, le travail passe par
+    un thread: le scan reste fonctionnel.
+    """
+    args = (data, settings.scan_image_max_side, settings.scan_image_quality)
+    pool = _get_pool()
+    if pool is not None:
+        try:
+            prepared = await asyncio.get_running_loop().run_in_executor(
+                pool, preprocess_image, *args
+            )
+        except BrokenProcessPool:
+            logger.warning("⚠️ Image process pool broken - recreating, using a thread meanwhile")
+            shutdown_pool()
+            prepared = await asyncio.to_thread(preprocess_image, *args)
+    else:
+        prepared = await asyncio.to_thread(preprocess_image, *args)
+
+    logger.info(
+        f"🖼️ Image prepared: {prepared.original_size[0]}x{prepared.original_size[1]} "
+        f"({prepared.original_bytes // 1024} KB) -> {prepared.size[0]}x{prepared.size[1]} "
+        f"({len(prepared.data) // 1024} KB)"
+    )
+    return prepared
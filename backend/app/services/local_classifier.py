@@ -0,0 +1,221 @@
+"""
+Classifieur local (CPU) en première passe avant Gemini Vision
+
+Quelques espèces du catalogue (Neem, Moringa, Artemisia, Kinkeliba...)
+représentent l'essentiel des scans. Un petit modèle d'embedding d'images
+(ONNX, CPU) compare chaque scan aux images de référence du catalogue:
+une correspondance nette répond immédiatement, seules les images
+incertaines partent chez Gemini.
+
+- Références: `local_classifier_reference_dir`, associées aux fiches du
+  catalogue par `data/reference_images.json` (id -> fichiers)
+- Modèle: tout extracteur de caractéristiques ONNX à entrée image NCHW
+  (MobileNet, EfficientNet, encodeur visuel CLIP...), normalisation ImageNet
+- Décision: similarité cosinus >= `local_classifier_threshold` (plancher
+  absolu) ET écart >= `local_classifier_margin` avec la 2e espèce comme avec
+  les références hors catalogue (clé `_other` du manifeste: plantes que le
+  classifieur ne doit pas reconnaître). Une image plus proche d'une plante
+  hors catalogue part chez Gemini
+- La similarité n'est pas une probabilité: elle est renvoyée telle quelle,
+  jamais présentée comme un pourcentage de confiance
+- Dépendances optionnelles (onnxruntime, numpy): sans elles, sans modèle
+  ou sans références, l'étape est simplement désactivée
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import io
+import json
+import logging
+import threading
+
+from PIL import Image
+
+from app.core.config import APP_DIR, settings
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_MANIFEST = APP_DIR / "data" / "reference_images.json"
+
+# Clé du manifeste des références négatives (plantes hors catalogue)
+OUT_OF_CATALOG = "_other"
+
+# Normalisation ImageNet (convention des extracteurs ONNX courants)
+_MEAN = (0.485, 0.456, 0.406)
+_STD = (0.229, 0.224, 0.225)
+_DEFAULT_INPUT_SIDE = 224
+
+
+class LocalPlantClassifier:
+    """
+    Plus proche voisin sur embeddings d'images de référence
+
+    Args:
+        model_path: Fichier .onnx de l'extracteur
+        reference_dir: Répertoire des images de référence
+        threshold: Similarité cosinus minimale pour répondre localement
+        margin: Écart minimal avec la deuxième espèce
+    """
+
+    def __init__(self, model_path: str, reference_dir: str, threshold: float, margin: float):
+        self.model_path = model_path
+        self.reference_dir = Path(reference_dir)
+        self.threshold = threshold
+        self.margin = margin
+        self._session = None
+        self._np = None
+        self._input_name = ""
+        self._input_side = _DEFAULT_INPUT_SIDE
+        self._labels: List[str] = []
+        self._references = None  # matrice (n_images, dim) normalisée
+        self._init_lock = threading.Lock()
+        self.hits = 0
+        self.escalated = 0
+        self.errors = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._references is not None
+
+    def _tensor(self, image: Image.Image):
+        """Image PIL -> tenseur float32 NCHW normalisé"""
+        np = self._np
+        image = image.convert("RGB").resize(
+            (self._input_side, self._input_side), Image.Resampling.BILINEAR
+        )
+        array = np.asarray(image, dtype=np.float32) / 255.0
+        array = (array - np.array(_MEAN, dtype=np.float32)) / np.array(_STD, dtype=np.float32)
+        return array.transpose(2, 0, 1)[np.newaxis, ...]
+
+    def _embed(self, image: Image.Image):
+        np = self._np
+        output = self._session.run(None, {self._input_name: self._tensor(image)})[0]
+        vector = np.asarray(output, dtype=np.float32).reshape(-1)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _init(self) -> None:
+        """Charge le modèle et calcule les embeddings de référence"""
+        with self._init_lock:
+            if self.ready:
+                return
+            try:
+                import numpy
+                import onnxruntime
+            except ImportError:
+                logger.warning("⚠️ onnxruntime/numpy not installed - local classifier disabled")
+                return
+            if not Path(self.model_path).is_file():
+                logger.warning(f"⚠️ Local classifier model not found ({self.model_path}) - disabled")
+                return
+
+            self._np = numpy
+            self._session = onnxruntime.InferenceSession(
+                self.model_path, providers=["CPUExecutionProvider"]
+            )
+            model_input = self._session.get_inputs()[0]
+            self._input_name = model_input.name
+            side = model_input.shape[-1]
+            if isinstance(side, int) and side > 0:
+                self._input_side = side
+
+            manifest: Dict[str, List[str]] = json.loads(REFERENCE_MANIFEST.read_text(encoding="utf-8"))
+            labels, vectors = [], []
+            for plant_id, filenames in manifest.items():
+                for filename in filenames:
+                    path = self.reference_dir / filename
+                    if not path.is_file():
+                        continue
+                    with Image.open(path) as image:
+                        vectors.append(self._embed(image))
+                    labels.append(plant_id)
+
+            if not vectors or set(labels) == {OUT_OF_CATALOG}:
+                logger.warning(f"⚠️ No reference images in {self.reference_dir} - local classifier disabled")
+                return
+            if OUT_OF_CATALOG not in labels:
+                logger.warning("⚠️ No out-of-catalog reference images - unknown plants rejected by threshold only")
+            self._labels = labels
+            self._references = numpy.stack(vectors)
+            logger.info(
+                f"🌱 Local classifier ready ({len(vectors)} reference images, "
+                f"{len(set(labels) - {OUT_OF_CATALOG})} species)"
+            )
+
+    async def warmup(self) -> None:
+        """Initialise le classifieur hors event loop (erreurs journalisées)"""
+        try:
+            await asyncio.to_thread(self._init)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ Local classifier initialization failed: {str(e)}")
+
+    def _classify(self, image_data: bytes) -> Tuple[Optional[str], float]:
+        with Image.open(io.BytesIO(image_data)) as image:
+            similarities = self._references @ self._embed(image)
+
+        # Meilleur score par espèce (plusieurs références possibles)
+        best: Dict[str, float] = {}
+        for label, similarity in zip(self._labels, similarities.tolist()):
+            if similarity > best.get(label, -1.0):
+                best[label] = similarity
+        # Les références hors catalogue concurrencent la meilleure espèce
+        other = best.pop(OUT_OF_CATALOG, -1.0)
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        plant_id, top = ranked[0]
+        runner_up = max(ranked[1][1] if len(ranked) > 1 else -1.0, other)
+        if top >= self.threshold and top - runner_up >= self.margin:
+            return plant_id, top
+        return None, top
+
+    async def classify(self, image_data: bytes) -> Optional[Tuple[str, float]]:
+        """
+        Espèce du catalogue reconnue avec certitude
+
+        Args:
+            image_data: Image prétraitée (JPEG)
+
+        Returns:
+            (id catalogue, similarité) ou None (image à envoyer à Gemini)
+        """
+        if not self.ready:
+            return None
+        try:
+            plant_id, similarity = await asyncio.to_thread(self._classify, image_data)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Local classification failed: {str(e)}")
+            return None
+        if plant_id is None:
+            self.escalated += 1
+            logger.info(f"🌱 Local classifier unsure (best={similarity:.3f}) - escalating to Gemini")
+            return None
+        self.hits += 1
+        return plant_id, similarity
+
+    def stats(self) -> Dict[str, object]:
+        """Métriques du classifieur"""
+        decided = self.hits + self.escalated
+        return {
+            "ready": self.ready,
+            "threshold": self.threshold,
+            "local_hits": self.hits,
+            "escalated": self.escalated,
+            "errors": self.errors,
+            "local_ratio": round(self.hits / decided, 4) if decided else 0.0,
+        }
+
+
+def create_local_classifier() -> Optional[LocalPlantClassifier]:
+    """Construit le classifieur selon la configuration (None si désactivé)"""
+    if not settings.local_classifier_enabled:
+        return None
+    return LocalPlantClassifier(
+        model_path=settings.local_classifier_model_path,
+        reference_dir=settings.local_classifier_reference_dir,
+        threshold=settings.local_classifier_threshold,
+        margin=settings.local_classifier_margin,
+    )
+
+
+local_classifier = create_local_classifier()
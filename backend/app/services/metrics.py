@@ -0,0 +1,263 @@
+"""
+Métriques au format d'exposition Prometheus (texte 0.0.4)
+
+Registre minimal, sans dépendance: compteurs, jauges et histogrammes
+étiquetés, plus des collecteurs appelés au moment du scrape pour exposer
+les compteurs déjà tenus par les services (caches, files, disjoncteur...).
+
+- Écritures depuis l'event loop uniquement: pas de verrou, une
+  observation = une recherche dichotomique + quelques additions
+- Étiquettes à faible cardinalité: modèle de route (pas le chemin brut),
+  groupes et méthodes HTTP en liste fermée ("other" sinon) - un client
+  ne peut pas créer de séries arbitraires
+- Le coût du rendu est payé par le scrape, pas par les requêtes
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+# (nom, type, aide, [(étiquettes, valeur)])
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+# Secondes: de la route catalogue en cache (~1 ms) à l'appel Gemini lent
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Valeurs d'étiquettes autorisées (le reste est regroupé sous "other")
+ROUTE_GROUPS = frozenset({"scan", "chat", "plants", "admin", "health"})
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, values: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Compteur monotone"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self._labels(labels))} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Valeur instantanée (peut baisser)"""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Histogramme à seaux fixes (cumulés au rendu)"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # étiquettes -> [comptes par seau (+Inf inclus), somme, total]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total, count) in list(self._series.items()):
+            base = self._labels(labels)
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels({**base, 'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(base)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(base)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Métriques déclarées + collecteurs évalués à chaque scrape"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """Ajoute une source de métriques lue au moment du scrape"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Exposition texte Prometheus de toutes les métriques"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning(f"⚠️ Metrics collector failed: {str(e)}")
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# ============================================
+# MÉTRIQUES DE L'APPLICATION
+# ============================================
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "remedia_http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status")
+)
+http_latency = registry.histogram(
+    "remedia_http_request_duration_seconds", "Durée des requêtes HTTP (réponse complète)", ("method", "route")
+)
+http_in_flight = registry.gauge(
+    "remedia_http_requests_in_flight", "Requêtes HTTP en cours", ("group",)
+)
+
+gemini_latency = registry.histogram(
+    "remedia_gemini_request_duration_seconds", "Durée des appels Gemini (hors attente de quota)", ("endpoint", "outcome")
+)
+gemini_errors = registry.counter(
+    "remedia_gemini_errors_total", "Erreurs des appels Gemini par type", ("endpoint", "error")
+)
+gemini_tokens = registry.counter(
+    "remedia_gemini_tokens_total", "Tokens Gemini consommés", ("endpoint", "kind")
+)
+
+loop_lag = registry.histogram(
+    "remedia_event_loop_lag_seconds", "Retard de l'event loop sur un réveil programmé", (), LOOP_LAG_BUCKETS
+)
+
+
+def route_group(path: str) -> str:
+    """Groupe d'API d'un chemin (/api/v1/<groupe>/..., /health), parmi ROUTE_GROUPS"""
+    if path.startswith("/api/v1/"):
+        group = path[8:].split("/", 1)[0]
+    else:
+        group = path[1:]
+    return group if group in ROUTE_GROUPS else "other"
+
+
+def method_label(method: str) -> str:
+    """Méthode HTTP standard, "other" sinon (méthodes arbitraires acceptées par le serveur)"""
+    return method if method in HTTP_METHODS else "other"
+
+
+def record_gemini_usage(endpoint: str, usage) -> None:
+    """Comptabilise les tokens d'un `usage_metadata` Gemini"""
+    if usage is None:
+        return
+    for kind, attribute in (("prompt", "prompt_token_count"), ("output", "candidates_token_count")):
+        count = getattr(usage, attribute, None)
+        if count:
+            gemini_tokens.inc(endpoint, kind, amount=count)
+
+
+async def monitor_loop_lag(interval: float) -> None:
+    """Mesure en continu le retard de réveil de l'event loop"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        loop_lag.observe(max(0.0, loop.time() - expected))
+
+
+def cache_family(caches: Dict[str, Optional[Dict[str, object]]]) -> Iterable[MetricFamily]:
+    """Hits, misses et ratio des caches à partir de leurs `stats()`"""
+    hits, misses, ratios = [], [], []
+    for name, stats in caches.items():
+        if stats is None:
+            continue
+        labels = {"cache": name}
+        hits.append((labels, stats.get("hits", 0)))
+        misses.append((labels, stats.get("misses", 0)))
+        ratios.append((labels, stats.get("hit_ratio", 0.0)))
+    yield "remedia_cache_hits_total", "counter", "Hits des caches", hits
+    yield "remedia_cache_misses_total", "counter", "Misses des caches", misses
+    yield "remedia_cache_hit_ratio", "gauge", "Ratio de hits des caches depuis le démarrage", ratios
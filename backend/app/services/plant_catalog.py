@@ -0,0 +1,104 @@
+"""
+Catalogue de plantes - Structures de lecture précalculées
+
+Construit une seule fois à partir des enregistrements bruts:
+- Instances `Plant` validées une fois, immuables (aucune re-validation par requête)
+- Table id -> plante (lookup O(1))
+- Alias: slug de l'id et du nom scientifique ("Azadirachta indica" -> "azadirachta-indica")
+- Index de recherche plein texte
+- Index conditions -> plantes (usages, propriétés, synonymes)
+- Corps de réponses JSON pré-sérialisés (avec ETags)
+- Agrégats familles / pays / usages (incrémentaux d'un snapshot à l'autre)
+- Facettes (bitsets) + ordre stable pour la pagination par curseur
+"""
+
+from typing import Dict, Generic, Iterable, Optional, Tuple, Type, TypeVar
+import re
+
+from pydantic import BaseModel
+
+from app.services.plant_conditions import ConditionIndex
+from app.services.plant_facets import FacetIndex, sort_key
+from app.services.plant_responses import PlantResponseCache
+from app.services.plant_stats import CatalogAggregates
+from app.services.plant_search import PlantSearchIndex, fold
+
+PlantModel = TypeVar("PlantModel", bound=BaseModel)
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(text: str) -> str:
+    """Slug URL stable: 'Azadirachta indica' -> 'azadirachta-indica'"""
+    return _SLUG_RE.sub("-", fold(text)).strip("-")
+
+
+class PlantCatalog(Generic[PlantModel]):
+    """
+    Snapshot en lecture seule du catalogue
+
+    Args:
+        records: Enregistrements bruts (dicts) du catalogue
+        model: Modèle pydantic utilisé pour valider chaque plante
+        previous: Snapshot précédent (rechargement): les plantes inchangées
+            sont réutilisées sans re-validation et les agrégats sont mis à
+            jour par delta
+    """
+
+    def __init__(
+        self,
+        records: Iterable[dict],
+        model: Type[PlantModel],
+        previous: Optional["PlantCatalog[PlantModel]"] = None,
+    ):
+        # Ordre stable (nom scientifique, id): base des bitsets et des curseurs
+        self.records: Tuple[dict, ...] = tuple(sorted(records, key=sort_key))
+
+        if previous is None:
+            self.plants: Tuple[PlantModel, ...] = tuple(model(**r) for r in self.records)
+            self.aggregates = CatalogAggregates(self.records)
+        else:
+            old_records = {r["id"]: r for r in previous.records}
+            unchanged = {
+                r["id"] for r in self.records if old_records.get(r["id"]) == r
+            }
+            self.plants = tuple(
+                previous.by_id[r["id"]] if r["id"] in unchanged else model(**r)
+                for r in self.records
+            )
+            self.aggregates = previous.aggregates.updated(
+                added=[r for r in self.records if r["id"] not in unchanged],
+                removed=[
+                    r for plant_id, r in old_records.items() if plant_id not in unchanged
+                ],
+            )
+
+        self.by_id: Dict[str, PlantModel] = {p.id: p for p in self.plants}
+        self.ids: Tuple[str, ...] = tuple(self.by_id)
+        self.search_index = PlantSearchIndex(self.records)
+        self.condition_index = ConditionIndex(self.records)
+        self.facets = FacetIndex(self.records)
+        self.responses = PlantResponseCache(self.plants)
+
+        self._aliases: Dict[str, str] = {}
+        for record in self.records:
+            for alias in (slugify(record["id"]), slugify(record["scientific_name"])):
+                # Premier arrivé gagne: un alias ne masque jamais un id existant
+                if alias and alias not in self.by_id:
+                    self._aliases.setdefault(alias, record["id"])
+
+    def __len__(self) -> int:
+        return len(self.plants)
+
+    def get(self, key: str) -> Optional[PlantModel]:
+        """Plante par id, slug ou nom scientifique (None si inconnue)"""
+        plant = self.by_id.get(key)
+        if plant is not None:
+            return plant
+        # Les ids sont des slugs: 'Artemisia annua' ou 'NEEM' retrouvent leur fiche
+        slug = slugify(key)
+        plant = self.by_id.get(slug)
+        if plant is not None:
+            return plant
+        plant_id = self._aliases.get(slug)
+        return self.by_id.get(plant_id) if plant_id else None
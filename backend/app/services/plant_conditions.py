@@ -0,0 +1,173 @@
+"""
+Index conditions -> plantes (triage par symptôme)
+
+Construit au chargement du catalogue à partir des usages traditionnels et
+des propriétés médicinales:
+- Normalisation (accents, casse) + racinisation légère du français
+  ("digestifs", "digestion", "digestive" -> "digest")
+- Synonymes ("palu", "malaria", "antipaludique" -> paludisme)
+- Classement pondéré (usage traditionnel > propriété) avec IDF
+- Autocomplétion par préfixe sur les libellés de conditions
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+import math
+
+from app.services.plant_search import fold, tokenize
+
+# Pondération des champs indexés
+CONDITION_FIELDS: Dict[str, float] = {
+    "traditional_uses": 2.0,
+    "medicinal_properties": 1.5,
+}
+
+STOPWORDS: Set[str] = {
+    "a", "au", "aux", "avec", "chez", "contre", "d", "de", "des", "du", "en",
+    "et", "l", "la", "le", "les", "ou", "par", "pour", "si", "sur", "un", "une",
+    "anti", "traitement", "soin", "soins", "probleme", "problemes",
+}
+
+# Groupes de synonymes: le premier terme sert de clé canonique
+SYNONYM_GROUPS: List[Tuple[str, ...]] = [
+    ("paludisme", "palu", "malaria", "antipaludique", "antipaludeen"),
+    ("fievre", "fievres", "fever", "febrile", "antipyretique"),
+    ("toux", "cough", "antitussif", "tousser"),
+    ("diarrhee", "diarrhea", "antidiarrheique"),
+    ("hypertension", "tension", "hypotenseur", "antihypertenseur"),
+    ("digestion", "digestif", "digestive", "indigestion"),
+    ("inflammation", "inflammatoire"),
+    ("douleur", "antalgique", "analgesique", "mal"),
+    ("nausee", "nauseeux", "vomissement", "antiemetique"),
+    ("immunite", "immunitaire", "immunostimulant"),
+    ("peau", "cutane", "cutanee", "dermatologique", "dermatose"),
+    ("plaie", "blessure", "cicatrisant", "cicatrisation"),
+    ("parasite", "antiparasitaire", "vermifuge"),
+    ("infection", "antimicrobien", "antibacterien", "antibiotique"),
+    ("champignon", "antifongique", "mycose"),
+    ("diabete", "antidiabetique", "glycemie"),
+    ("constipation", "laxatif"),
+    ("brulure", "brule"),
+    ("malnutrition", "carence", "nutritif"),
+]
+
+# Suffixes retirés par la racinisation (ordre = priorité)
+_SUFFIXES: Tuple[str, ...] = (
+    "ations", "ation", "ements", "ement", "iques", "ique", "ismes", "isme",
+    "ions", "ion", "ives", "ive", "ifs", "if", "euses", "euse", "eux",
+    "es", "e", "s", "x",
+)
+_MIN_STEM_LENGTH = 4
+
+
+def stem(token: str) -> str:
+    """Racinisation légère du français (suppression de suffixes)"""
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM_LENGTH:
+            return token[: -len(suffix)]
+    return token
+
+
+_SYNONYMS: Dict[str, str] = {}
+for _group in SYNONYM_GROUPS:
+    _canonical = stem(_group[0])
+    for _word in _group:
+        _SYNONYMS[stem(_word)] = _canonical
+
+
+def condition_terms(text: str) -> List[str]:
+    """Termes canoniques d'un libellé ou d'une requête"""
+    terms = []
+    for token in tokenize(text):
+        if token in STOPWORDS:
+            continue
+        root = stem(token)
+        terms.append(_SYNONYMS.get(root, root))
+    return terms
+
+
+class ConditionIndex:
+    """
+    Index inversé terme canonique -> plantes, plus vocabulaire des libellés
+    pour l'autocomplétion
+    """
+
+    def __init__(self, plants: Iterable[dict]):
+        self._ids: List[str] = []
+        postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        label_docs: Dict[str, Set[int]] = defaultdict(set)
+        label_display: Dict[str, str] = {}
+
+        for doc, plant in enumerate(plants):
+            self._ids.append(plant["id"])
+            for field, weight in CONDITION_FIELDS.items():
+                for label in plant.get(field, []):
+                    for term in set(condition_terms(label)):
+                        current = postings[term].get(doc, 0.0)
+                        postings[term][doc] = max(current, weight)
+                    key = fold(label).strip()
+                    label_display.setdefault(key, label)
+                    label_docs[key].add(doc)
+
+        total = len(self._ids)
+        self._postings: Dict[str, Dict[int, float]] = dict(postings)
+        self._idf: Dict[str, float] = {
+            term: math.log(1 + total / len(docs)) for term, docs in postings.items()
+        }
+
+        # Autocomplétion: (mot normalisé, libellé) triés pour bisect
+        self._labels: Dict[str, Tuple[str, int]] = {
+            key: (label_display[key], len(docs)) for key, docs in label_docs.items()
+        }
+        self._label_words: List[Tuple[str, str]] = sorted(
+            (word, key) for key in self._labels for word in tokenize(key)
+        )
+
+    def lookup(self, condition: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Plantes classées pour une condition
+
+        Returns:
+            Liste de tuples (plant_id, score), meilleur score en premier
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(condition_terms(condition)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc, weight in self._postings[term].items():
+                scores[doc] += weight * idf
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self._ids[doc], score) for doc, score in ranked[:limit]]
+
+    def autocomplete(self, prefix: str, limit: int = 8) -> List[Dict[str, object]]:
+        """
+        Libellés de conditions dont un mot commence par le préfixe
+
+        Classés par nombre de plantes associées puis alphabétiquement.
+        """
+        needle = fold(prefix).strip()
+        if not needle:
+            return []
+
+        # Le dernier mot est un préfixe, les précédents doivent être présents
+        words = tokenize(needle)
+        if not words:
+            return []
+        head, last = words[:-1], words[-1]
+
+        start = bisect_left(self._label_words, (last, ""))
+        keys: Set[str] = set()
+        for word, key in self._label_words[start:]:
+            if not word.startswith(last):
+                break
+            if all(w in key for w in head):
+                keys.add(key)
+
+        ranked = sorted(keys, key=lambda k: (-self._labels[k][1], k))
+        return [
+            {"label": self._labels[key][0], "plants_count": self._labels[key][1]}
+            for key in ranked[:limit]
+        ]
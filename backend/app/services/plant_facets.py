@@ -0,0 +1,179 @@
+"""
+Facettes + pagination par curseur pour /plants/list
+
+- Chaque valeur de facette (famille, pays, propriété, avertissements) est un
+  bitset (int Python) sur les positions des plantes: les filtres combinés
+  sont de simples AND/OR, les comptages des popcounts
+- Comptages disjonctifs: les comptes d'une facette ignorent ses propres
+  filtres (l'UI peut proposer les autres valeurs de la même facette)
+- Ordre stable (nom scientifique normalisé, id) + curseur opaque encodant
+  la dernière clé servie: la pagination reste correcte même si le catalogue
+  est rechargé entre deux pages
+"""
+
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+import base64
+import json
+
+from app.services.plant_search import fold
+from app.services.tracing import traced
+
+SortKey = Tuple[str, str]
+
+# Facettes multi-valuées: nom -> champ de l'enregistrement
+FACET_FIELDS: Dict[str, str] = {
+    "family": "family",
+    "country": "found_in",
+    "property": "medicinal_properties",
+}
+
+
+def sort_key(plant: dict) -> SortKey:
+    """Clé d'ordre stable du catalogue"""
+    return fold(plant["scientific_name"]), plant["id"]
+
+
+def encode_cursor(key: SortKey) -> str:
+    """Curseur opaque (base64url) à partir de la dernière clé servie"""
+    raw = json.dumps(list(key), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Clé encodée dans un curseur (ValueError si invalide)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        name, plant_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(name), str(plant_id)
+    except Exception as e:
+        raise ValueError(f"Curseur invalide: {cursor}") from e
+
+
+class FacetIndex:
+    """
+    Bitsets de facettes sur des plantes déjà triées par `sort_key`
+
+    Args:
+        records: Enregistrements bruts, dans l'ordre `sort_key`
+    """
+
+    def __init__(self, records: Sequence[dict]):
+        self._ids: List[str] = [r["id"] for r in records]
+        self._keys: List[SortKey] = [sort_key(r) for r in records]
+        self.all_bits: int = (1 << len(records)) - 1
+
+        self._bits: Dict[str, Dict[str, int]] = {name: defaultdict(int) for name in FACET_FIELDS}
+        self._labels: Dict[str, Dict[str, str]] = {name: {} for name in FACET_FIELDS}
+        self._warnings_bits = 0
+
+        for position, record in enumerate(records):
+            bit = 1 << position
+            for name, field in FACET_FIELDS.items():
+                values = record.get(field) or []
+                if isinstance(values, str):
+                    values = [values]
+                for value in values:
+                    key = fold(value).strip()
+                    self._bits[name][key] |= bit
+                    self._labels[name].setdefault(key, value)
+            if record.get("warnings"):
+                self._warnings_bits |= bit
+
+        self._bits = {name: dict(bits) for name, bits in self._bits.items()}
+
+    def _facet_mask(self, name: str, values: Sequence[str]) -> int:
+        """OR des valeurs demandées pour une facette"""
+        mask = 0
+        for value in values:
+            mask |= self._bits[name].get(fold(value).strip(), 0)
+        return mask
+
+    def _warnings_mask(self, has_warnings: bool) -> int:
+        return self._warnings_bits if has_warnings else self.all_bits & ~self._warnings_bits
+
+    @traced("plants.facets.filter")
+    def filter(
+        self,
+        filters: Dict[str, Sequence[str]],
+        has_warnings: Optional[bool] = None,
+    ) -> Tuple[int, Dict[str, object]]:
+        """
+        Applique les filtres et calcule les comptages de facettes
+
+        Args:
+            filters: Facette -> valeurs acceptées (OR intra-facette, AND entre facettes)
+            has_warnings: Filtre présence d'avertissements (None = pas de filtre)
+
+        Returns:
+            (bitset des plantes retenues, comptages par facette)
+        """
+        masks: Dict[str, int] = {
+            name: self._facet_mask(name, values)
+            for name, values in filters.items() if values
+        }
+        if has_warnings is not None:
+            masks["has_warnings"] = self._warnings_mask(has_warnings)
+
+        def combined(exclude: Optional[str] = None) -> int:
+            mask = self.all_bits
+            for name, facet_mask in masks.items():
+                if name != exclude:
+                    mask &= facet_mask
+            return mask
+
+        facets: Dict[str, object] = {}
+        for name in FACET_FIELDS:
+            base = combined(exclude=name)
+            counts = [
+                {"value": self._labels[name][key], "count": (bits & base).bit_count()}
+                for key, bits in self._bits[name].items()
+            ]
+            counts = [c for c in counts if c["count"]]
+            counts.sort(key=lambda c: (-c["count"], fold(c["value"])))
+            facets[name] = counts
+
+        base = combined(exclude="has_warnings")
+        facets["has_warnings"] = {
+            "true": (base & self._warnings_bits).bit_count(),
+            "false": (base & ~self._warnings_bits).bit_count(),
+        }
+        return combined(), facets
+
+    @traced("plants.facets.page")
+    def page(
+        self,
+        mask: int,
+        limit: int,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        Page d'ids d'un bitset, par curseur (prioritaire) ou offset
+
+        Returns:
+            (ids de la page, curseur de la page suivante ou None)
+        """
+        if cursor:
+            start = bisect_right(self._keys, decode_cursor(cursor))
+            remaining = mask >> start
+            skip = 0
+        else:
+            start = 0
+            remaining = mask
+            skip = offset
+
+        ids: List[str] = []
+        position = start - 1
+        while remaining and len(ids) < limit:
+            shift = (remaining & -remaining).bit_length()
+            position += shift
+            remaining >>= shift
+            if skip:
+                skip -= 1
+                continue
+            ids.append(self._ids[position])
+
+        next_cursor = encode_cursor(self._keys[position]) if ids and remaining else None
+        return ids, next_cursor
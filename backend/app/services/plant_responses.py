@@ -0,0 +1,133 @@
+"""
+Réponses plantes pré-sérialisées + ETags
+
+Le catalogue est statique entre deux rechargements: chaque plante est
+sérialisée UNE fois en JSON (pydantic-core), puis les réponses (détail,
+pages de liste filtrées, recherche, stats) sont assemblées par concaténation
+de bytes.
+
+Chaque corps porte un ETag fort (hash du contenu) permettant au client de
+revalider avec If-None-Match -> 304 Not Modified sans corps.
+"""
+
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Sequence
+import json
+import threading
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.services.tracing import traced
+
+# Cache-Control des réponses catalogue (revalidation via ETag ensuite)
+CACHE_CONTROL = "public, max-age=60"
+
+# Nombre maximum de corps calculés à la demande mémorisés (pages, filtres...)
+MAX_CACHED_PAGES = 512
+
+
+class CachedBody(NamedTuple):
+    """Corps JSON prêt à l'envoi et son ETag fort"""
+    body: bytes
+    etag: str
+
+
+def make_body(body: bytes) -> CachedBody:
+    """Associe un ETag fort (blake2b du contenu) à un corps JSON"""
+    return CachedBody(body, '"' + blake2b(body, digest_size=16).hexdigest() + '"')
+
+
+def dump_json(payload: Any) -> bytes:
+    """Sérialisation compacte identique à JSONResponse"""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparaison faible If-None-Match (RFC 9110 §13.1.2)"""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def cached_response(request: Request, cached: CachedBody) -> Response:
+    """Réponse 200 avec corps pré-sérialisé, ou 304 si l'ETag du client correspond"""
+    headers = {"ETag": cached.etag, "Cache-Control": CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+class PlantResponseCache:
+    """
+    Corps de réponses pour un snapshot du catalogue
+
+    Args:
+        plants: Plantes validées, dans l'ordre du catalogue
+    """
+
+    @traced("plants.serialize_catalog")
+    def __init__(self, plants: Sequence[BaseModel]):
+        self._plant_json: Dict[str, bytes] = {
+            p.id: p.model_dump_json().encode("utf-8") for p in plants
+        }
+        self._details: Dict[str, CachedBody] = {
+            plant_id: make_body(b'{"success":true,"data":' + body + b"}")
+            for plant_id, body in self._plant_json.items()
+        }
+        self._memo: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def detail(self, plant_id: str) -> CachedBody:
+        """Corps PlantDetailResponse d'une plante"""
+        return self._details[plant_id]
+
+    def memo(self, key: Hashable, build: Callable[[], CachedBody]) -> CachedBody:
+        """Mémorise un corps calculé à la demande (LRU borné)"""
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                return cached
+
+        cached = build()
+        with self._lock:
+            self._memo[key] = cached
+            if len(self._memo) > MAX_CACHED_PAGES:
+                self._memo.popitem(last=False)
+        return cached
+
+    @traced("plants.serialize_page")
+    def list_body(
+        self,
+        plant_ids: Sequence[str],
+        pagination: Dict[str, Any],
+        facets: Optional[Dict[str, Any]] = None,
+    ) -> CachedBody:
+        """Corps PlantsListResponse pour une page de plantes"""
+        data = b",".join(self._plant_json[plant_id] for plant_id in plant_ids)
+        body = b'{"success":true,"data":[' + data + b'],"pagination":' + dump_json(pagination)
+        if facets is not None:
+            body += b',"facets":' + dump_json(facets)
+        return make_body(body + b"}")
+
+    @traced("plants.serialize_results")
+    def results(self, plant_ids: Sequence[str]) -> CachedBody:
+        """Corps SearchResponse pour une liste ordonnée de plantes"""
+        data = b",".join(self._plant_json[plant_id] for plant_id in plant_ids)
+        return make_body(
+            b'{"success":true,"data":[' + data
+            + b'],"results_count":' + str(len(plant_ids)).encode() + b"}"
+        )
+
+    def payload(self, key: Hashable, build: Callable[[], Any]) -> CachedBody:
+        """Mémorise un payload JSON arbitraire (stats, familles...)"""
+        return self.memo(key, lambda: make_body(dump_json(build())))
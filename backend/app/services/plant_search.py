@@ -0,0 +1,140 @@
+"""
+Moteur de recherche plantes - Index inversé + ranking BM25
+
+Fonctionnement:
+- Normalisation: minuscules + suppression des accents (paludisme == PALUDISME, fièvre == fievre)
+- Tokenisation des champs texte (nom scientifique, noms communs, famille, description)
+- Index inversé terme -> {document: fréquence}, construit UNE fois au démarrage
+- Vocabulaire trié pour la recherche par préfixe (frappe clavier: "morin" -> "moringa")
+- Score BM25 pondéré par champ (un match sur le nom pèse plus qu'un match sur la description)
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+import math
+import re
+import unicodedata
+
+from app.services.tracing import traced
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Pondération des champs indexés
+FIELD_WEIGHTS: Dict[str, float] = {
+    "scientific_name": 3.0,
+    "common_names": 3.0,
+    "family": 2.0,
+    "description": 1.0,
+}
+
+# Paramètres BM25 standards
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Longueur minimale d'un token pour l'expansion par préfixe
+MIN_PREFIX_LENGTH = 2
+
+
+def fold(text: str) -> str:
+    """Minuscules + suppression des accents"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """Découpe un texte normalisé en tokens alphanumériques"""
+    return _TOKEN_RE.findall(fold(text))
+
+
+def _field_text(value) -> str:
+    """Aplatit un champ (str ou liste de str) en texte"""
+    if isinstance(value, str):
+        return value
+    return " ".join(value)
+
+
+class PlantSearchIndex:
+    """
+    Index inversé en mémoire sur le catalogue de plantes
+
+    Construit une seule fois (O(taille du catalogue)), puis chaque recherche
+    ne touche que les listes de postings des termes de la requête.
+    """
+
+    def __init__(self, plants: Iterable[dict]):
+        self._ids: List[str] = []
+        self._doc_lengths: List[float] = []
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+
+        for doc, plant in enumerate(plants):
+            self._ids.append(plant["id"])
+            length = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                tokens = tokenize(_field_text(plant.get(field, "")))
+                length += len(tokens)
+                for token in tokens:
+                    postings = self._postings[token]
+                    postings[doc] = postings.get(doc, 0.0) + weight
+            self._doc_lengths.append(length)
+
+        self._postings = dict(self._postings)
+        self._vocabulary: List[str] = sorted(self._postings)
+        self._avg_length = (
+            sum(self._doc_lengths) / len(self._doc_lengths) if self._doc_lengths else 0.0
+        )
+        total = len(self._ids)
+        self._idf: Dict[str, float] = {
+            term: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _expand(self, token: str) -> Sequence[str]:
+        """Termes du vocabulaire correspondant au token (exact + préfixe)"""
+        if len(token) < MIN_PREFIX_LENGTH:
+            return (token,) if token in self._postings else ()
+
+        start = bisect_left(self._vocabulary, token)
+        matches = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    @traced("plants.search")
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Recherche classée BM25
+
+        Args:
+            query: Texte libre saisi par l'utilisateur
+            limit: Nombre maximum de résultats
+
+        Returns:
+            Liste de tuples (plant_id, score), meilleur score en premier
+        """
+        scores: Dict[int, float] = defaultdict(float)
+
+        for token in set(tokenize(query)):
+            # Meilleur terme par document (évite de compter 2x moringa + moringaceae)
+            token_scores: Dict[int, float] = {}
+            for term in self._expand(token):
+                idf = self._idf[term]
+                # Un préfixe partiel compte un peu moins qu'un mot complet
+                boost = 1.0 if term == token else 0.8
+                for doc, tf in self._postings[term].items():
+                    norm = BM25_K1 * (
+                        1 - BM25_B + BM25_B * self._doc_lengths[doc] / self._avg_length
+                    )
+                    score = boost * idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    if score > token_scores.get(doc, 0.0):
+                        token_scores[doc] = score
+            for doc, score in token_scores.items():
+                scores[doc] += score
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self._ids[doc], score) for doc, score in ranked[:limit]]
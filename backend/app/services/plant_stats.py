@@ -0,0 +1,92 @@
+"""
+Agrégats du catalogue (familles, pays, usages)
+
+Calculés une fois à la construction du catalogue, puis mis à jour de façon
+incrémentale au rechargement: seuls les enregistrements ajoutés, modifiés
+ou supprimés sont décomptés / comptés. Chaque snapshot garde ses propres
+compteurs (copie), les requêtes en cours ne voient jamais d'état partiel.
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List
+import re
+
+from app.services.plant_conditions import condition_terms
+
+_WORD_RE = re.compile(r"\w+")
+
+DEFAULT_TOP_N = 5
+
+
+def _use_terms(plant: dict) -> Dict[str, str]:
+    """Conditions canoniques d'une plante -> mot d'origine (pour l'affichage)"""
+    terms: Dict[str, str] = {}
+    for label in plant.get("traditional_uses", []):
+        for word in _WORD_RE.findall(label.lower()):
+            for term in condition_terms(word):
+                terms.setdefault(term, word)
+    return terms
+
+
+def _ranked(counter: Counter, top_n: int) -> List[Dict[str, object]]:
+    """Top-N par fréquence décroissante, ex aequo par ordre alphabétique"""
+    ranked = sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+    return [{"name": name, "count": count} for name, count in ranked[:top_n]]
+
+
+class CatalogAggregates:
+    """Compteurs familles / pays / usages d'un snapshot du catalogue"""
+
+    def __init__(self, plants: Iterable[dict] = ()):
+        self.total = 0
+        self.families: Counter = Counter()
+        self.countries: Counter = Counter()
+        self.uses: Counter = Counter()
+        self._use_labels: Dict[str, Counter] = {}
+        self._apply(plants, sign=1)
+
+    def _apply(self, plants: Iterable[dict], sign: int) -> None:
+        for plant in plants:
+            self.total += sign
+            self.families[plant["family"]] += sign
+            for country in set(plant.get("found_in", [])):
+                self.countries[country] += sign
+            for term, word in _use_terms(plant).items():
+                self.uses[term] += sign
+                self._use_labels.setdefault(term, Counter())[word] += sign
+
+        if sign < 0:
+            for counter in (self.families, self.countries, self.uses, *self._use_labels.values()):
+                for key in [k for k, v in counter.items() if v <= 0]:
+                    del counter[key]
+            for term in [t for t, words in self._use_labels.items() if not words]:
+                del self._use_labels[term]
+
+    def updated(self, added: Iterable[dict], removed: Iterable[dict]) -> "CatalogAggregates":
+        """Nouveaux agrégats = copie des compteurs + delta (ajouts / suppressions)"""
+        clone = CatalogAggregates()
+        clone.total = self.total
+        clone.families = self.families.copy()
+        clone.countries = self.countries.copy()
+        clone.uses = self.uses.copy()
+        clone._use_labels = {term: words.copy() for term, words in self._use_labels.items()}
+        clone._apply(removed, sign=-1)
+        clone._apply(added, sign=1)
+        return clone
+
+    def use_label(self, term: str) -> str:
+        """Libellé affichable d'une condition (mot d'origine le plus fréquent)"""
+        words = self._use_labels.get(term)
+        if not words:
+            return term
+        return max(words.items(), key=lambda item: (item[1], item[0]))[0].capitalize()
+
+    def top_families(self, top_n: int = DEFAULT_TOP_N) -> List[Dict[str, object]]:
+        return _ranked(self.families, top_n)
+
+    def top_countries(self, top_n: int = DEFAULT_TOP_N) -> List[Dict[str, object]]:
+        return _ranked(self.countries, top_n)
+
+    def top_uses(self, top_n: int = DEFAULT_TOP_N) -> List[Dict[str, object]]:
+        ranked = _ranked(self.uses, top_n)
+        return [{"name": self.use_label(u["name"]), "count": u["count"]} for u in ranked]
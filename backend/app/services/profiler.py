@@ -0,0 +1,97 @@
+"""
+Profileur par échantillonnage (à la demande, sans dépendance)
+
+Un thread relève la pile de chaque thread du processus toutes les
+`interval` secondes pendant la fenêtre demandée et agrège les piles au
+format "folded" (une ligne `thread;frame;...;frame N`), directement
+lisible par flamegraph.pl, speedscope ou inferno.
+
+- wall: toutes les piles, y compris les threads en attente (I/O, locks,
+  event loop dans select) - où passe le temps réel
+- cpu: approximation sans signal, les piles dont la dernière frame est
+  une attente connue (select, Condition.wait, file vide...) sont écartées
+
+Les coroutines suspendues n'apparaissent pas: seule la coroutine en cours
+d'exécution est sur la pile du thread de l'event loop.
+"""
+
+from collections import Counter
+from typing import Dict, Tuple
+import os
+import sys
+import threading
+import time
+
+# (fichier, fonction) des frames feuilles d'un thread inactif
+IDLE_LEAVES = frozenset({
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("handlers.py", "dequeue"),
+    ("connection.py", "wait"),
+    ("socket.py", "accept"),
+})
+
+_APP_MARKER = os.sep + "app" + os.sep
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    marker = filename.rfind(_APP_MARKER)
+    short = filename[marker + 1:] if marker >= 0 else os.path.basename(filename)
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float, mode: str = "wall") -> Tuple[str, Dict[str, object]]:
+    """
+    Échantillonne les piles de tous les threads (bloquant: appeler hors event loop)
+
+    Args:
+        seconds: Durée de la fenêtre
+        interval: Période d'échantillonnage (secondes)
+        mode: "wall" ou "cpu"
+
+    Returns:
+        (piles au format folded, résumé)
+    """
+    own_id = threading.get_ident()
+    stacks: Counter = Counter()
+    labels: Dict[object, str] = {}
+    samples = 0
+    idle = 0
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            leaf = frame.f_code
+            if mode == "cpu" and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_LEAVES:
+                idle += 1
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                frames.append(label)
+                frame = frame.f_back
+            frames.append(names.get(thread_id, f"thread-{thread_id}"))
+            stacks[";".join(reversed(frames))] += 1
+        samples += 1
+        time.sleep(interval)
+
+    folded = "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+    summary = {
+        "mode": mode,
+        "seconds": seconds,
+        "interval_ms": interval * 1000,
+        "samples": samples,
+        "idle_samples_skipped": idle,
+        "distinct_stacks": len(stacks),
+    }
+    return folded + "\n", summary
@@ -0,0 +1,358 @@
+"""
+Ordonnanceur de quota Gemini (RPM / TPM) + politique de retry
+
+Le quota Gemini est partagé par tous les endpoints: sans contrôle côté
+client, un pic de chats épuise le budget et les scans échouent en 429.
+
+- Deux token buckets: requêtes/minute (`rate_limit_per_minute`) et
+  tokens/minute (`gemini_tokens_per_minute`); le bucket requêtes n'autorise
+  qu'une rafale courte (BURST_SECONDS) pour lisser les pics
+- File à priorité stricte: scan > chat > quick-advice > health
+- Réservation estimée avant l'appel, ajustée ensuite avec l'usage réel
+- Indications serveur (RetryInfo / Retry-After) respectées pour TOUS les
+  appels: un 429 suspend l'ordonnanceur le temps demandé
+- Backoff exponentiel avec jitter uniquement pour les erreurs retryables
+  (429, 5xx, timeouts); un 4xx échoue immédiatement
+- Multi-workers: buckets dans l'état partagé, le budget est global au
+  nœud. Chaque octroi est UN prélèvement atomique RPM + TPM (tout ou
+  rien, pas de découvert), exécuté hors event loop; ajustements et
+  vidages sont reportés sur le prélèvement suivant. La priorité reste
+  ordonnée par worker.
+"""
+
+from typing import Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import random
+import re
+import time
+
+from google.api_core import exceptions as google_exceptions
+
+from app.services.concurrency import GeminiOverloadedError
+from app.services.shared_state import BucketClaim, SharedState
+
+logger = logging.getLogger(__name__)
+
+# Priorité par endpoint (plus petit = servi en premier)
+PRIORITIES: Dict[str, int] = {
+    "scan": 0,
+    "chat": 1,
+    "quick_advice": 2,
+    "health": 3,
+}
+
+# Rafale autorisée sur le bucket requêtes (en secondes de débit)
+BURST_SECONDS = 10
+
+# Nouvel essai après une erreur de l'état partagé (secondes)
+SHARED_RETRY_SECONDS = 1.0
+
+# Coût forfaitaire d'une image en tokens d'entrée (Gemini)
+IMAGE_TOKENS = 258
+
+# Erreurs transitoires: retry avec backoff
+RETRYABLE_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServerError,
+    google_exceptions.DeadlineExceeded,
+    asyncio.TimeoutError,
+    ConnectionError,
+)
+
+_RETRY_HINT_RES = (
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+    re.compile(r"retry in\s+([\d.]+)\s*s", re.IGNORECASE),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation grossière (~4 caractères par token)"""
+    return len(text) // 4 + 1
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Erreur transitoire (quota, 5xx, timeout) ?"""
+    return isinstance(exc, RETRYABLE_ERRORS)
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """Erreur de quota serveur (429) ?"""
+    return isinstance(exc, (google_exceptions.TooManyRequests, google_exceptions.ResourceExhausted))
+
+
+def retry_after_hint(exc: BaseException) -> Optional[float]:
+    """Délai demandé par le serveur (Retry-After, RetryInfo), en secondes"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        value = headers.get("Retry-After")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+
+    for detail in getattr(exc, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return delay.seconds + getattr(delay, "nanos", 0) / 1e9
+
+    message = str(exc)
+    for pattern in _RETRY_HINT_RES:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Backoff exponentiel 'full jitter' (évite les retries synchronisés)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """
+    Bucket à remplissage continu
+
+    Args:
+        per_minute: Débit de remplissage
+        capacity: Niveau maximum (taille de rafale)
+    """
+
+    def __init__(self, per_minute: float, capacity: float):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Secondes avant que `amount` soit disponible"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def adjust(self, delta: float) -> None:
+        """Débite (delta > 0) ou rembourse (delta < 0) après coup"""
+        self.level = min(self.capacity, self.level - delta)
+
+    def drain(self, now: float) -> None:
+        """Vide le bucket (le serveur a signalé un dépassement)"""
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+class QuotaScheduler:
+    """
+    File à priorité devant les budgets RPM / TPM
+
+    Args:
+        requests_per_minute: Budget de requêtes
+        tokens_per_minute: Budget de tokens (entrée + sortie)
+        max_wait: Attente maximum d'une requête avant rejet (429)
+        shared: État partagé des workers (None = buckets en mémoire)
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_wait: float,
+        shared: Optional[SharedState] = None,
+    ):
+        requests_burst = max(1.0, requests_per_minute * BURST_SECONDS / 60)
+        self.requests = TokenBucket(requests_per_minute, requests_burst)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute)
+        # Multi-workers: niveaux dans l'état partagé (`level` = dernière valeur lue)
+        self.shared = shared
+        self._claim: Optional[asyncio.Task] = None
+        self._pending_requests = 0.0  # ajustements reportés au prochain prélèvement
+        self._pending_tokens = 0.0
+        self._pending_drain = False
+        self.shared_errors = 0
+        self.max_wait = max_wait
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._blocked_until = 0.0
+        self.granted = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    def _dispatch(self) -> None:
+        """Accorde le quota aux requêtes en tête de file tant qu'il y en a"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.shared is not None:
+            self._dispatch_shared()
+            return
+
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            now = time.monotonic()
+            delay = max(
+                self._blocked_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(tokens, now),
+            )
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.take(1, now)
+            self.tokens.take(tokens, now)
+            self.granted += 1
+            future.set_result(None)
+
+    def _head(self) -> Optional[list]:
+        """Premier demandeur encore en attente"""
+        while self._waiters and self._waiters[0][3].done():
+            heapq.heappop(self._waiters)
+        return self._waiters[0] if self._waiters else None
+
+    def _dispatch_shared(self) -> None:
+        """Multi-workers: un prélèvement partagé à la fois, pour la tête de file"""
+        if self._claim is not None:
+            return  # relance à la fin du prélèvement en cours
+        head = self._head()
+        if head is None and not (self._pending_requests or self._pending_tokens or self._pending_drain):
+            return
+        delay = self._blocked_until - time.monotonic()
+        if head is not None and delay > 0:
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+            return
+        self._claim = asyncio.ensure_future(self._claim_shared(head))
+
+    async def _claim_shared(self, head: Optional[list]) -> None:
+        """Prélève le quota de `head` (ou reporte seulement les ajustements)"""
+        tokens = head[2] if head is not None else 0
+        pending = (self._pending_requests, self._pending_tokens, self._pending_drain)
+        self._pending_requests, self._pending_tokens, self._pending_drain = 0.0, 0.0, False
+        claims = (
+            BucketClaim("gemini_rpm", self.requests.capacity, self.requests.rate,
+                        1 if head is not None else 0, pending[0], pending[2]),
+            BucketClaim("gemini_tpm", self.tokens.capacity, self.tokens.rate, tokens, pending[1]),
+        )
+        try:
+            wait, (self.requests.level, self.tokens.level) = await self.shared.run(
+                self.shared.claim_buckets, claims
+            )
+        except Exception as e:
+            self._pending_requests += pending[0]
+            self._pending_tokens += pending[1]
+            self._pending_drain = self._pending_drain or pending[2]
+            self.shared_errors += 1
+            logger.warning(f"⚠️ Shared quota unavailable, retrying in {SHARED_RETRY_SECONDS:.0f}s: {str(e)}")
+            wait = SHARED_RETRY_SECONDS
+        finally:
+            self._claim = None
+
+        if wait > 0:
+            if head is not None or self._waiters:
+                self._timer = asyncio.get_running_loop().call_later(min(wait, self.max_wait), self._dispatch)
+            return
+        if head is None:
+            self._dispatch()  # demandeurs arrivés pendant le report des ajustements
+            return
+        if head[3].done():
+            # Demandeur parti pendant le prélèvement: quota rendu au suivant
+            self._pending_requests -= 1
+            self._pending_tokens -= tokens
+        else:
+            self._waiters.remove(head)
+            heapq.heapify(self._waiters)
+            self.granted += 1
+            head[3].set_result(None)
+        self._dispatch()
+
+    def _estimated_wait(self) -> int:
+        """Délai suggéré au client rejeté (secondes)"""
+        now = time.monotonic()
+        backlog = len(self._waiters) / self.requests.rate if self.requests.rate else 0.0
+        return max(1, math.ceil(max(self._blocked_until - now, backlog)))
+
+    async def acquire(self, endpoint: str, tokens: int) -> None:
+        """
+        Attend le quota pour un appel (priorité selon l'endpoint)
+
+        Raises:
+            GeminiOverloadedError: Si le quota n'est pas accordé sous `max_wait`
+        """
+        future = asyncio.get_running_loop().create_future()
+        priority = PRIORITIES.get(endpoint, PRIORITIES["chat"])
+        heapq.heappush(self._waiters, [priority, next(self._seq), tokens, future])
+        self._dispatch()
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            self._dispatch()
+            raise GeminiOverloadedError(endpoint, self._estimated_wait())
+        finally:
+            self.wait_seconds += time.monotonic() - started
+            if not future.done():
+                future.cancel()
+                self._dispatch()
+
+    def settle(self, reserved: int, actual: Optional[int]) -> None:
+        """Remplace la réservation estimée par l'usage réel de tokens"""
+        if actual is None:
+            return
+        if self.shared is not None:
+            self._pending_tokens += actual - reserved
+            self._dispatch()
+            return
+        self.tokens.adjust(actual - reserved)
+        if actual < reserved:
+            self._dispatch()
+
+    def penalize(self, retry_after: Optional[float]) -> None:
+        """429 serveur: suspend tous les appels le temps indiqué"""
+        now = time.monotonic()
+        self.throttled += 1
+        if self.shared is not None:
+            self._pending_drain = True
+        else:
+            self.requests.drain(now)
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+
+    def stats(self) -> Dict[str, object]:
+        """État des budgets et compteurs"""
+        now = time.monotonic()
+        if self.shared is None:
+            self.requests.wait_time(0, now)
+            self.tokens.wait_time(0, now)
+        return {
+            "shared": self.shared is not None,
+            "requests_available": round(self.requests.level, 2),
+            "tokens_available": int(self.tokens.level),
+            "queue_depth": sum(1 for *_, future in self._waiters if not future.done()),
+            "blocked_for_seconds": round(max(0.0, self._blocked_until - now), 2),
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "server_throttled": self.throttled,
+            "avg_wait_ms": round(self.wait_seconds / self.granted * 1000, 2) if self.granted else 0.0,
+            "shared_errors": self.shared_errors,
+        }
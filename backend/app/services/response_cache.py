@@ -0,0 +1,236 @@
+"""
+Cache des réponses Gemini (chat)
+
+Deux niveaux:
+- Mémoire: LRU avec TTL (process courant, lecture en microsecondes)
+- Disque (optionnel): SQLite via `database_url` (survit aux redémarrages,
+  partagé entre workers), les hits disque sont promus en mémoire
+
+Clé = hash(prompt normalisé + modèle + température): deux prompts ne
+différant que par la casse ou les espaces partagent la même réponse.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Protocol
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Forme canonique d'un prompt (Unicode NFKC, minuscules, espaces réduits)"""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", prompt).lower()).strip()
+
+
+def cache_key(prompt: str, model: str, temperature: float) -> str:
+    """Clé de cache stable pour un appel Gemini"""
+    raw = f"{model}\x00{temperature:.3f}\x00{normalize_prompt(prompt)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def sqlite_path(database_url: str) -> Optional[str]:
+    """Chemin fichier d'une URL sqlite:/// (None si autre moteur)"""
+    prefix = "sqlite:///"
+    if not database_url.startswith(prefix):
+        return None
+    return database_url[len(prefix):] or None
+
+
+class CacheBackend(Protocol):
+    """Interface d'un niveau de cache (appels synchrones)"""
+
+    def get(self, key: str) -> Optional[str]: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+
+class MemoryLRUCache:
+    """LRU en mémoire avec expiration (TTL)"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Cache persistant SQLite (table gemini_response_cache)"""
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS gemini_response_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_gemini_cache_created"
+                " ON gemini_response_cache (created_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Une connexion par thread (les appels passent par asyncio.to_thread)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT value FROM gemini_response_cache WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO gemini_response_cache VALUES (?, ?, ?, ?)",
+                (key, value, now, now + self.ttl_seconds),
+            )
+            conn.execute("DELETE FROM gemini_response_cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM gemini_response_cache WHERE key IN ("
+                " SELECT key FROM gemini_response_cache"
+                " ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+class ResponseCache:
+    """
+    Cache deux niveaux (mémoire + disque optionnel) avec métriques hit/miss
+
+    Args:
+        memory: Niveau mémoire
+        disk: Niveau persistant optionnel
+    """
+
+    def __init__(self, memory: MemoryLRUCache, disk: Optional[CacheBackend] = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            self.memory_hits += 1
+            return value
+
+        if self.disk is not None:
+            try:
+                value = await asyncio.to_thread(self.disk.get, key)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Disk cache read failed: {str(e)}")
+                value = None
+            if value is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self.memory.set(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, key, value)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Disk cache write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, object]:
+        """Métriques du cache"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory+sqlite" if self.disk is not None else "memory",
+            "entries_in_memory": len(self.memory),
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Construit le cache selon la configuration (None si désactivé)"""
+    if not settings.response_cache_enabled:
+        return None
+
+    memory = MemoryLRUCache(
+        settings.response_cache_max_entries, settings.response_cache_ttl_seconds
+    )
+    disk = None
+    backend = settings.response_cache_backend
+    if backend == "memory" and settings.workers > 1:
+        # Mémoire par processus: sans niveau SQLite, chaque worker regénère
+        logger.info("🗄️ Multiple workers - response cache shared through SQLite")
+        backend = "sqlite"
+    if backend == "sqlite":
+        path = sqlite_path(settings.database_url)
+        if path is None:
+            logger.warning("⚠️ DATABASE_URL is not SQLite - disk response cache disabled")
+        else:
+            try:
+                disk = SQLiteCache(
+                    path, settings.response_cache_max_entries * 10,
+                    settings.response_cache_ttl_seconds,
+                )
+            except Exception as e:
+                logger.error(f"❌ SQLite response cache unavailable: {str(e)}")
+
+    logger.info(f"🗄️ Response cache enabled ({'memory+sqlite' if disk else 'memory'})")
+    return ResponseCache(memory, disk)
@@ -0,0 +1,243 @@
+"""
+Cache des scans par hash perceptuel (dHash)
+
+Les mêmes photos reviennent sans cesse (démos, retries, images partagées),
+rarement au bit près: recompression, redimensionnement, capture d'écran.
+Chaque image prétraitée reçoit un dHash 64 bits (`image_preprocessing.dhash`,
+calculé dans le pool de prétraitement); une image à distance de Hamming
+<= `scan_cache_max_distance` d'un scan déjà identifié reçoit le même
+résultat sans appel Gemini Vision.
+
+- Index en mémoire (XOR + popcount sur quelques milliers d'entrées: < 1 ms)
+- Persistance SQLite (`database_url`): le cache survit aux redémarrages
+- Expiration (TTL) et éviction des plus anciens au-delà de la taille max
+- Multi-workers: les scans enregistrés par les autres processus sont
+  intégrés à l'index local au plus toutes les `pull_interval` secondes
+  (lecture en arrière-plan, la recherche ne touche jamais SQLite)
+"""
+
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+
+from app.core.config import settings
+from app.services.response_cache import sqlite_path
+
+logger = logging.getLogger(__name__)
+
+_SIGN_BIT = 1 << 63
+
+# Fraîcheur des scans des autres workers (secondes)
+SHARED_PULL_INTERVAL = 2.0
+
+
+def _to_signed(value: int) -> int:
+    """uint64 -> int64 (colonne INTEGER SQLite)"""
+    return value - (1 << 64) if value & _SIGN_BIT else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value & ((1 << 64) - 1)
+
+
+class ScanCache:
+    """
+    Résultats d'identification indexés par dHash
+
+    Args:
+        path: Fichier SQLite (None = mémoire uniquement)
+        max_distance: Distance de Hamming maximum pour un hit
+        ttl_seconds: Âge maximum d'un résultat
+        max_entries: Nombre maximum de résultats conservés
+        pull_interval: Relecture des scans des autres workers (0 = jamais)
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        max_distance: int,
+        ttl_seconds: float,
+        max_entries: int,
+        pull_interval: float = 0.0,
+    ):
+        self.path = path
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.pull_interval = pull_interval
+        self._pulled_through = 0.0  # created_at le plus récent connu
+        self._next_pull = 0.0
+        self._pull_task: Optional[asyncio.Task] = None
+        # hash -> (résultat JSON, created_at epoch)
+        self._entries: Dict[int, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        if path is not None:
+            self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scan_cache ("
+                " hash INTEGER PRIMARY KEY,"
+                " result TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute("DELETE FROM scan_cache WHERE created_at <= ?", (time.time() - self.ttl_seconds,))
+            rows = conn.execute(
+                "SELECT hash, result, created_at FROM scan_cache ORDER BY created_at DESC LIMIT ?",
+                (self.max_entries,),
+            ).fetchall()
+        self._entries = {_to_unsigned(h): (result, created) for h, result, created in rows}
+        self._pulled_through = max((created for _, _, created in rows), default=0.0)
+        logger.info(f"🖼️ Scan cache loaded ({len(self._entries)} identifications)")
+
+    def _schedule_pull(self) -> None:
+        """Lance la relecture périodique des scans des autres workers (sans attendre)"""
+        now = time.monotonic()
+        if self._pull_task is not None or now < self._next_pull:
+            return
+        self._next_pull = now + self.pull_interval
+        try:
+            self._pull_task = asyncio.get_running_loop().create_task(self._pull())
+        except RuntimeError:
+            pass  # hors event loop: prochaine recherche
+
+    def _read_since(self, since: float) -> List[Tuple[int, str, float]]:
+        return self._connect().execute(
+            "SELECT hash, result, created_at FROM scan_cache WHERE created_at > ?", (since,)
+        ).fetchall()
+
+    async def _pull(self) -> None:
+        """Intègre les scans enregistrés depuis par les autres workers"""
+        try:
+            rows = await asyncio.to_thread(self._read_since, self._pulled_through)
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Scan cache pull failed: {str(e)}")
+            return
+        finally:
+            self._pull_task = None
+        with self._lock:
+            for known, result, created_at in rows:
+                self._entries[_to_unsigned(known)] = (result, created_at)
+                self._pulled_through = max(self._pulled_through, created_at)
+
+    def _nearest(self, image_hash: int) -> Optional[Tuple[int, str]]:
+        """(distance, résultat) du scan valide le plus proche sous le seuil"""
+        oldest_allowed = time.time() - self.ttl_seconds
+        best: Optional[Tuple[int, str]] = None
+        with self._lock:
+            for known, (result, created_at) in self._entries.items():
+                if created_at <= oldest_allowed:
+                    continue
+                distance = (known ^ image_hash).bit_count()
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, result)
+                    if distance == 0:
+                        break
+        return best
+
+    def lookup(self, image_hash: int) -> Optional[Tuple[str, int]]:
+        """
+        Résultat d'un scan quasi identique
+
+        Returns:
+            (résultat JSON, distance de Hamming) ou None
+        """
+        if self.pull_interval > 0 and self.path is not None:
+            self._schedule_pull()
+        best = self._nearest(image_hash)
+        if best is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        distance, result = best
+        return result, distance
+
+    def _persist(self, image_hash: int, result: str, created_at: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scan_cache VALUES (?, ?, ?)",
+                (_to_signed(image_hash), result, created_at),
+            )
+            conn.execute("DELETE FROM scan_cache WHERE created_at <= ?", (time.time() - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM scan_cache WHERE hash IN ("
+                " SELECT hash FROM scan_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    async def store(self, image_hash: int, result: str) -> None:
+        """Enregistre l'identification d'une image"""
+        created_at = time.time()
+        with self._lock:
+            self._entries[image_hash] = (result, created_at)
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                oldest = sorted(self._entries, key=lambda h: self._entries[h][1])[:overflow]
+                for known in oldest:
+                    del self._entries[known]
+
+        if self.path is not None:
+            try:
+                await asyncio.to_thread(self._persist, image_hash, result, created_at)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Scan cache write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, object]:
+        """Métriques du cache"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory+sqlite" if self.path is not None else "memory",
+            "entries": len(self._entries),
+            "max_distance": self.max_distance,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_scan_cache() -> Optional[ScanCache]:
+    """Construit le cache selon la configuration (None si désactivé)"""
+    if not settings.scan_cache_enabled:
+        return None
+
+    path = sqlite_path(settings.database_url)
+    if path is None:
+        logger.warning("⚠️ DATABASE_URL is not SQLite - scan cache kept in memory only")
+    try:
+        return ScanCache(
+            path,
+            max_distance=settings.scan_cache_max_distance,
+            ttl_seconds=settings.scan_cache_ttl_seconds,
+            max_entries=settings.scan_cache_max_entries,
+            pull_interval=SHARED_PULL_INTERVAL if settings.workers > 1 else 0.0,
+        )
+    except Exception as e:
+        logger.error(f"❌ Scan cache persistence unavailable: {str(e)}")
+        return ScanCache(
+            None,
+            max_distance=settings.scan_cache_max_distance,
+            ttl_seconds=settings.scan_cache_ttl_seconds,
+            max_entries=settings.scan_cache_max_entries,
+        )
+
+
+scan_cache = create_scan_cache()
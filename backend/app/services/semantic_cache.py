@@ -0,0 +1,368 @@
+"""
+Cache sémantique des réponses chat (ChromaDB)
+
+Les utilisateurs posent la même question de mille façons ("tisane pour le
+paludisme", "plante contre le palu"): le cache exact ne les reconnaît pas.
+Ici chaque question est vectorisée par un modèle d'embedding multilingue
+(sentence-transformers, CPU) et comparée aux questions déjà répondues: au-delà
+du seuil de similarité cosinus, la réponse est resservie sans appel Gemini.
+
+Garde-fous (une réponse médicale ne doit jamais servir une autre personne):
+- Signature de sécurité: public (enfant, nourrisson, grossesse...), terrain
+  (diabète, asthme, épilepsie, traitement...) et quantités ("2 tasses",
+  "500 mg") doivent être IDENTIQUES, quelle que soit la similarité - deux
+  questions qui ne diffèrent que par "pour un enfant" / "pour une femme
+  enceinte" ne se répondent pas
+- Dans le doute, pas de cache: une question posée pour un proche ("pour ma
+  fille", "mon mari") ou une négation portant sur le terrain ("je ne suis
+  pas enceinte") n'est ni servie depuis le cache ni enregistrée
+- Désactivé par défaut (`SEMANTIC_CACHE_ENABLED`) tant que le seuil n'est pas
+  calibré sur le vrai modèle d'embedding
+- Réponses limitées au modèle Gemini courant (`GEMINI_MODEL`)
+- Collection recréée si le modèle d'embedding change (vecteurs incompatibles)
+
+- Persistance: `chroma_persist_directory`, collection dérivée de
+  `chroma_collection_name` (suffixe `_chat_cache`)
+- Éviction par âge (TTL) et par taille (les plus anciennes d'abord)
+- Dépendances optionnelles: sans chromadb ou sentence-transformers, le cache
+  est simplement désactivé (pas de repli sur le modèle anglais de ChromaDB)
+- Initialisation (chargement du modèle) en arrière-plan au démarrage
+"""
+
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from app.core.config import settings
+from app.services.plant_search import fold
+from app.services.response_cache import normalize_prompt
+
+logger = logging.getLogger(__name__)
+
+# Éviction déclenchée toutes les N insertions
+EVICTION_EVERY = 50
+
+# ============================================
+# SIGNATURE DE SÉCURITÉ
+# ============================================
+
+# Termes (texte replié: minuscules, sans accents) -> catégorie
+SAFETY_TERMS: Dict[str, FrozenSet[str]] = {
+    "nourrisson": frozenset({"nourrisson", "nourrissons", "bebe", "bebes", "nouveau-ne", "nouveau-nes"}),
+    "enfant": frozenset({"enfant", "enfants", "fillette", "garcon", "ado", "ados", "adolescent", "adolescente"}),
+    "grossesse": frozenset({"enceinte", "enceintes", "grossesse"}),
+    "allaitement": frozenset({"allaite", "allaitante", "allaitement"}),
+    "age": frozenset({"agee", "agees", "senior", "seniors", "vieillard", "vieillards"}),
+    "femme": frozenset({"femme", "femmes"}),
+    "homme": frozenset({"homme", "hommes"}),
+    "diabete": frozenset({"diabete", "diabetique", "diabetiques"}),
+    "hypertension": frozenset({"hypertension", "hypertendu", "hypertendue", "tension"}),
+    "rein": frozenset({"rein", "reins", "renal", "renale", "renaux", "renales"}),
+    "foie": frozenset({"foie", "hepatique"}),
+    "traitement": frozenset({"medicament", "medicaments", "traitement", "anticoagulant", "anticoagulants"}),
+    # Maladies chroniques / terrains à risque
+    "asthme": frozenset({"asthme", "asthmatique", "asthmatiques"}),
+    "epilepsie": frozenset({"epilepsie", "epileptique", "epileptiques"}),
+    "drepanocytose": frozenset({"drepanocytose", "drepanocytaire", "drepanocytaires"}),
+    "vih": frozenset({"vih", "sida", "seropositif", "seropositive"}),
+    "coeur": frozenset({"coeur", "cardiaque", "cardiaques"}),
+    "cancer": frozenset({"cancer", "cancers", "chimiotherapie", "chimio"}),
+    "ulcere": frozenset({"ulcere", "ulceres", "gastrite"}),
+    "allergie": frozenset({"allergie", "allergies", "allergique", "allergiques"}),
+    "thyroide": frozenset({"thyroide", "hypothyroidie", "hyperthyroidie"}),
+    "immunite": frozenset({"immunodeprime", "immunodeprimee", "greffe", "greffee"}),
+    "hemophilie": frozenset({"hemophilie", "hemophile"}),
+    "chirurgie": frozenset({"chirurgie", "operation", "opere", "operee"}),
+}
+_TERM_CATEGORY = {term: category for category, terms in SAFETY_TERMS.items() for term in terms}
+
+NUMBER_WORDS = {
+    "deux": "2", "trois": "3", "quatre": "4", "cinq": "5", "six": "6", "sept": "7",
+    "huit": "8", "neuf": "9", "dix": "10", "douze": "12", "quinze": "15", "vingt": "20",
+}
+UNITS = frozenset({
+    "mg", "g", "kg", "ml", "cl", "l", "cuillere", "cuilleres", "tasse", "tasses", "verre", "verres",
+    "goutte", "gouttes", "fois", "jour", "jours", "semaine", "semaines", "mois", "an", "ans",
+})
+
+# Proches: "pour ma fille", "mon mari" -> la question concerne un tiers
+POSSESSIVES = frozenset({
+    "mon", "ma", "mes", "ton", "ta", "tes", "son", "sa", "ses",
+    "notre", "nos", "votre", "vos", "leur", "leurs",
+})
+RELATIVES = frozenset({
+    "fille", "filles", "fils", "enfant", "enfants", "bebe", "bebes", "nourrisson",
+    "mari", "epoux", "epouse", "femme", "conjoint", "conjointe", "compagnon", "compagne",
+    "pere", "mere", "papa", "maman", "parent", "parents", "frere", "soeur", "freres", "soeurs",
+    "grand-pere", "grand-mere", "grands-parents", "petit-fils", "petite-fille", "petits-enfants",
+    "oncle", "tante", "cousin", "cousine", "neveu", "niece", "beau-pere", "belle-mere",
+    "ami", "amie", "voisin", "voisine", "patient", "patiente", "proche", "proches",
+})
+# Négations: "je ne suis pas enceinte" ne doit pas valoir "je suis enceinte"
+NEGATIONS = frozenset({"ne", "n", "pas", "non", "sans", "jamais", "aucun", "aucune", "ni"})
+
+_SIGNATURE_TOKEN_RE = re.compile(r"\d+(?:[.,]\d+)?|[a-z]+(?:-[a-z]+)*")
+
+
+def safety_signature(question: str) -> Optional[str]:
+    """
+    Termes qui changent la réponse médicale: public, terrain, quantités
+
+    Ex: "2 tasses par jour pour un bébé" -> "2tasse;nourrisson"
+
+    Returns:
+        Signature, ou None si la question ne doit jamais partager de
+        réponse (posée pour un proche, ou négation sur le terrain / la dose)
+    """
+    tokens = _SIGNATURE_TOKEN_RE.findall(fold(question).replace("œ", "oe"))
+    terms = set()
+    negated = False
+    for position, token in enumerate(tokens):
+        if token in POSSESSIVES and RELATIVES.intersection(tokens[position + 1:position + 3]):
+            return None
+        if token in NEGATIONS:
+            negated = True
+            continue
+        category = _TERM_CATEGORY.get(token)
+        if category is not None:
+            terms.add(category)
+            continue
+        number = NUMBER_WORDS.get(token) or (token.replace(",", ".") if token[0].isdigit() else None)
+        if number is None:
+            continue
+        following = tokens[position + 1] if position + 1 < len(tokens) else ""
+        unit = following.rstrip("s") if following in UNITS else ""
+        terms.add(f"{number}{unit}")
+    if negated and terms:
+        return None
+    return ";".join(sorted(terms))
+
+
+class SemanticAnswerCache:
+    """
+    Questions déjà répondues, indexées par embedding
+
+    Args:
+        persist_directory: Répertoire de persistance ChromaDB
+        collection_name: Nom de la collection
+        threshold: Similarité cosinus minimale pour un hit (0-1)
+        ttl_seconds: Âge maximum d'une réponse
+        max_entries: Nombre maximum de réponses conservées
+        embedding_model: Modèle sentence-transformers (multilingue)
+        embedding_function: Fonction d'embedding ChromaDB déjà construite
+            (remplace `embedding_model`)
+    """
+
+    def __init__(
+        self,
+        persist_directory: str,
+        collection_name: str,
+        threshold: float,
+        ttl_seconds: float,
+        max_entries: int,
+        embedding_model: str = "",
+        embedding_function: Any = None,
+    ):
+        self.persist_directory = persist_directory
+        self.collection_name = collection_name
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.embedding_model = embedding_model
+        self._embedding_function = embedding_function
+        self._collection = None
+        self._init_lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0  # questions jamais partagées (proche, négation)
+        self.errors = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._collection is not None
+
+    def _init(self) -> None:
+        """Ouvre la collection (charge le modèle d'embedding au premier appel)"""
+        with self._init_lock:
+            if self._collection is not None:
+                return
+            try:
+                import chromadb
+            except ImportError:
+                logger.warning("⚠️ chromadb not installed - semantic cache disabled")
+                return
+
+            embedding_function = self._embedding_function
+            embedding_name = self.embedding_model or type(embedding_function).__name__
+            if embedding_function is None:
+                try:
+                    import sentence_transformers  # noqa: F401
+                    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+                except ImportError:
+                    # Le modèle par défaut de ChromaDB est anglais: inadapté aux questions en français
+                    logger.warning("⚠️ sentence-transformers not installed - semantic cache disabled")
+                    return
+                embedding_function = SentenceTransformerEmbeddingFunction(model_name=self.embedding_model)
+
+            client = chromadb.PersistentClient(path=self.persist_directory)
+            metadata = {"hnsw:space": "cosine", "embedding_model": embedding_name}
+            collection = client.get_or_create_collection(
+                name=self.collection_name,
+                embedding_function=embedding_function,
+                metadata=metadata,
+            )
+            if (collection.metadata or {}).get("embedding_model") != embedding_name:
+                # Vecteurs d'un autre modèle: incomparables, on repart de zéro
+                logger.info(f"🧠 Embedding model changed to '{embedding_name}' - semantic cache reset")
+                client.delete_collection(self.collection_name)
+                collection = client.create_collection(
+                    name=self.collection_name,
+                    embedding_function=embedding_function,
+                    metadata=metadata,
+                )
+            # Premier embedding: force le chargement du modèle maintenant
+            collection.query(query_texts=["warmup"], n_results=1)
+            self._collection = collection
+            logger.info(
+                f"🧠 Semantic cache ready ({collection.count()} answers in "
+                f"'{self.collection_name}')"
+            )
+
+    async def warmup(self) -> None:
+        """Initialise la collection hors event loop (erreurs journalisées)"""
+        try:
+            await asyncio.to_thread(self._init)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ Semantic cache initialization failed: {str(e)}")
+
+    def _lookup(self, kind: str, question: str, signature: str) -> Optional[Tuple[str, float]]:
+        result = self._collection.query(
+            query_texts=[normalize_prompt(question)],
+            n_results=1,
+            where={"$and": [
+                {"kind": kind},
+                {"model": settings.gemini_model},
+                {"signature": signature},
+                {"created_at": {"$gte": time.time() - self.ttl_seconds}},
+            ]},
+            include=["metadatas", "distances"],
+        )
+        if not result["ids"] or not result["ids"][0]:
+            return None
+        similarity = 1.0 - result["distances"][0][0]
+        if similarity < self.threshold:
+            return None
+        return result["metadatas"][0][0]["answer"], similarity
+
+    def _store(self, kind: str, question: str, answer: str, signature: str) -> None:
+        normalized = normalize_prompt(question)
+        entry_id = hashlib.sha256(f"{kind}\x00{normalized}".encode("utf-8")).hexdigest()
+        self._collection.upsert(
+            ids=[entry_id],
+            documents=[normalized],
+            metadatas=[{
+                "kind": kind,
+                "answer": answer,
+                "created_at": time.time(),
+                "model": settings.gemini_model,
+                "signature": signature,
+            }],
+        )
+        self._writes += 1
+        if self._writes % EVICTION_EVERY == 0:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Supprime les réponses expirées puis les plus anciennes au-delà de max_entries"""
+        self._collection.delete(
+            where={"created_at": {"$lt": time.time() - self.ttl_seconds}}
+        )
+        overflow = self._collection.count() - self.max_entries
+        if overflow > 0:
+            entries = self._collection.get(include=["metadatas"])
+            oldest = sorted(
+                zip(entries["ids"], entries["metadatas"]),
+                key=lambda item: item[1]["created_at"],
+            )[:overflow]
+            self._collection.delete(ids=[entry_id for entry_id, _ in oldest])
+            logger.info(f"🧹 Semantic cache evicted {len(oldest)} old answers")
+
+    async def lookup(self, kind: str, question: str) -> Optional[Tuple[str, float]]:
+        """
+        Réponse d'une question similaire déjà posée
+
+        Args:
+            kind: Espace de réponses ("chat", "quick_advice"...)
+            question: Question de l'utilisateur
+
+        Returns:
+            (réponse, similarité) ou None
+        """
+        if not self.ready:
+            return None
+        signature = safety_signature(question)
+        if signature is None:
+            self.bypassed += 1
+            return None
+        try:
+            hit = await asyncio.to_thread(self._lookup, kind, question, signature)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Semantic cache lookup failed: {str(e)}")
+            return None
+        if hit is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return hit
+
+    async def store(self, kind: str, question: str, answer: str) -> None:
+        """Enregistre une réponse générée"""
+        signature = safety_signature(question)
+        if not self.ready or not answer or signature is None:
+            return
+        try:
+            await asyncio.to_thread(self._store, kind, question, answer, signature)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Semantic cache store failed: {str(e)}")
+
+    def stats(self) -> Dict[str, object]:
+        """Métriques du cache"""
+        lookups = self.hits + self.misses
+        return {
+            "ready": self.ready,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_semantic_cache() -> Optional[SemanticAnswerCache]:
+    """Construit le cache selon la configuration (None si désactivé)"""
+    if not settings.semantic_cache_enabled:
+        return None
+    if settings.workers > 1:
+        # ChromaDB embarqué (PersistentClient): index HNSW non partageable entre processus
+        logger.warning("⚠️ Multiple workers - semantic cache disabled (embedded ChromaDB is single-process)")
+        return None
+    return SemanticAnswerCache(
+        persist_directory=settings.chroma_persist_directory,
+        collection_name=f"{settings.chroma_collection_name}_chat_cache",
+        threshold=settings.semantic_cache_threshold,
+        ttl_seconds=settings.semantic_cache_ttl_seconds,
+        max_entries=settings.semantic_cache_max_entries,
+        embedding_model=settings.semantic_cache_embedding_model,
+    )
+
+
+semantic_cache = create_semantic_cache()
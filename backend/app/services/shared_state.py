@@ -0,0 +1,171 @@
+"""
+État partagé entre workers (mode multi-processus)
+
+Avec plusieurs workers (gunicorn/uvicorn, `WORKERS` > 1), chaque processus
+a sa propre mémoire: uptime, budgets de quota et disjoncteur divergeraient
+(N workers = N fois le quota Gemini). L'état qui doit être global est
+donc placé dans une petite base SQLite locale (`database_url`, mode WAL),
+partagée par tous les processus du nœud:
+
+- Clés simples (heure de démarrage du déploiement, état du disjoncteur)
+- Token buckets RPM/TPM mis à jour en transaction (`BEGIN IMMEDIATE`):
+  le budget du projet Google est consommé une seule fois, quel que soit
+  le worker qui appelle
+
+Aucune transaction ne s'exécute sur l'event loop: sous contention, le
+verrou SQLite peut faire attendre jusqu'au `timeout`. Les accès passent
+par `run()`, un thread dédié par processus (ordre des écritures conservé,
+une seule connexion). En mode mono-worker, rien de tout cela n'est
+utilisé (`shared_state` vaut None).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple, TypeVar
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+
+from app.core.config import settings
+from app.services.response_cache import sqlite_path
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BucketClaim(NamedTuple):
+    """Opération sur un token bucket partagé (voir `SharedState.claim_buckets`)"""
+    name: str
+    capacity: float
+    rate: float  # remplissage par seconde
+    amount: float  # à prélever (0 = simple lecture)
+    adjustment: float = 0.0  # débit (> 0) ou remboursement (< 0) différé
+    drain: bool = False  # vider le bucket (dépassement signalé par le serveur)
+
+
+class SharedState:
+    """
+    Stockage clé/valeur + token buckets partagés (SQLite)
+
+    Args:
+        path: Fichier SQLite commun aux workers
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-state")
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_state ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_buckets ("
+                " name TEXT PRIMARY KEY,"
+                " level REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions explicites (BEGIN IMMEDIATE)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Exécute un accès hors event loop (thread dédié, dans l'ordre des appels)"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT value FROM shared_state WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO shared_state VALUES (?, ?)", (key, value)
+        )
+
+    def setdefault(self, key: str, value: str) -> str:
+        """Valeur existante, sinon `value` (premier worker arrivé)"""
+        conn = self._connect()
+        conn.execute("INSERT OR IGNORE INTO shared_state VALUES (?, ?)", (key, value))
+        return self.get(key)
+
+    def reset(self) -> None:
+        """Nouveau déploiement: oublie l'état de l'instance précédente"""
+        conn = self._connect()
+        conn.execute("DELETE FROM shared_state")
+        conn.execute("DELETE FROM shared_buckets")
+        conn.execute(
+            "INSERT INTO shared_state VALUES ('started_at', ?)", (repr(time.time()),)
+        )
+
+    def claim_buckets(self, claims: Sequence[BucketClaim]) -> Tuple[float, List[float]]:
+        """
+        Vérifie et prélève sur plusieurs token buckets en une transaction
+
+        Tout ou rien: les montants ne sont prélevés que si TOUS les buckets
+        les couvrent (pas de découvert entre workers). Ajustements différés
+        et vidages sont appliqués dans la même transaction.
+
+        Returns:
+            (attente en secondes, 0 si prélevé; niveaux après l'opération)
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            levels = []
+            wait = 0.0
+            for claim in claims:
+                row: Optional[Tuple[float, float]] = conn.execute(
+                    "SELECT level, updated_at FROM shared_buckets WHERE name = ?", (claim.name,)
+                ).fetchone()
+                level, updated_at = row if row else (claim.capacity, now)
+                level = min(claim.capacity, level + max(0.0, now - updated_at) * claim.rate)
+                level = min(claim.capacity, level - claim.adjustment)
+                if claim.drain:
+                    level = min(level, 0.0)
+                missing = min(claim.amount, claim.capacity) - level
+                if missing > 0:
+                    wait = max(wait, missing / claim.rate if claim.rate > 0 else float("inf"))
+                levels.append(level)
+            if wait == 0:
+                levels = [level - claim.amount for level, claim in zip(levels, claims)]
+            conn.executemany(
+                "INSERT OR REPLACE INTO shared_buckets VALUES (?, ?, ?)",
+                [(claim.name, level, now) for claim, level in zip(claims, levels)],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait, levels
+
+
+def create_shared_state() -> Optional[SharedState]:
+    """État partagé si plusieurs workers (None en mono-processus)"""
+    if settings.workers <= 1:
+        return None
+
+    path = sqlite_path(settings.database_url)
+    if path is None:
+        logger.warning("⚠️ DATABASE_URL is not SQLite - worker state NOT shared (quota x workers)")
+        return None
+    try:
+        return SharedState(path)
+    except Exception as e:
+        logger.error(f"❌ Shared worker state unavailable: {str(e)}")
+        return None
+
+
+shared_state = create_shared_state()
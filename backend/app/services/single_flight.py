@@ -0,0 +1,181 @@
+"""
+Coalescence des appels Gemini identiques en cours (single-flight)
+
+Quand une suggestion populaire est cliquée par des centaines d'utilisateurs
+au même moment, le cache ne sert à rien: aucune réponse n'est encore
+générée. Ici, les requêtes concurrentes de même clé (prompt normalisé +
+modèle + paramètres) partagent UN seul appel amont:
+
+- Appel simple: le premier appelant lance la génération, les suivants
+  attendent le même résultat (ou la même erreur)
+- Streaming: les morceaux sont diffusés à tous les abonnés; un abonné
+  arrivé en cours de route rejoue d'abord les morceaux déjà reçus
+- L'appel amont survit au départ de l'appelant qui l'a lancé; il n'est
+  annulé que lorsque plus aucun abonné n'écoute le flux. Un flux annulé
+  n'est plus rejoignable, et un abonné qui le lisait encore reçoit une
+  erreur (jamais une réponse tronquée présentée comme complète)
+"""
+
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class StreamCancelledError(Exception):
+    """Flux amont annulé avant la fin (réponse incomplète)"""
+
+
+class _Broadcast:
+    """Flux amont unique rejoué à plusieurs abonnés"""
+
+    def __init__(self, source: AsyncIterator[str]):
+        self.chunks: List[str] = []
+        self.done = False
+        self.cancelled = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+        # Annulée avant même de démarrer, `_pump` ne passe jamais par son finally
+        self.task.add_done_callback(self._finished)
+
+    @property
+    def joinable(self) -> bool:
+        return not (self.done or self.cancelled)
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _finished(self, task: asyncio.Future) -> None:
+        if self.done:
+            return
+        if self.error is None:
+            self.error = StreamCancelledError("Flux amont annulé")
+        self.done = True
+        self._notify()
+
+    async def _pump(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except asyncio.CancelledError as e:
+            self.error = StreamCancelledError("Flux amont annulé")
+            self.error.__cause__ = e
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+            await source.aclose()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        self.subscribers += 1
+        position = 0
+        try:
+            while True:
+                while position < len(self.chunks):
+                    yield self.chunks[position]
+                    position += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                # Plus rejoignable dès maintenant (le finally de `_pump` viendra plus tard)
+                self.cancelled = True
+                self.task.cancel()
+
+
+class SingleFlight:
+    """Registre des appels en cours, par clé"""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _forget(self, registry: Dict, key: str, entry) -> None:
+        if registry.get(key) is entry:
+            del registry[key]
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Exécute `call` une seule fois pour tous les appelants concurrents de `key`
+
+        Args:
+            key: Clé de déduplication
+            call: Fabrique de la coroutine amont (appelée par le premier appelant)
+
+        Returns:
+            Résultat partagé
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            self.leaders += 1
+
+            def finished(done: asyncio.Future) -> None:
+                self._forget(self._calls, key, done)
+                if not done.cancelled():
+                    done.exception()  # évite "exception was never retrieved"
+
+            task.add_done_callback(finished)
+        else:
+            self.coalesced += 1
+            logger.info("🔗 Coalesced identical in-flight Gemini call")
+        # shield: l'annulation d'un appelant n'annule pas l'appel partagé
+        return await asyncio.shield(task)
+
+    async def stream(
+        self,
+        key: str,
+        open_stream: Callable[[], AsyncIterator[str]],
+    ) -> AsyncIterator[str]:
+        """
+        Flux partagé pour tous les abonnés concurrents de `key`
+
+        Args:
+            key: Clé de déduplication
+            open_stream: Fabrique du flux amont (appelée par le premier abonné)
+
+        Yields:
+            str: Morceaux du flux (depuis le début, même en arrivant en retard)
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None or not broadcast.joinable:
+            broadcast = _Broadcast(open_stream())
+            self._streams[key] = broadcast
+            self.leaders += 1
+            broadcast.task.add_done_callback(
+                lambda _: self._forget(self._streams, key, broadcast)
+            )
+        else:
+            self.coalesced += 1
+            logger.info("🔗 Joined identical in-flight Gemini stream")
+
+        subscription = broadcast.subscribe()
+        try:
+            async for chunk in subscription:
+                yield chunk
+        finally:
+            await subscription.aclose()
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs de coalescence"""
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "upstream_calls": self.leaders,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,230 @@
+"""
+Traçage léger des chemins chauds (spans compatibles OTLP)
+
+Quand la latence régresse, les métriques disent OÙ (route), pas POURQUOI.
+Des spans sont posés autour des points chauds connus (chat Gemini,
+identification, prétraitement d'image, recherche et facettes du catalogue,
+sérialisation pydantic), imbriqués sous le span de la requête HTTP.
+
+- Désactivé par défaut (`TRACING_ENABLED`): un span coûte alors un test
+- Parent courant porté par une contextvar (suit les tâches asyncio)
+- Derniers spans gardés en mémoire (anneau borné), consultables via
+  /api/v1/admin/traces
+- Export OTLP/HTTP JSON par lots vers un collecteur local
+  (`TRACING_OTLP_ENDPOINT`, ex. http://localhost:4318/v1/traces)
+"""
+
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Valeurs OTLP (opentelemetry/proto/trace/v1/trace.proto)
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """Opération chronométrée, enfant du span courant"""
+
+    __slots__ = (
+        "name", "kind", "trace_id", "span_id", "parent_id", "attributes",
+        "start_ns", "end_ns", "status", "status_message", "_start_perf", "_tracer", "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, kind: int, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else ""
+        self.attributes = attributes
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = 0
+        self.end_ns = 0
+        self._start_perf = 0
+        self._tracer = tracer
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def update_name(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Horloge murale pour l'horodatage, monotone pour la durée
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._start_perf)
+        _current_span.reset(self._token)
+        if exc is not None and not isinstance(exc, asyncio.CancelledError):
+            self.status = STATUS_ERROR
+            self.status_message = f"{type(exc).__name__}: {exc}"
+        self._tracer._finish(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": self.status, "message": self.status_message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Span désactivé: rien n'est mesuré ni conservé"""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def update_name(self, name: str) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class Tracer:
+    """
+    Fabrique de spans + tampons de spans terminés
+
+    Args:
+        service_name: Attribut `service.name` de la ressource OTLP
+        enabled: Traçage actif
+        buffer_size: Spans récents conservés (et file d'export maximale)
+        export: Spans à exporter vers un collecteur
+    """
+
+    def __init__(self, service_name: str, enabled: bool, buffer_size: int, export: bool):
+        self.service_name = service_name
+        self.enabled = enabled
+        self.recent: Deque[Span] = deque(maxlen=buffer_size)
+        self._export_queue: Optional[Deque[Span]] = deque(maxlen=buffer_size) if export else None
+        self.exported = 0
+        self.export_errors = 0
+
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any):
+        """Span à utiliser en `with` (no-op si le traçage est désactivé)"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, kind, attributes)
+
+    def _finish(self, span: Span) -> None:
+        self.recent.append(span)
+        if self._export_queue is not None:
+            self._export_queue.append(span)
+
+    def otlp_payload(self, spans: List[Span]) -> Dict[str, Any]:
+        """Requête ExportTraceServiceRequest (encodage JSON OTLP)"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    _otlp_attribute("service.name", self.service_name),
+                    _otlp_attribute("service.version", settings.app_version),
+                    _otlp_attribute("deployment.environment", settings.environment),
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "remedia.tracing"},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+
+    async def export_forever(self, endpoint: str, interval: float) -> None:
+        """Envoie les spans terminés au collecteur, par lots, jusqu'à annulation"""
+        import httpx
+
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            try:
+                while True:
+                    await asyncio.sleep(interval)
+                    await self._export_batch(client, endpoint)
+            finally:
+                # Arrêt: dernier lot (sans bloquer au-delà du timeout client)
+                await asyncio.shield(self._export_batch(client, endpoint))
+
+    async def _export_batch(self, client, endpoint: str) -> None:
+        queue = self._export_queue
+        if not queue:
+            return
+        spans = [queue.popleft() for _ in range(len(queue))]
+        try:
+            response = await client.post(endpoint, json=self.otlp_payload(spans))
+            response.raise_for_status()
+            self.exported += len(spans)
+        except Exception as e:
+            self.export_errors += 1
+            logger.warning(f"⚠️ OTLP export failed ({len(spans)} spans dropped): {str(e)}")
+
+
+def traced(name: str):
+    """Décorateur: exécute la fonction (sync ou async) dans un span `name`"""
+
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+tracer = Tracer(
+    service_name=settings.app_name.lower().replace(" ", "-"),
+    enabled=settings.tracing_enabled,
+    buffer_size=settings.tracing_buffer_size,
+    export=bool(settings.tracing_enabled and settings.tracing_otlp_endpoint),
+)
@@ -0,0 +1,40 @@
+"""
+Configuration gunicorn (production, multi-workers)
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Nombre de workers: `WORKERS` (voir app.core.config). Au-delà de 1,
+uptime, quota Gemini, disjoncteur et caches sont partagés via SQLite
+(app.services.shared_state).
+"""
+
+import os
+
+from app.core.config import settings
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = settings.workers
+worker_class = "uvicorn_worker.UvicornWorker"  # paquet uvicorn-worker
+
+# Chaque worker importe l'application lui-même (pools, connexions SQLite
+# et clients Gemini ne doivent pas être hérités d'un fork)
+preload_app = False
+
+# Appels Gemini lents + streaming SSE
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+# Logs d'accès produits par le middleware de l'application
+accesslog = None
+errorlog = "-"
+loglevel = "info"
+
+
+def on_starting(server):
+    """Nouveau déploiement: l'état partagé de l'instance précédente est oublié"""
+    from app.services.shared_state import shared_state
+
+    if shared_state is not None:
+        shared_state.reset()
+        server.log.info(f"🔗 Shared worker state reset ({settings.workers} workers)")
@@ -0,0 +1,141 @@
+"""
+Micro-benchmark: coût par requête des middlewares HTTP
+
+Compare, sur une route réelle et bon marché (`/plants/stats/overview` par
+défaut), le routeur nu, l'ancienne paire RequestID + StructuredLogging
+(BaseHTTPMiddleware) et le RequestContextMiddleware ASGI pur. Les requêtes
+sont envoyées directement à l'application ASGI (pas de réseau): seul le
+coût des middlewares et de la route est mesuré.
+
+Usage (depuis backend/):
+    python scripts/bench_middleware.py [--requests 5000] [--path /api/v1/plants/plants/stats/overview]
+"""
+
+from pathlib import Path
+from typing import Callable, List
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.types import ASGIApp, Message  # noqa: E402
+
+
+# ============================================
+# AVANT: PAIRE BaseHTTPMiddleware (référence)
+# ============================================
+
+class LegacyRequestIDMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable):
+        request_id = f"{int(time.time() * 1000)}-{id(request)}"
+        request.state.request_id = request_id
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+class LegacyStructuredLoggingMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app: ASGIApp):
+        super().__init__(app)
+        self.logger = logging.getLogger("remedia.http")
+
+    async def dispatch(self, request: Request, call_next: Callable):
+        if request.method == "OPTIONS":
+            return await call_next(request)
+        method = request.method
+        path = request.url.path
+        client_host = request.client.host if request.client else "unknown"
+        request_id = getattr(request.state, "request_id", "no-id")
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        process_time = (time.perf_counter() - start_time) * 1000
+        self.logger.info(
+            f"✅ {method:6} {path:40} {response.status_code} "
+            f"[{process_time:6.2f}ms] {client_host} id={request_id}"
+        )
+        response.headers["X-Process-Time"] = str(process_time)
+        return response
+
+
+# ============================================
+# MESURE
+# ============================================
+
+def _scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+
+async def _run(app: ASGIApp, path: str, requests: int) -> List[float]:
+    """Durées (µs) de `requests` requêtes séquentielles"""
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"{path} -> HTTP {message['status']}")
+
+    durations = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await app(_scope(path), receive, send)
+        durations.append((time.perf_counter() - start) * 1e6)
+    return durations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--path", default="/api/v1/plants/plants/stats/overview")
+    args = parser.parse_args()
+
+    # Les logs sont formatés mais pas écrits: on mesure les middlewares, pas la console
+    logging.disable(logging.CRITICAL)
+    from app.main import RequestContextMiddleware, app
+
+    router = app.router
+    variants = {
+        "routeur nu": router,
+        "BaseHTTPMiddleware x2": LegacyStructuredLoggingMiddleware(LegacyRequestIDMiddleware(router)),
+        "ASGI pur (fusionné)": RequestContextMiddleware(router),
+    }
+
+    async def bench() -> None:
+        for app_variant in variants.values():  # échauffement
+            await _run(app_variant, args.path, 200)
+
+        results = {name: await _run(variant, args.path, args.requests) for name, variant in variants.items()}
+        baseline = statistics.median(results["routeur nu"])
+
+        print(f"{args.path} - {args.requests} requêtes par variante\n")
+        print(f"{'variante':24} {'médiane µs':>11} {'p99 µs':>9} {'surcoût µs':>11}")
+        for name, durations in results.items():
+            durations.sort()
+            median = statistics.median(durations)
+            p99 = durations[int(len(durations) * 0.99) - 1]
+            print(f"{name:24} {median:11.1f} {p99:9.1f} {median - baseline:11.1f}")
+
+    asyncio.run(bench())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Fixtures communes des tests backend
+
+L'application est importée telle quelle (sans clé Gemini: le service
+reste non configuré, aucun appel réseau n'est fait).
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def catalog():
+    from app.api.v1.plants import catalog_store
+
+    return catalog_store.current
@@ -0,0 +1,75 @@
+"""Tests du chargement du catalogue et du rechargement à chaud"""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from app.api.v1.plants import Plant
+from app.services.catalog_loader import CatalogStore, load_records
+
+DATABASE = Path(__file__).resolve().parents[1] / "app" / "data" / "plants_database.json"
+
+
+@pytest.fixture
+def records():
+    return load_records(DATABASE)[:3]
+
+
+@pytest.fixture
+def catalog_file(tmp_path, records):
+    path = tmp_path / "plants.json"
+    path.write_text(json.dumps({"plants": records[:2]}), encoding="utf-8")
+    return path
+
+
+def test_load_records_accepts_object_or_list(tmp_path, records):
+    as_list = tmp_path / "list.json"
+    as_list.write_text(json.dumps(records), encoding="utf-8")
+    invalid = tmp_path / "invalid.json"
+    invalid.write_text(json.dumps({"plants": {"id": "x"}}), encoding="utf-8")
+
+    assert load_records(as_list) == records
+    with pytest.raises(ValueError):
+        load_records(invalid)
+
+
+def test_reload_publishes_new_snapshot_and_reuses_unchanged_plants(catalog_file, records):
+    store = CatalogStore(catalog_file, Plant)
+    before = store.current
+    catalog_file.write_text(json.dumps({"plants": records}), encoding="utf-8")
+
+    assert asyncio.run(store.reload())
+
+    after = store.current
+    assert len(before) == 2 and len(after) == 3
+    assert after.get(records[2]["id"]) is not None
+    assert after.by_id[records[0]["id"]] is before.by_id[records[0]["id"]]  # pas re-validée
+
+
+def test_invalid_file_keeps_previous_snapshot(catalog_file):
+    store = CatalogStore(catalog_file, Plant)
+    before = store.current
+    catalog_file.write_text("{not json", encoding="utf-8")
+
+    assert not asyncio.run(store.reload())
+    assert store.current is before
+
+
+def test_watcher_reloads_on_file_change(catalog_file, records):
+    async def scenario():
+        store = CatalogStore(catalog_file, Plant, watch_interval=0.01)
+        store.start()
+        try:
+            await asyncio.sleep(0.02)
+            catalog_file.write_text(json.dumps({"plants": records}), encoding="utf-8")
+            for _ in range(100):
+                if len(store.current) == 3:
+                    break
+                await asyncio.sleep(0.01)
+            return len(store.current)
+        finally:
+            await store.stop()
+
+    assert asyncio.run(scenario()) == 3
@@ -0,0 +1,53 @@
+"""Tests du chat en streaming (Server-Sent Events)"""
+
+import json
+
+from app.api.v1 import chat
+
+URL = "/api/v1/chat/chat/message/stream"
+
+
+def _events(body: str):
+    """Liste (event, data) d'un flux SSE"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_sends_tokens_then_done(client, monkeypatch):
+    prompts = []
+
+    async def fake_stream(prompt):
+        prompts.append(prompt)
+        for text in ("🌿 Le moringa ", "renforce ", "l'immunité"):
+            yield text
+
+    monkeypatch.setattr(chat.gemini_service, "stream_chat_medical", fake_stream)
+    response = client.post(URL, json={
+        "message": "Moringa ?",
+        "conversation_history": [{"role": "user", "content": "Bonjour"}],
+    })
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+
+    events = _events(response.text)
+    assert [event for event, _ in events] == ["token", "token", "token", "done"]
+    text = "".join(data["text"] for event, data in events if event == "token")
+    assert events[-1][1] == {"response_length": len(text)}
+    assert "Utilisateur: Bonjour" in prompts[0]
+
+
+def test_stream_failure_becomes_error_event(client, monkeypatch):
+    async def failing_stream(prompt):
+        yield "début"
+        raise RuntimeError("coupure amont")
+
+    monkeypatch.setattr(chat.gemini_service, "stream_chat_medical", failing_stream)
+    events = _events(client.post(URL, json={"message": "Toux ?"}).text)
+
+    assert [event for event, _ in events] == ["token", "error"]
+    assert events[-1][1]["error"] == "coupure amont"
@@ -0,0 +1,98 @@
+"""Tests du disjoncteur Gemini (mode local)"""
+
+import pytest
+
+from app.api.v1 import chat
+from app.services import circuit_breaker
+from app.services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", fake)
+    return fake
+
+
+def opened_breaker():
+    breaker = CircuitBreaker("gemini", failure_threshold=2, recovery_seconds=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("gemini", failure_threshold=2, recovery_seconds=30)
+    breaker.record_failure()
+    breaker.record_success()  # remet le compteur à zéro
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now += 10
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 20
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_half_open_allows_single_probe(clock):
+    breaker = opened_breaker()
+    clock.now += 30
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_immediately(clock):
+    breaker = opened_breaker()
+    clock.now += 30
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()["retry_in_seconds"] == 30
+    assert breaker.opened_count == 2
+
+
+def test_cancelled_probe_releases_slot(clock):
+    breaker = opened_breaker()
+    clock.now += 30
+
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+
+
+def test_open_circuit_fails_fast_with_503(client, monkeypatch):
+    breaker = opened_breaker()
+    monkeypatch.setattr(chat.gemini_service, "breaker", breaker)
+
+    response = client.post("/api/v1/chat/chat/message/stream", json={"message": "Toux ?"})
+
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 29
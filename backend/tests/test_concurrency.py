@@ -0,0 +1,53 @@
+"""Tests des limites de concurrence Gemini par endpoint"""
+
+import asyncio
+
+import pytest
+
+from app.api.v1 import chat
+from app.services.concurrency import ConcurrencyLimiter, GeminiOverloadedError, parse_limits
+
+
+def test_parse_limits_ignores_malformed_items():
+    assert parse_limits("scan=4, chat=8,oops") == {"scan": 4, "chat": 8}
+
+
+def test_limiter_queues_then_rejects():
+    async def scenario():
+        limiter = ConcurrencyLimiter("chat", max_concurrency=1, max_queue=1, retry_after=3)
+        release = asyncio.Event()
+
+        async def call():
+            async with limiter:
+                await release.wait()
+
+        first = asyncio.create_task(call())
+        second = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        assert (limiter.in_flight, limiter.waiting) == (1, 1)
+
+        with pytest.raises(GeminiOverloadedError) as error:
+            async with limiter:
+                pass
+        assert error.value.retry_after == 3
+
+        release.set()
+        await asyncio.gather(first, second)
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["completed"] == 2
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == stats["queue_depth"] == 0
+
+
+def test_full_queue_returns_429_with_retry_after(client, monkeypatch):
+    def overloaded(endpoint):
+        raise GeminiOverloadedError(endpoint, 7)
+
+    monkeypatch.setattr(chat.gemini_service, "check_capacity", overloaded)
+    response = client.post("/api/v1/chat/chat/message/stream", json={"message": "Fièvre ?"})
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "7"
+    assert response.json()["retry_after"] == 7
@@ -0,0 +1,67 @@
+"""Tests du prétraitement des images avant Gemini Vision"""
+
+import asyncio
+import io
+
+import pytest
+from PIL import Image, UnidentifiedImageError
+
+from app.services import image_preprocessing
+from app.services.image_preprocessing import prepare_image, preprocess_image, sniff_image_type
+
+
+def encode(image: Image.Image, fmt: str, **params) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **params)
+    return buffer.getvalue()
+
+
+def test_sniff_uses_content_not_extension():
+    assert sniff_image_type(encode(Image.new("RGB", (4, 4)), "JPEG")) == "image/jpeg"
+    assert sniff_image_type(encode(Image.new("RGB", (4, 4)), "PNG")) == "image/png"
+    assert sniff_image_type(encode(Image.new("RGB", (4, 4)), "WEBP")) == "image/webp"
+    assert sniff_image_type(b"GIF89a....") is None
+
+
+def test_jpeg_is_rotated_resized_and_stripped():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # orientation: rotation de 90°
+    exif[0x010F] = "Téléphone"
+    data = encode(Image.new("RGB", (2000, 1000), "green"), "JPEG", exif=exif.tobytes())
+
+    prepared = preprocess_image(data, max_side=768, quality=85)
+
+    assert prepared.original_size == (2000, 1000)
+    assert prepared.size == (384, 768)
+    assert prepared.original_bytes == len(data)
+    with Image.open(io.BytesIO(prepared.data)) as result:
+        assert result.format == "JPEG"
+        assert result.size == (384, 768)
+        assert not result.getexif()
+
+
+def test_transparent_png_is_flattened_on_white():
+    data = encode(Image.new("RGBA", (10, 10), (0, 0, 0, 0)), "PNG")
+
+    prepared = preprocess_image(data, max_side=768, quality=85)
+
+    assert prepared.size == (10, 10)  # jamais agrandie
+    with Image.open(io.BytesIO(prepared.data)) as result:
+        assert result.mode == "RGB"
+        assert all(channel > 250 for channel in result.getpixel((5, 5)))
+
+
+def test_invalid_bytes_raise():
+    with pytest.raises(UnidentifiedImageError):
+        preprocess_image(b"pas une image", max_side=768, quality=85)
+
+
+def test_prepare_image_without_pool(monkeypatch):
+    monkeypatch.setattr(image_preprocessing.settings, "scan_preprocess_workers", 0)
+    monkeypatch.setattr(image_preprocessing, "_pool", None)
+    data = encode(Image.new("RGB", (1600, 1200), "red"), "JPEG")
+
+    prepared = asyncio.run(prepare_image(data))
+
+    assert prepared.size == (768, 576)
+    assert prepared.as_part() == {"mime_type": "image/jpeg", "data": prepared.data}
@@ -0,0 +1,111 @@
+"""Tests du classifieur local (première passe avant Gemini Vision)"""
+
+import asyncio
+import io
+import json
+
+import pytest
+from PIL import Image
+
+from app.api.v1 import scan
+from app.services.local_classifier import OUT_OF_CATALOG, REFERENCE_MANIFEST, LocalPlantClassifier
+
+np = pytest.importorskip("numpy")
+
+
+def jpeg(color=(40, 140, 60)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def classifier_with(references, labels, query, threshold=0.85, margin=0.05):
+    """Classifieur prêt, embeddings de référence et de requête imposés"""
+    classifier = LocalPlantClassifier("absent.onnx", "absent", threshold, margin)
+    classifier._np = np
+    classifier._labels = labels
+    classifier._references = np.array(references, dtype=np.float32)
+    classifier._embed = lambda image: np.array(query, dtype=np.float32)
+    return classifier
+
+
+def test_missing_model_leaves_classifier_disabled():
+    classifier = LocalPlantClassifier("absent.onnx", "absent", 0.85, 0.05)
+    asyncio.run(classifier.warmup())
+
+    assert not classifier.ready
+    assert asyncio.run(classifier.classify(jpeg())) is None
+
+
+def test_confident_match_answers_locally():
+    classifier = classifier_with(
+        [[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]], ["neem", "ginger", "neem"], [0.98, 0.2]
+    )
+
+    plant_id, similarity = asyncio.run(classifier.classify(jpeg()))
+
+    assert plant_id == "neem"
+    assert similarity == pytest.approx(0.98)
+    assert classifier.stats()["local_hits"] == 1
+
+
+@pytest.mark.parametrize("query", [[0.7, 0.1], [0.9, 0.88]])
+def test_weak_or_ambiguous_match_escalates(query):
+    classifier = classifier_with([[1.0, 0.0], [0.0, 1.0]], ["neem", "ginger"], query)
+
+    assert asyncio.run(classifier.classify(jpeg())) is None
+    assert classifier.stats()["escalated"] == 1
+
+
+@pytest.mark.parametrize("query", [[0.6, 0.8], [0.9, 0.44]])
+def test_out_of_catalog_plant_escalates(query):
+    # Référence négative (plante hors catalogue) aussi proche ou plus proche que le neem
+    classifier = classifier_with(
+        [[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]], ["neem", "ginger", OUT_OF_CATALOG],
+        query, threshold=0.5,
+    )
+
+    assert asyncio.run(classifier.classify(jpeg())) is None
+
+
+def test_reference_manifest_ids_exist_in_catalog(catalog):
+    manifest = json.loads(REFERENCE_MANIFEST.read_text(encoding="utf-8"))
+
+    assert OUT_OF_CATALOG in manifest
+    assert catalog.get(OUT_OF_CATALOG) is None
+    unknown = [p for p in manifest if p != OUT_OF_CATALOG and catalog.get(p) is None]
+    assert unknown == []
+
+
+def test_plant_from_catalog_builds_identification(catalog):
+    plant = scan.plant_from_catalog("moringa-oleifera", 0.912)
+    record = catalog.get("moringa-oleifera")
+
+    assert plant.scientificName == record.scientific_name
+    assert plant.confidence is None  # similarité != probabilité
+    assert plant.similarity == 0.912
+    assert plant.catalogId == record.id
+    assert plant.warnings == list(record.warnings)
+    assert scan.plant_from_catalog("inconnue", 0.99) is None
+
+
+def test_identify_route_skips_gemini_on_local_match(client, monkeypatch):
+    class FakeClassifier:
+        async def classify(self, image_data):
+            return "artemisia-annua", 0.95
+
+    async def unexpected_gemini_call(*args, **kwargs):
+        raise AssertionError("Gemini ne doit pas être appelé")
+
+    monkeypatch.setattr(scan.settings, "gemini_api_key", "test-key")
+    monkeypatch.setattr(scan, "scan_cache", None)
+    monkeypatch.setattr(scan, "local_classifier", FakeClassifier())
+    monkeypatch.setattr(scan.gemini_service, "identify_plant", unexpected_gemini_call)
+
+    response = client.post(
+        "/api/v1/scan/identify", files={"file": ("leaf.jpg", jpeg(), "image/jpeg")}
+    )
+
+    body = response.json()
+    assert body["message"] == "Identification locale"
+    assert body["plant"]["catalogId"] == "artemisia-annua"
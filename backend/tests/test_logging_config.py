@@ -0,0 +1,74 @@
+"""Tests du logging non bloquant (contexte, échantillonnage, JSON)"""
+
+import json
+import logging
+import sys
+
+from app.core import logging_config
+from app.core.logging_config import (
+    JsonFormatter,
+    RequestContextFilter,
+    SuccessSampler,
+    _LightQueueHandler,
+    bind_request_context,
+    reset_request_context,
+)
+
+
+def record(message="requête", args=(), **extra) -> logging.LogRecord:
+    entry = logging.LogRecord("remedia.http", logging.INFO, __file__, 1, message, args, None)
+    entry.__dict__.update(extra)
+    return entry
+
+
+def test_sampler_keeps_errors_and_first_successes(monkeypatch):
+    monkeypatch.setattr(logging_config.time, "monotonic", lambda: 100.0)
+    monkeypatch.setattr(logging_config.random, "random", lambda: 0.99)
+    sampler = SuccessSampler(threshold=2, rate=0.1)
+
+    kept = [sampler.filter(record(sampleable=True)) for _ in range(5)]
+    assert kept == [True, True, False, False, False]
+    assert sampler.filter(record(sampleable=False))
+    assert sampler.filter(record())
+    assert sampler.dropped == 3
+
+    monkeypatch.setattr(logging_config.time, "monotonic", lambda: 101.0)
+    assert sampler.filter(record(sampleable=True))  # nouvelle fenêtre
+
+
+def test_context_filter_does_not_override_explicit_fields():
+    token = bind_request_context(request_id="r-1", path="/api/v1/chat")
+    try:
+        entry = record(path="/explicite")
+        RequestContextFilter().filter(entry)
+    finally:
+        reset_request_context(token)
+
+    assert entry.request_id == "r-1"
+    assert entry.path == "/explicite"
+
+
+def test_json_formatter_includes_extra_fields():
+    entry = record("%s %d", ("GET", 200), status=200, request_id="r-2", sampleable=True)
+    line = json.loads(JsonFormatter().format(entry))
+
+    assert line["message"] == "GET 200"
+    assert line["level"] == "INFO"
+    assert (line["status"], line["request_id"]) == (200, "r-2")
+    assert "sampleable" not in line
+    assert "args" not in line
+
+
+def test_queue_handler_resolves_message_and_exception():
+    try:
+        raise ValueError("panne")
+    except ValueError:
+        entry = record("scan %s", (["Neem"],))
+        entry.exc_info = sys.exc_info()
+
+    prepared = _LightQueueHandler(None).prepare(entry)
+
+    assert (prepared.msg, prepared.args) == ("scan ['Neem']", None)
+    assert prepared.exc_info is None
+    assert "ValueError: panne" in prepared.exc_text
+    assert "ValueError: panne" in json.loads(JsonFormatter().format(prepared))["exception"]
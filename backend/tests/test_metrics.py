@@ -0,0 +1,82 @@
+"""Tests du registre Prometheus et des étiquettes à cardinalité bornée"""
+
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.services.metrics import MetricsRegistry, http_in_flight, http_requests, method_label, route_group
+
+
+@pytest.mark.parametrize("path, group", [
+    ("/api/v1/scan/identify", "scan"),
+    ("/api/v1/chat/chat/message", "chat"),
+    ("/api/v1/plants/plants/list", "plants"),
+    ("/api/v1/admin/traces", "admin"),
+    ("/health", "health"),
+    ("/api/v1/", "other"),
+    ("/api/v1/does-not-exist/x", "other"),
+    ("/metrics", "other"),
+    ("/", "other"),
+])
+def test_route_group(path, group):
+    assert route_group(path) == group
+
+
+def test_method_label():
+    assert method_label("GET") == "GET"
+    assert method_label("PROPFIND") == "other"
+
+
+def test_counter_and_histogram_render():
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests_total", "Requêtes", ("route",))
+    latency = registry.histogram("test_latency_seconds", "Durée", (), buckets=(0.1, 1.0))
+
+    requests.inc("/a")
+    requests.inc("/a", amount=2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5.0)
+    text = registry.render()
+
+    assert 'test_requests_total{route="/a"} 3' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "test_latency_seconds_count 3" in text
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("test_total", "Test", ("value",)).inc('a"b\\c')
+
+    assert 'test_total{value="a\\"b\\\\c"} 1' in registry.render()
+
+
+def test_random_paths_do_not_create_series(client):
+    client.get("/health")
+    groups_before = set(http_in_flight._values)
+    requests_before = set(http_requests._values)
+
+    for _ in range(20):
+        client.get(f"/api/v1/{uuid.uuid4().hex}")
+        client.request(uuid.uuid4().hex[:8].upper(), "/health")
+
+    assert set(http_in_flight._values) - groups_before <= {("other",)}
+    new_series = set(http_requests._values) - requests_before
+    assert {(method, route) for method, route, _ in new_series} <= {("GET", "unmatched"), ("other", "/health")}
+
+
+def test_metrics_endpoint_requires_admin_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "")
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"X-Admin-Token": "mauvais"}).status_code == 401
+
+    response = client.get("/metrics", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "remedia_gemini_breaker_open" in response.text
@@ -0,0 +1,34 @@
+"""Tests du snapshot catalogue: résolution des identifiants"""
+
+import pytest
+
+from app.services.plant_catalog import slugify
+
+
+def test_slugify():
+    assert slugify("Azadirachta indica") == "azadirachta-indica"
+    assert slugify("  Aloë  Vera ") == "aloe-vera"
+
+
+def test_get_every_plant_by_id_scientific_name_and_case(catalog):
+    for plant in catalog.plants:
+        for key in (
+            plant.id,
+            plant.id.upper(),
+            plant.scientific_name,
+            plant.scientific_name.upper(),
+            slugify(plant.scientific_name),
+        ):
+            assert catalog.get(key) is plant, key
+
+
+def test_get_unknown_plant(catalog):
+    assert catalog.get("Plantago inexistens") is None
+    assert catalog.get("") is None
+
+
+@pytest.mark.parametrize("key", ["Artemisia annua", "Moringa oleifera", "NEEM", "Azadirachta indica"])
+def test_plant_detail_route_resolves_aliases(client, catalog, key):
+    response = client.get(f"/api/v1/plants/plants/{key}")
+    assert response.status_code == 200
+    assert response.json()["data"]["id"] == catalog.get(key).id
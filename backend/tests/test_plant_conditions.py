@@ -0,0 +1,58 @@
+"""Tests de l'index conditions -> plantes"""
+
+from app.services.plant_conditions import ConditionIndex, condition_terms, stem
+
+RECORDS = [
+    {
+        "id": "artemisia",
+        "traditional_uses": ["Traitement du paludisme", "Fièvres"],
+        "medicinal_properties": ["Antipaludique"],
+    },
+    {
+        "id": "papaya",
+        "traditional_uses": ["Troubles digestifs"],
+        "medicinal_properties": ["Antipaludique"],
+    },
+    {
+        "id": "ginger",
+        "traditional_uses": ["Nausées", "Digestion difficile"],
+        "medicinal_properties": ["Anti-inflammatoire"],
+    },
+]
+
+
+def test_stem_and_synonyms():
+    assert stem("digestifs") == stem("digestion") == stem("digestive")
+    assert condition_terms("Traitement contre le palu") == condition_terms("malaria")
+    assert condition_terms("pour la FIÈVRE") == condition_terms("fievres")
+
+
+def test_lookup_ranks_traditional_use_above_property():
+    ranked = ConditionIndex(RECORDS).lookup("paludisme")
+    assert [plant_id for plant_id, _ in ranked] == ["artemisia", "papaya"]
+    assert ranked[0][1] > ranked[1][1]
+
+
+def test_lookup_synonyms_plurals_and_unknown():
+    index = ConditionIndex(RECORDS)
+    assert [plant_id for plant_id, _ in index.lookup("malaria")] == ["artemisia", "papaya"]
+    assert {plant_id for plant_id, _ in index.lookup("digestive")} == {"papaya", "ginger"}
+    assert index.lookup("varicelle") == []
+    assert len(index.lookup("paludisme", limit=1)) == 1
+
+
+def test_autocomplete_counts_plants_per_label():
+    suggestions = ConditionIndex(RECORDS).autocomplete("anti")
+    labels = {suggestion["label"]: suggestion for suggestion in suggestions}
+
+    assert set(labels) == {"Antipaludique", "Anti-inflammatoire"}
+    assert suggestions[0]["label"] == "Antipaludique"  # 2 plantes
+    assert ConditionIndex(RECORDS).autocomplete("") == []
+
+
+def test_by_condition_route_uses_synonyms(client):
+    palu = client.get("/api/v1/plants/plants/by-condition/palu").json()
+    malaria = client.get("/api/v1/plants/plants/by-condition/malaria").json()
+
+    assert palu["results_count"] > 0
+    assert [plant["id"] for plant in palu["data"]] == [plant["id"] for plant in malaria["data"]]
@@ -0,0 +1,94 @@
+"""Tests des facettes et de la pagination par curseur de /plants/list"""
+
+import pytest
+
+from app.services.plant_facets import FacetIndex, decode_cursor, encode_cursor, sort_key
+
+RECORDS = sorted(
+    [
+        {"id": "moringa", "scientific_name": "Moringa oleifera", "family": "Moringaceae",
+         "found_in": ["Togo", "Niger"], "medicinal_properties": ["Antioxydant"], "warnings": []},
+        {"id": "artemisia", "scientific_name": "Artemisia annua", "family": "Asteraceae",
+         "found_in": ["Bénin"], "medicinal_properties": ["Antipaludique"],
+         "warnings": ["Grossesse"]},
+        {"id": "vernonia", "scientific_name": "Vernonia amygdalina", "family": "Asteraceae",
+         "found_in": ["Bénin", "Togo"], "medicinal_properties": ["Antipaludique"], "warnings": []},
+        {"id": "papaya", "scientific_name": "Carica papaya", "family": "Caricaceae",
+         "found_in": ["Benin"], "medicinal_properties": ["Digestif"], "warnings": []},
+    ],
+    key=sort_key,
+)
+
+
+def _counts(facet):
+    return {c["value"]: c["count"] for c in facet}
+
+
+def test_cursor_round_trip_and_invalid():
+    key = ("artemisia annua", "artemisia")
+    cursor = encode_cursor(key)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == key
+    with pytest.raises(ValueError):
+        decode_cursor("pas-un-curseur")
+
+
+def test_filter_and_across_facets_or_within():
+    index = FacetIndex(RECORDS)
+
+    mask, _ = index.filter({"family": ["asteraceae"], "country": ["Togo"]})
+    assert index.page(mask, 10)[0] == ["vernonia"]
+
+    mask, _ = index.filter({"family": ["Asteraceae", "Caricaceae"]})
+    assert index.page(mask, 10)[0] == ["artemisia", "papaya", "vernonia"]
+
+    mask, _ = index.filter({}, has_warnings=True)
+    assert index.page(mask, 10)[0] == ["artemisia"]
+
+
+def test_facet_counts_ignore_their_own_filter():
+    _, facets = FacetIndex(RECORDS).filter({"family": ["Asteraceae"]})
+
+    assert _counts(facets["family"]) == {"Asteraceae": 2, "Moringaceae": 1, "Caricaceae": 1}
+    assert _counts(facets["country"]) == {"Bénin": 2, "Togo": 1}  # "Benin" replié
+    assert facets["has_warnings"] == {"true": 1, "false": 1}
+
+
+def test_cursor_pages_cover_mask_once():
+    index = FacetIndex(RECORDS)
+    mask = index.all_bits
+
+    seen, cursor = [], None
+    while True:
+        ids, cursor = index.page(mask, 3 if not seen else 1, cursor=cursor)
+        seen.extend(ids)
+        if cursor is None:
+            break
+    assert seen == [r["id"] for r in RECORDS]
+
+    assert index.page(mask, 2, offset=1)[0] == [r["id"] for r in RECORDS[1:3]]
+
+
+def test_cursor_survives_catalog_change():
+    first, cursor = FacetIndex(RECORDS).page(FacetIndex(RECORDS).all_bits, 2)
+    reloaded = FacetIndex([r for r in RECORDS if r["id"] != first[0]])
+
+    rest, _ = reloaded.page(reloaded.all_bits, 10, cursor=cursor)
+    assert rest == [r["id"] for r in RECORDS[2:]]
+
+
+def test_list_route_cursor_pagination(client, catalog):
+    url = "/api/v1/plants/plants/list"
+    first = client.get(url, params={"limit": 5}).json()
+    pagination = first["pagination"]
+    assert pagination["total"] == len(catalog.records)
+    assert pagination["has_more"] is True
+
+    second = client.get(url, params={"limit": 5, "cursor": pagination["next_cursor"]}).json()
+    first_ids = [p["id"] for p in first["data"]]
+    second_ids = [p["id"] for p in second["data"]]
+    assert not set(first_ids) & set(second_ids)
+    assert second["pagination"]["offset"] is None
+
+    assert client.get(url, params={"cursor": "%%%"}).status_code == 400
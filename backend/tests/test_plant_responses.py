@@ -0,0 +1,71 @@
+"""Tests des réponses pré-sérialisées et de la revalidation ETag"""
+
+import json
+
+from pydantic import BaseModel
+
+from app.services.plant_responses import MAX_CACHED_PAGES, PlantResponseCache, _etag_matches, make_body
+
+
+class Item(BaseModel):
+    id: str
+    name: str
+
+
+def test_make_body_strong_etag_depends_on_content():
+    first, same, other = make_body(b'{"a":1}'), make_body(b'{"a":1}'), make_body(b'{"a":2}')
+    assert first.etag == same.etag != other.etag
+    assert first.etag.startswith('"') and first.etag.endswith('"')
+
+
+def test_if_none_match_comparison():
+    etag = '"abc"'
+    assert _etag_matches('"abc"', etag)
+    assert _etag_matches('W/"abc"', etag)
+    assert _etag_matches('"x", "abc"', etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('"abd"', etag)
+
+
+def test_bodies_match_pydantic_serialization():
+    items = [Item(id="a", name="Aloès"), Item(id="b", name="Neem")]
+    cache = PlantResponseCache(items)
+
+    assert json.loads(cache.detail("a").body) == {"success": True, "data": items[0].model_dump()}
+    results = json.loads(cache.results(["b", "a"]).body)
+    assert [item["id"] for item in results["data"]] == ["b", "a"]
+    assert results["results_count"] == 2
+    page = json.loads(cache.list_body(["a"], {"total": 2}, facets={"family": []}).body)
+    assert page == {"success": True, "data": [items[0].model_dump()], "pagination": {"total": 2}, "facets": {"family": []}}
+
+
+def test_memo_builds_once_and_is_bounded():
+    cache = PlantResponseCache([])
+    builds = []
+
+    def build(key):
+        builds.append(key)
+        return make_body(str(key).encode())
+
+    assert cache.memo("k", lambda: build("k")) is cache.memo("k", lambda: build("k"))
+    for index in range(MAX_CACHED_PAGES + 1):
+        cache.memo(index, lambda index=index: build(index))
+    assert builds.count("k") == 1
+    assert len(cache._memo) == MAX_CACHED_PAGES
+    assert "k" not in cache._memo  # plus ancien évincé
+
+
+def test_detail_route_revalidates_with_etag(client):
+    url = "/api/v1/plants/plants/moringa-oleifera"
+    first = client.get(url)
+    etag = first.headers["etag"]
+
+    revalidated = client.get(url, headers={"If-None-Match": etag})
+    changed = client.get(url, headers={"If-None-Match": '"stale"'})
+
+    assert first.status_code == 200
+    assert "max-age" in first.headers["cache-control"]
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+    assert changed.status_code == 200
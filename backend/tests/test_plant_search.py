@@ -0,0 +1,73 @@
+"""Tests du moteur de recherche (index inversé + BM25)"""
+
+from app.services.plant_search import PlantSearchIndex, fold, tokenize
+
+RECORDS = [
+    {
+        "id": "moringa",
+        "scientific_name": "Moringa oleifera",
+        "common_names": ["Arbre de vie"],
+        "family": "Moringaceae",
+        "description": "Feuilles nutritives.",
+    },
+    {
+        "id": "neem",
+        "scientific_name": "Azadirachta indica",
+        "common_names": ["Neem", "Margousier"],
+        "family": "Meliaceae",
+        "description": "Utilisé contre la fièvre, souvent associé au moringa.",
+    },
+    {
+        "id": "papaya",
+        "scientific_name": "Carica papaya",
+        "common_names": ["Papayer"],
+        "family": "Caricaceae",
+        "description": "Fruit digestif, feuilles contre la fièvre.",
+    },
+]
+
+
+def test_fold_and_tokenize():
+    assert fold("Fièvre ÉLEVÉE") == "fievre elevee"
+    assert tokenize("Anti-fièvre, 2x/jour") == ["anti", "fievre", "2x", "jour"]
+
+
+def test_name_match_outranks_description_mention():
+    ids = [plant_id for plant_id, _ in PlantSearchIndex(RECORDS).search("moringa")]
+    assert ids == ["moringa", "neem"]
+
+
+def test_search_is_accent_and_case_insensitive():
+    index = PlantSearchIndex(RECORDS)
+    assert index.search("FIEVRE") == index.search("fièvre")
+    assert {plant_id for plant_id, _ in index.search("fièvre")} == {"neem", "papaya"}
+
+
+def test_prefix_expansion_scores_below_exact_term():
+    index = PlantSearchIndex(RECORDS)
+    prefix = dict(index.search("marg"))
+    exact = dict(index.search("margousier"))
+    assert list(prefix) == ["neem"]
+    assert 0 < prefix["neem"] < exact["neem"]
+
+
+def test_multi_term_query_accumulates_scores():
+    ranked = PlantSearchIndex(RECORDS).search("papayer fièvre")
+    assert ranked[0][0] == "papaya"
+    assert [score for _, score in ranked] == sorted((score for _, score in ranked), reverse=True)
+
+
+def test_limit_unknown_and_empty_queries():
+    index = PlantSearchIndex(RECORDS)
+    assert len(index.search("feuilles", limit=1)) == 1
+    assert index.search("baobab") == []
+    assert index.search("   ") == []
+
+
+def test_search_route_ranks_catalog(client):
+    response = client.get("/api/v1/plants/plants/search", params={"q": "moringa"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["data"][0]["id"] == "moringa-oleifera"
+    assert body["results_count"] == len(body["data"])
@@ -0,0 +1,66 @@
+"""Tests des agrégats du catalogue et des routes de statistiques"""
+
+from app.services.plant_stats import CatalogAggregates
+
+ARTEMISIA = {
+    "id": "artemisia",
+    "family": "Asteraceae",
+    "found_in": ["Bénin", "Togo", "Bénin"],
+    "traditional_uses": ["Paludisme", "Fièvre"],
+}
+PAPAYA = {
+    "id": "papaya",
+    "family": "Caricaceae",
+    "found_in": ["Bénin"],
+    "traditional_uses": ["Troubles digestifs"],
+}
+MORINGA = {
+    "id": "moringa",
+    "family": "Moringaceae",
+    "found_in": ["Togo", "Niger"],
+    "traditional_uses": ["Malnutrition", "Fièvre"],
+}
+
+
+def test_counts_each_country_once_per_plant():
+    aggregates = CatalogAggregates([ARTEMISIA, PAPAYA])
+
+    assert aggregates.total == 2
+    assert aggregates.countries["Bénin"] == 2
+    assert aggregates.top_countries(1) == [{"name": "Bénin", "count": 2}]
+
+
+def test_rankings_break_ties_alphabetically():
+    aggregates = CatalogAggregates([ARTEMISIA, PAPAYA, MORINGA])
+
+    families = [f["name"] for f in aggregates.top_families()]
+    assert families == ["Asteraceae", "Caricaceae", "Moringaceae"]
+    assert aggregates.top_uses(1) == [{"name": "Fièvre", "count": 2}]
+
+
+def test_updated_applies_delta_without_touching_previous():
+    before = CatalogAggregates([ARTEMISIA, PAPAYA])
+    after = before.updated(added=[MORINGA], removed=[PAPAYA])
+
+    assert after.total == 2
+    assert "Caricaceae" not in after.families
+    assert after.countries == {"Bénin": 1, "Togo": 2, "Niger": 1}
+    assert before.total == 2 and before.families["Caricaceae"] == 1
+
+    rebuilt = CatalogAggregates([ARTEMISIA, MORINGA])
+    assert after.families == rebuilt.families
+    assert after.uses == rebuilt.uses
+    assert after.top_uses() == rebuilt.top_uses()
+
+
+def test_stats_routes_match_catalog(client, catalog):
+    stats = client.get("/api/v1/plants/plants/stats/overview").json()["stats"]
+    assert stats["total_plants"] == len(catalog.records)
+    assert stats["families_count"] == len({p["family"] for p in catalog.records})
+
+    families = client.get("/api/v1/plants/plants/families").json()
+    assert families["count"] == len(families["families"])
+    assert sum(families["counts"].values()) == len(catalog.records)
+
+    countries = client.get("/api/v1/plants/plants/countries").json()
+    assert countries["countries"] == sorted(countries["counts"])
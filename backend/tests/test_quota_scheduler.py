@@ -0,0 +1,129 @@
+"""Tests de l'ordonnanceur de quota Gemini (mode local, un seul worker)"""
+
+from types import SimpleNamespace
+import asyncio
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.services.concurrency import GeminiOverloadedError
+from app.services.gemini_service import GeminiService
+from app.services.quota_scheduler import (
+    QuotaScheduler,
+    TokenBucket,
+    backoff_delay,
+    is_retryable,
+    retry_after_hint,
+)
+
+
+def test_token_bucket_wait_and_refill():
+    bucket = TokenBucket(per_minute=60, capacity=2)
+    bucket.take(2, now=bucket._updated)
+
+    assert bucket.wait_time(1, now=bucket._updated) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now=bucket._updated + 1) == 0.0
+    assert bucket.wait_time(5, now=bucket._updated + 10) == 0.0  # plafonné à la capacité
+
+
+def test_retry_policy_helpers():
+    assert is_retryable(google_exceptions.TooManyRequests("quota"))
+    assert is_retryable(asyncio.TimeoutError())
+    assert not is_retryable(google_exceptions.BadRequest("prompt invalide"))
+
+    assert retry_after_hint(RuntimeError("Please retry in 12.5s")) == 12.5
+    assert retry_after_hint(RuntimeError("retry_delay { seconds: 30 }")) == 30.0
+    assert retry_after_hint(RuntimeError("erreur")) is None
+
+    assert all(0 <= backoff_delay(attempt, cap=4) <= 4 for attempt in range(10))
+
+
+def test_scan_served_before_queued_chat():
+    async def scenario():
+        scheduler = QuotaScheduler(requests_per_minute=6, tokens_per_minute=10_000, max_wait=5)
+        await scheduler.acquire("chat", 10)  # rafale d'une seule requête consommée
+
+        chat = asyncio.create_task(scheduler.acquire("chat", 10))
+        await asyncio.sleep(0)
+        scan = asyncio.create_task(scheduler.acquire("scan", 10))
+        await asyncio.sleep(0)
+        assert scheduler.stats()["queue_depth"] == 2
+
+        scheduler.requests.level = 1.0  # une requête redevient disponible
+        scheduler._dispatch()
+        await asyncio.wait_for(scan, 1)
+        chat_waiting = not chat.done()
+        chat.cancel()
+        await asyncio.gather(chat, return_exceptions=True)
+        return chat_waiting
+
+    assert asyncio.run(scenario())
+
+
+def test_settle_refunds_unused_tokens():
+    async def scenario():
+        scheduler = QuotaScheduler(requests_per_minute=600, tokens_per_minute=100, max_wait=1)
+        await scheduler.acquire("scan", 80)
+        before = scheduler.tokens.level
+        scheduler.settle(reserved=80, actual=30)
+        return before, scheduler.tokens.level
+
+    before, after = asyncio.run(scenario())
+    assert before == pytest.approx(20, abs=1)
+    assert after == pytest.approx(70, abs=1)
+
+
+def test_penalize_blocks_and_rejects_with_hint():
+    async def scenario():
+        scheduler = QuotaScheduler(requests_per_minute=600, tokens_per_minute=10_000, max_wait=0.05)
+        scheduler.penalize(retry_after=5)
+        with pytest.raises(GeminiOverloadedError) as error:
+            await scheduler.acquire("chat", 10)
+        return scheduler.stats(), error.value.retry_after
+
+    stats, retry_after = asyncio.run(scenario())
+    assert retry_after == 5
+    assert stats["server_throttled"] == 1
+    assert stats["rejected"] == 1
+    assert 4 < stats["blocked_for_seconds"] <= 5
+
+
+class FakeModel:
+    """Modèle Gemini factice: échoue ou renvoie un usage donné"""
+
+    def __init__(self, error=None, total_tokens=None):
+        self.error = error
+        self.total_tokens = total_tokens
+
+    async def generate_content_async(self, contents, **kwargs):
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(
+            text="réponse",
+            usage_metadata=SimpleNamespace(
+                total_token_count=self.total_tokens,
+                prompt_token_count=None,
+                candidates_token_count=None,
+            ),
+        )
+
+
+@pytest.mark.parametrize("model, expected_cost", [
+    (FakeModel(error=google_exceptions.ServiceUnavailable("panne")), 0),
+    (FakeModel(error=asyncio.TimeoutError()), 0),
+    (FakeModel(total_tokens=120), 120),
+    (FakeModel(total_tokens=None), 500),  # usage inconnu: estimation conservée
+])
+def test_failed_calls_refund_their_token_reservation(model, expected_cost):
+    async def scenario():
+        service = GeminiService()
+        service._model = model
+        before = service.scheduler.tokens.level
+        try:
+            await service._generate("chat", "prompt", reserved_tokens=500)
+        except Exception:
+            pass
+        return before - service.scheduler.tokens.level
+
+    assert asyncio.run(scenario()) == pytest.approx(expected_cost, abs=1)
@@ -0,0 +1,61 @@
+"""Tests du middleware ID de requête + chronométrage + log d'accès"""
+
+import logging
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.logging_config import request_context
+from app.main import RequestContextMiddleware
+
+
+def context_client() -> TestClient:
+    application = FastAPI()
+
+    @application.get("/items/{item_id}")
+    async def item(item_id: str, request: Request):
+        return {"state_id": request.state.request_id, "context": request_context.get()}
+
+    @application.get("/stream")
+    async def stream():
+        async def lines():
+            for index in range(3):
+                yield f"{index}\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    application.add_middleware(RequestContextMiddleware)
+    return TestClient(application)
+
+
+def test_headers_match_request_state_and_log_context():
+    response = context_client().get("/items/neem")
+    body = response.json()
+
+    assert response.headers["x-request-id"] == body["state_id"]
+    assert float(response.headers["x-process-time"]) >= 0
+    assert body["context"] == {
+        "request_id": body["state_id"], "method": "GET", "path": "/items/neem",
+    }
+    assert request_context.get() == {}  # contexte rendu après la requête
+
+
+def test_ids_are_unique_and_streams_pass_through():
+    client = context_client()
+    first = client.get("/stream")
+    second = client.get("/stream")
+
+    assert first.text == "0\n1\n2\n"
+    assert first.headers["content-type"] == "application/x-ndjson"
+    assert first.headers["x-request-id"] != second.headers["x-request-id"]
+
+
+def test_access_log_carries_real_request_id(caplog):
+    with caplog.at_level(logging.INFO, logger="remedia.http"):
+        response = context_client().get("/missing")
+
+    records = [r for r in caplog.records if r.name == "remedia.http"]
+    assert len(records) == 1
+    assert response.headers["x-request-id"] in records[0].getMessage()
+    assert records[0].status == 404
+    assert records[0].sampleable is False
@@ -0,0 +1,94 @@
+"""Tests du cache des réponses Gemini (mémoire + SQLite)"""
+
+import asyncio
+
+from app.services import response_cache
+from app.services.response_cache import (
+    MemoryLRUCache,
+    ResponseCache,
+    SQLiteCache,
+    cache_key,
+    normalize_prompt,
+    sqlite_path,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_ignores_case_and_whitespace_only():
+    assert normalize_prompt("  Quelle   plante\tpour la FIÈVRE ?\n") == "quelle plante pour la fièvre ?"
+    assert cache_key("Fièvre  ", "gemini", 0.7) == cache_key("fièvre", "gemini", 0.7)
+    assert cache_key("fièvre", "gemini", 0.7) != cache_key("fièvre", "gemini", 0.2)
+    assert cache_key("fièvre", "gemini", 0.7) != cache_key("fièvre", "other", 0.7)
+
+
+def test_sqlite_path():
+    assert sqlite_path("sqlite:///./remedia.db") == "./remedia.db"
+    assert sqlite_path("postgresql://db/remedia") is None
+
+
+def test_memory_lru_evicts_oldest_and_expires(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+    cache = MemoryLRUCache(max_entries=2, ttl_seconds=60)
+
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "a" redevient le plus récent
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    clock.now += 61
+    assert cache.get("a") is None
+
+
+def test_disk_hit_is_promoted_to_memory(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.db"), max_entries=10, ttl_seconds=60)
+    disk.set("key", "réponse")
+    cache = ResponseCache(MemoryLRUCache(10, 60), disk)
+
+    async def scenario():
+        assert await cache.get("key") == "réponse"
+        assert await cache.get("key") == "réponse"
+        assert await cache.get("absent") is None
+
+    asyncio.run(scenario())
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == round(2 / 3, 4)
+
+
+def test_sqlite_trims_to_max_entries(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.db"), max_entries=2, ttl_seconds=60)
+    for index in range(4):
+        disk.set(f"k{index}", str(index))
+
+    count = disk._connect().execute("SELECT COUNT(*) FROM gemini_response_cache").fetchone()[0]
+    assert count == 2
+    assert disk.get("k3") == "3"
+
+
+def test_disk_failure_degrades_to_miss():
+    class BrokenDisk:
+        def get(self, key):
+            raise OSError("disque indisponible")
+
+        def set(self, key, value):
+            raise OSError("disque indisponible")
+
+    cache = ResponseCache(MemoryLRUCache(10, 60), BrokenDisk())
+
+    async def scenario():
+        assert await cache.get("key") is None
+        await cache.set("key", "valeur")
+        assert await cache.get("key") == "valeur"
+
+    asyncio.run(scenario())
+    assert cache.errors == 2
@@ -0,0 +1,76 @@
+"""Tests du hash perceptuel et du cache des scans"""
+
+import asyncio
+import io
+
+from PIL import Image, ImageDraw
+
+from app.services import scan_cache
+from app.services.image_preprocessing import dhash
+from app.services.scan_cache import ScanCache
+
+
+def leaf(color: str = "green") -> Image.Image:
+    image = Image.new("RGB", (400, 300), "white")
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((60, 40, 340, 260), fill=color)
+    draw.line((60, 150, 340, 150), fill="black", width=6)
+    return image
+
+
+def distance(first: int, second: int) -> int:
+    return (first ^ second).bit_count()
+
+
+def test_dhash_survives_recompression_and_resize():
+    original = leaf()
+    buffer = io.BytesIO()
+    original.resize((200, 150)).save(buffer, format="JPEG", quality=40)
+    with Image.open(buffer) as degraded:
+        assert distance(dhash(original), dhash(degraded)) <= 4
+
+    other = Image.linear_gradient("L").rotate(90).resize((400, 300))
+    assert distance(dhash(original), dhash(other)) > 16
+
+
+def test_lookup_returns_nearest_under_threshold():
+    cache = ScanCache(None, max_distance=4, ttl_seconds=3600, max_entries=10)
+
+    async def scenario():
+        await cache.store(0b1111_0000, '{"name": "Neem"}')
+        await cache.store(0b1111_0011, '{"name": "Moringa"}')
+
+    asyncio.run(scenario())
+    assert cache.lookup(0b1111_0001) == ('{"name": "Neem"}', 1)
+    assert cache.lookup(0b0000_1111) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_and_oldest_are_evicted(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(scan_cache.time, "time", lambda: now[0])
+    cache = ScanCache(None, max_distance=0, ttl_seconds=60, max_entries=2)
+
+    async def scenario():
+        for image_hash in (1, 2, 3):
+            await cache.store(image_hash, str(image_hash))
+            now[0] += 1
+
+    asyncio.run(scenario())
+    assert cache.lookup(1) is None  # évincé
+    assert cache.lookup(3) == ("3", 0)
+
+    now[0] += 60
+    assert cache.lookup(3) is None  # expiré
+
+
+def test_results_survive_restart_with_high_bit_hashes(tmp_path):
+    path = str(tmp_path / "scans.db")
+    image_hash = (1 << 63) | 0xBEEF
+
+    asyncio.run(ScanCache(path, max_distance=2, ttl_seconds=3600, max_entries=10).store(
+        image_hash, '{"name": "Kinkéliba"}'
+    ))
+    restarted = ScanCache(path, max_distance=2, ttl_seconds=3600, max_entries=10)
+
+    assert restarted.lookup(image_hash ^ 0b10) == ('{"name": "Kinkéliba"}', 1)
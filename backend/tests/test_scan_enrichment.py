@@ -0,0 +1,77 @@
+"""Tests du recoupement des identifications Gemini avec le catalogue"""
+
+import io
+import json
+
+import pytest
+from PIL import Image
+
+from app.api.v1 import scan
+from app.api.v1.scan import PlantIdentification, enrich_with_catalog
+
+
+def gemini_plant(scientific_name: str, **fields) -> PlantIdentification:
+    values = {
+        "name": "Plante",
+        "scientificName": scientific_name,
+        "confidence": 90.0,
+        "description": "Identifiée par Gemini",
+        "properties": [],
+        "uses": [],
+        **fields,
+    }
+    return PlantIdentification(**values)
+
+
+@pytest.mark.parametrize("scientific_name", ["Moringa oleifera", "Moringa oleifera Lam.", "ARTEMISIA ANNUA"])
+def test_enrich_matches_scientific_name(catalog, scientific_name):
+    # Binôme genre + espèce (Gemini ajoute parfois l'auteur)
+    record = catalog.get(" ".join(scientific_name.split()[:2]))
+
+    plant = enrich_with_catalog(gemini_plant(scientific_name))
+
+    assert plant.catalogId == record.id
+    assert plant.warnings == list(record.warnings)
+    assert plant.properties == list(record.medicinal_properties)
+    assert plant.family == record.family
+
+
+def test_enrich_every_catalog_species(catalog):
+    for record in catalog.plants:
+        plant = enrich_with_catalog(gemini_plant(record.scientific_name))
+        assert plant.catalogId == record.id, record.scientific_name
+
+
+def test_enrich_keeps_gemini_fields(catalog):
+    plant = enrich_with_catalog(gemini_plant("Moringa oleifera", family="Moringacées", properties=["Nutritif"]))
+
+    assert plant.family == "Moringacées"
+    assert plant.properties == ["Nutritif"]
+    assert plant.warnings == list(catalog.get("moringa-oleifera").warnings)
+
+
+def test_enrich_unknown_species_unchanged():
+    plant = gemini_plant("Plantago inexistens")
+    assert enrich_with_catalog(plant) is plant
+
+
+def test_identify_route_enriches_gemini_result(client, catalog, monkeypatch):
+    async def fake_identify_plant(image_data, mime_type, response_schema):
+        return json.dumps(gemini_plant("Moringa oleifera").model_dump())
+
+    monkeypatch.setattr(scan.settings, "gemini_api_key", "test-key")
+    monkeypatch.setattr(scan, "scan_cache", None)
+    monkeypatch.setattr(scan, "local_classifier", None)
+    monkeypatch.setattr(scan.gemini_service, "identify_plant", fake_identify_plant)
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (40, 140, 60)).save(buffer, format="JPEG")
+    response = client.post(
+        "/api/v1/scan/identify",
+        files={"file": ("leaf.jpg", buffer.getvalue(), "image/jpeg")},
+    )
+
+    assert response.status_code == 200
+    plant = response.json()["plant"]
+    assert plant["catalogId"] == "moringa-oleifera"
+    assert plant["warnings"] == list(catalog.get("moringa-oleifera").warnings)
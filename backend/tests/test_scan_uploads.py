@@ -0,0 +1,93 @@
+"""Tests de lecture des uploads d'images (validation, plafond, batch NDJSON)"""
+
+import asyncio
+import io
+import json
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from app.api.v1 import scan
+from app.api.v1.scan import UPLOAD_CHUNK_SIZE, SpooledUpload, read_image_upload
+
+
+def jpeg_bytes(size=(32, 32)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 180, 40)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def upload(data: bytes, filename: str = "leaf.jpg") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+def test_read_image_upload_sniffs_content():
+    image = asyncio.run(read_image_upload(upload(jpeg_bytes(), "photo.png")))
+    assert image.mime_type == "image/jpeg"
+    assert image.filename == "photo.png"
+
+
+def test_read_image_upload_rejects_non_image():
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_image_upload(upload(b"%PDF-1.7 not an image")))
+    assert error.value.status_code == 415
+
+
+def test_read_image_upload_caps_size(monkeypatch):
+    monkeypatch.setattr(scan.settings, "max_upload_size", UPLOAD_CHUNK_SIZE + 10)
+    data = jpeg_bytes() + b"\0" * (2 * UPLOAD_CHUNK_SIZE)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_image_upload(upload(data)))
+    assert error.value.status_code == 413
+
+
+def test_spooled_upload_goes_to_disk_beyond_chunk_size():
+    data = jpeg_bytes() + b"\0" * (3 * UPLOAD_CHUNK_SIZE)
+
+    async def scenario():
+        spooled = await SpooledUpload.spool(upload(data))
+        rolled = spooled.file._rolled
+        image = await spooled.load()
+        return rolled, image, spooled.file.closed
+
+    rolled, image, closed = asyncio.run(scenario())
+    assert rolled
+    assert image.data == data
+    assert closed
+
+
+def test_spooled_upload_keeps_validation_error():
+    async def scenario():
+        spooled = await SpooledUpload.spool(upload(b"GIF89a..."))
+        with pytest.raises(HTTPException) as error:
+            await spooled.load()
+        return error.value.status_code
+
+    assert asyncio.run(scenario()) == 415
+
+
+def test_batch_stream_returns_one_line_per_file(client, monkeypatch):
+    monkeypatch.setattr(scan.settings, "gemini_api_key", "")  # mode démo, sans appel amont
+    files = [
+        ("files", ("a.jpg", jpeg_bytes(), "image/jpeg")),
+        ("files", ("notes.txt", b"hello", "text/plain")),
+        ("files", ("b.jpg", jpeg_bytes((64, 48)), "image/jpeg")),
+    ]
+
+    response = client.post("/api/v1/scan/batch/stream", files=files)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+    assert [line["filename"] for line in lines] == ["a.jpg", "notes.txt", "b.jpg"]
+    assert [line["result"]["success"] for line in lines] == [True, False, True]
+    assert "image" in lines[1]["result"]["error"]
+
+
+def test_batch_rejects_too_many_files(client, monkeypatch):
+    monkeypatch.setattr(scan.settings, "scan_batch_max_files", 1)
+    files = [("files", (f"{i}.jpg", jpeg_bytes(), "image/jpeg")) for i in range(2)]
+
+    assert client.post("/api/v1/scan/batch", files=files).status_code == 400
+    assert client.post("/api/v1/scan/batch/stream", files=files).status_code == 400
@@ -0,0 +1,199 @@
+"""Tests du cache sémantique: garde-fous médicaux, filtres et seuil"""
+
+import asyncio
+import math
+
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+from chromadb.api.types import EmbeddingFunction
+
+from app.services import semantic_cache as semantic
+from app.services.semantic_cache import SemanticAnswerCache, safety_signature
+
+THRESHOLD = 0.92
+
+
+@pytest.mark.parametrize("question, signature", [
+    ("Tisane pour le paludisme", ""),
+    ("Quelle tisane contre le palu pour un enfant ?", "enfant"),
+    ("Quelle tisane contre le palu pour une femme enceinte ?", "femme;grossesse"),
+    ("2 tasses par jour pour un bébé", "2tasse;nourrisson"),
+    ("deux tasses par jour pour un bébé", "2tasse;nourrisson"),
+    ("500 mg de moringa", "500mg"),
+    ("1,5 g de neem", "1.5g"),
+    ("Neem et anticoagulants ?", "traitement"),
+    ("Je suis enceinte, quelle tisane ?", "grossesse"),
+    ("Moringa pour un asthmatique", "asthme"),
+    ("Plante contre l'épilepsie", "epilepsie"),
+    ("Tisane pour le cœur", "coeur"),
+    ("Tisane sans sucre contre la toux", ""),
+])
+def test_safety_signature(question, signature):
+    assert safety_signature(question) == signature
+
+
+@pytest.mark.parametrize("question", [
+    "Tisane contre le palu pour ma fille",
+    "Tisane contre le palu pour mon mari",
+    "Quelle dose de neem pour ma petite fille ?",
+    "Ma grand-mère a de la tension, quelle plante ?",
+    "Je ne suis pas enceinte, quelle tisane ?",
+    "Je n'ai pas de diabète",
+    "Ne pas dépasser 2 tasses ?",
+])
+def test_third_party_or_negated_questions_are_never_shared(question):
+    assert safety_signature(question) is None
+
+
+class TopicEmbedding(EmbeddingFunction):
+    """Pire cas: ignore public et quantités (questions ne différant que par eux = similarité 1)"""
+
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            vector = [0.0] * 32
+            for token in text.split():
+                if not safety_signature(token) and not token[0].isdigit():
+                    vector[sum(map(ord, token)) % 32] += 1.0
+            vectors.append(vector if any(vector) else [1.0] + [0.0] * 31)
+        return vectors
+
+
+class AngleEmbedding(EmbeddingFunction):
+    """Vecteurs 2D choisis: cos(angle) = similarité avec la question de référence"""
+
+    def __init__(self, similarities):
+        self.similarities = similarities
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            angle = math.acos(self.similarities.get(text, 1.0))
+            vectors.append([math.cos(angle), math.sin(angle)])
+        return vectors
+
+
+def make_cache(tmp_path, embedding_function, name="answers"):
+    cache = SemanticAnswerCache(
+        persist_directory=str(tmp_path / "chroma"),
+        collection_name=name,
+        threshold=THRESHOLD,
+        ttl_seconds=3600,
+        max_entries=100,
+        embedding_function=embedding_function,
+    )
+    cache._init()
+    assert cache.ready
+    return cache
+
+
+def test_population_and_dosage_never_share_answers(tmp_path):
+    cache = make_cache(tmp_path, TopicEmbedding())
+    asyncio.run(cache.store("chat", "Quelle tisane de moringa pour un enfant ?", "réponse enfant"))
+    asyncio.run(cache.store("chat", "Combien de 2 tasses de moringa par jour ?", "réponse 2 tasses"))
+
+    assert asyncio.run(cache.lookup("chat", "Quelle tisane de moringa pour un enfant ?"))[0] == "réponse enfant"
+    assert asyncio.run(cache.lookup("chat", "quelle tisane de moringa pour un enfant")) is not None
+    for question in (
+        "Quelle tisane de moringa pour une femme enceinte ?",
+        "Quelle tisane de moringa pour un bébé ?",
+        "Quelle tisane de moringa ?",
+        "Combien de 3 tasses de moringa par jour ?",
+        "Combien de 2 tasses de moringa par jour pour un enfant ?",
+    ):
+        assert asyncio.run(cache.lookup("chat", question)) is None, question
+
+
+def test_uncertain_questions_bypass_cache(tmp_path):
+    cache = make_cache(tmp_path, TopicEmbedding())
+    asyncio.run(cache.store("chat", "Tisane contre le palu", "réponse adulte"))
+    asyncio.run(cache.store("chat", "Tisane contre le palu pour ma fille", "réponse fille"))
+
+    assert cache._collection.count() == 1
+    for question in (
+        "Tisane contre le palu pour ma fille",
+        "Tisane contre le palu pour mon mari",
+        "Je ne suis pas enceinte : tisane contre le palu",
+    ):
+        assert asyncio.run(cache.lookup("chat", question)) is None, question
+    assert cache.stats()["bypassed"] == 3
+    assert asyncio.run(cache.lookup("chat", "Tisane contre le palu"))[0] == "réponse adulte"
+
+
+def test_disabled_by_default():
+    assert type(semantic.settings).model_fields["semantic_cache_enabled"].default is False
+
+
+def test_answers_are_scoped_to_gemini_model_and_kind(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, TopicEmbedding())
+    monkeypatch.setattr(semantic.settings, "gemini_model", "model-a")
+    asyncio.run(cache.store("chat", "Plante contre la toux", "réponse"))
+
+    assert asyncio.run(cache.lookup("chat", "Plante contre la toux")) is not None
+    assert asyncio.run(cache.lookup("quick_advice", "Plante contre la toux")) is None
+    monkeypatch.setattr(semantic.settings, "gemini_model", "model-b")
+    assert asyncio.run(cache.lookup("chat", "Plante contre la toux")) is None
+
+
+@pytest.mark.parametrize("similarity, hit", [
+    (0.999, True),
+    (THRESHOLD + 0.002, True),
+    (THRESHOLD - 0.002, False),
+    (0.80, False),
+])
+def test_threshold_near_cutoff(tmp_path, similarity, hit):
+    cache = make_cache(tmp_path, AngleEmbedding({"question proche": similarity}))
+    asyncio.run(cache.store("chat", "question de référence", "réponse"))
+
+    result = asyncio.run(cache.lookup("chat", "question proche"))
+
+    assert (result is not None) == hit
+    if hit:
+        assert result[1] == pytest.approx(similarity, abs=1e-3)
+
+
+def test_embedding_model_change_resets_collection(tmp_path):
+    cache = make_cache(tmp_path, TopicEmbedding())
+    asyncio.run(cache.store("chat", "Plante contre la toux", "réponse"))
+
+    reopened = make_cache(tmp_path, AngleEmbedding({}))
+
+    assert reopened._collection.count() == 0
+
+
+# Questions françaises: reformulations à servir / questions distinctes à ne
+# jamais confondre (calibrage du seuil avec le vrai modèle multilingue)
+PARAPHRASES = [
+    ("Quelle plante contre le paludisme ?", "Quelle plante pour soigner le paludisme ?"),
+    ("Comment préparer une tisane de citronnelle ?", "Comment faire une tisane de citronnelle ?"),
+]
+DISTINCT = [
+    ("Quelle plante contre le paludisme ?", "Quelle plante contre la toux ?"),
+    ("Comment préparer une tisane de citronnelle ?", "Comment préparer une tisane de gingembre ?"),
+    ("Le neem est-il toxique ?", "Le neem est-il efficace ?"),
+]
+
+
+def test_multilingual_model_threshold_calibration():
+    pytest.importorskip("sentence_transformers")
+    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+
+    try:
+        embed = SentenceTransformerEmbeddingFunction(model_name=semantic.settings.semantic_cache_embedding_model)
+        embed(["warmup"])
+    except Exception as e:  # modèle non téléchargeable (hors ligne)
+        pytest.skip(f"embedding model unavailable: {e}")
+
+    def similarity(a, b):
+        va, vb = embed([a, b])
+        dot = sum(x * y for x, y in zip(va, vb))
+        return dot / (math.hypot(*va) * math.hypot(*vb))
+
+    for a, b in DISTINCT:
+        assert similarity(a, b) < semantic.settings.semantic_cache_threshold, (a, b)
+    for a, b in PARAPHRASES:
+        assert similarity(a, b) >= semantic.settings.semantic_cache_threshold, (a, b)
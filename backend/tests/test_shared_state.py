@@ -0,0 +1,156 @@
+"""Tests de l'état partagé multi-workers (quota, disjoncteur, cache de scans)"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.quota_scheduler import QuotaScheduler
+from app.services.scan_cache import ScanCache
+from app.services.shared_state import BucketClaim, SharedState
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "shared.db")
+
+
+def rpm_tpm(requests, tokens, rpm_capacity=2.0, tpm_capacity=100.0, rate=0.0):
+    return (
+        BucketClaim("rpm", rpm_capacity, rate, requests),
+        BucketClaim("tpm", tpm_capacity, rate, tokens),
+    )
+
+
+def test_claim_is_all_or_nothing(path):
+    state = SharedState(path)
+
+    assert state.claim_buckets(rpm_tpm(1, 60)) == (0.0, [1.0, 40.0])
+    wait, levels = state.claim_buckets(rpm_tpm(1, 60))  # TPM insuffisant
+    assert wait > 0
+    assert levels == [1.0, 40.0]  # requête non prélevée non plus
+
+
+def test_claim_applies_adjustments_and_drain(path):
+    state = SharedState(path)
+    state.claim_buckets(rpm_tpm(1, 60))
+
+    refund = (BucketClaim("rpm", 2.0, 0.0, 0, drain=True), BucketClaim("tpm", 100.0, 0.0, 0, -50))
+    assert state.claim_buckets(refund) == (0.0, [0.0, 90.0])
+
+
+def test_concurrent_workers_never_overdraw(path):
+    SharedState(path)
+    granted = []
+
+    def worker():
+        state = SharedState(path)  # une connexion par "worker"
+        for _ in range(10):
+            wait, _ = state.claim_buckets((BucketClaim("rpm", 25.0, 0.0, 1),))
+            if wait == 0:
+                granted.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(granted) == 25
+
+
+def test_reset_clears_state(path):
+    state = SharedState(path)
+    state.set("breaker:gemini:opened_at", "123")
+    state.claim_buckets(rpm_tpm(1, 10))
+
+    state.reset()
+
+    assert state.get("breaker:gemini:opened_at") is None
+    assert state.get("started_at") is not None
+    assert state.claim_buckets(rpm_tpm(0, 0))[1] == [2.0, 100.0]
+
+
+class LoopGuard:
+    """Enregistre le thread de chaque transaction (jamais celui de l'event loop)"""
+
+    def __init__(self, state):
+        self.threads = set()
+        for name in ("claim_buckets", "get", "set"):
+            original = getattr(state, name)
+
+            def wrapper(*args, _original=original):
+                self.threads.add(threading.current_thread().name)
+                return _original(*args)
+
+            setattr(state, name, wrapper)
+
+
+def test_shared_scheduler_shares_budget_off_the_event_loop(path):
+    async def scenario():
+        first, second = SharedState(path), SharedState(path)
+        guards = [LoopGuard(first), LoopGuard(second)]
+        # Rafale de 1 requête (6 RPM x 10 s), sans remplissage sensible
+        schedulers = [
+            QuotaScheduler(requests_per_minute=6, tokens_per_minute=10_000, max_wait=0.3, shared=state)
+            for state in (first, second)
+        ]
+        results = await asyncio.gather(
+            *(scheduler.acquire("chat", 10) for scheduler in schedulers), return_exceptions=True
+        )
+        return guards, schedulers, results
+
+    guards, schedulers, results = asyncio.run(scenario())
+    assert sum(result is None for result in results) == 1
+    assert sum(scheduler.granted for scheduler in schedulers) == 1
+    assert all(guard.threads and threading.main_thread().name not in guard.threads for guard in guards)
+
+
+def test_shared_scheduler_reports_settled_tokens(path):
+    async def scenario():
+        state = SharedState(path)
+        scheduler = QuotaScheduler(requests_per_minute=60, tokens_per_minute=1000, max_wait=1, shared=state)
+        await scheduler.acquire("scan", 800)
+        scheduler.settle(reserved=800, actual=100)
+        while scheduler._claim is not None:
+            await asyncio.sleep(0.01)
+        return state.claim_buckets((BucketClaim("gemini_tpm", 1000, 0, 0),))[1][0]
+
+    assert asyncio.run(scenario()) == pytest.approx(900, abs=1)
+
+
+def test_breaker_adopts_open_from_other_worker_without_blocking(path):
+    async def scenario():
+        first, second = SharedState(path), SharedState(path)
+        guard = LoopGuard(second)
+        opener = CircuitBreaker("gemini", failure_threshold=1, recovery_seconds=30, shared=first)
+        follower = CircuitBreaker("gemini", failure_threshold=1, recovery_seconds=30, shared=second)
+
+        follower.check()  # lecture lancée en arrière-plan
+        await follower._sync_task
+        opener.record_failure()
+        await asyncio.sleep(0.05)  # publication
+        follower.check()  # dernière valeur lue, relecture pas encore due
+        follower._next_sync = 0.0
+        follower.check()
+        await asyncio.sleep(0.05)  # relecture
+        with pytest.raises(CircuitOpenError):
+            follower.check()
+        return guard
+
+    guard = asyncio.run(scenario())
+    assert threading.main_thread().name not in guard.threads
+
+
+def test_scan_cache_pulls_other_workers_results(path):
+    async def scenario():
+        writer = ScanCache(path, max_distance=4, ttl_seconds=3600, max_entries=100, pull_interval=0.01)
+        reader = ScanCache(path, max_distance=4, ttl_seconds=3600, max_entries=100, pull_interval=0.01)
+        await writer.store(0xABCDEF, '{"name": "Neem"}')
+
+        assert reader.lookup(0xABCDEF) is None  # relecture lancée, pas attendue
+        await asyncio.sleep(0.05)
+        return reader.lookup(0xABCDEE)
+
+    assert asyncio.run(scenario()) == ('{"name": "Neem"}', 1)
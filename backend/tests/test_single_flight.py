@@ -0,0 +1,192 @@
+"""Tests de la coalescence des appels Gemini identiques (single-flight)"""
+
+import asyncio
+
+import pytest
+
+from app.services.gemini_service import GeminiService, flight_key
+from app.services.single_flight import SingleFlight, StreamCancelledError, _Broadcast
+
+
+def test_do_coalesces_concurrent_calls():
+    async def scenario():
+        flights = SingleFlight()
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "réponse"
+
+        results = await asyncio.gather(*(flights.do("k", call) for _ in range(5)))
+        return flights, calls, results
+
+    flights, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["réponse"] * 5
+    assert (flights.leaders, flights.coalesced) == (1, 4)
+
+
+def test_do_shares_errors_and_forgets_key():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise RuntimeError("amont")
+
+        results = await asyncio.gather(
+            flights.do("k", failing), flights.do("k", failing), return_exceptions=True
+        )
+        return flights, results
+
+    flights, results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flights._calls == {}
+
+
+def test_stream_broadcast_replays_chunks_to_late_subscriber():
+    async def scenario():
+        flights = SingleFlight()
+        opened = 0
+        release = asyncio.Event()
+
+        async def source():
+            nonlocal opened
+            opened += 1
+            yield "a"
+            yield "b"
+            await release.wait()
+            yield "c"
+
+        async def consume(delay):
+            await asyncio.sleep(delay)
+            return [chunk async for chunk in flights.stream("k", source)]
+
+        first = asyncio.ensure_future(consume(0))
+        late = asyncio.ensure_future(consume(0.01))
+        await asyncio.sleep(0.02)
+        release.set()
+        return opened, await first, await late
+
+    opened, first, late = asyncio.run(scenario())
+    assert opened == 1
+    assert first == late == ["a", "b", "c"]
+
+
+def test_stream_cancelled_when_last_subscriber_leaves():
+    async def scenario():
+        flights = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def source():
+            try:
+                yield "a"
+                await asyncio.sleep(10)
+                yield "b"
+            finally:
+                cancelled.set()
+
+        stream = flights.stream("k", source)
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return True
+
+    assert asyncio.run(scenario())
+
+
+def test_stream_joined_while_cancelling_restarts_upstream():
+    async def scenario():
+        flights = SingleFlight()
+        opened = 0
+
+        async def source():
+            nonlocal opened
+            opened += 1
+            for index in range(3):
+                yield f"c{index}"
+                await asyncio.sleep(0.01)
+
+        first = flights.stream("k", source)
+        assert await first.__anext__() == "c0"
+        await first.aclose()  # annulation demandée, `_pump` pas encore terminé
+        late = [chunk async for chunk in flights.stream("k", source)]
+        return opened, late
+
+    opened, late = asyncio.run(scenario())
+    assert opened == 2
+    assert late == ["c0", "c1", "c2"]
+
+
+def test_cancelled_broadcast_fails_subscribers():
+    async def scenario():
+        async def source():
+            yield "a"
+            await asyncio.sleep(10)
+
+        started = _Broadcast(source())
+        subscription = started.subscribe()
+        assert await subscription.__anext__() == "a"
+        started.task.cancel()
+        with pytest.raises(StreamCancelledError):
+            await subscription.__anext__()
+
+        never_started = _Broadcast(source())
+        never_started.task.cancel()
+        await asyncio.sleep(0)
+        with pytest.raises(StreamCancelledError):
+            await asyncio.wait_for(never_started.subscribe().__anext__(), 1)
+        return never_started.done
+
+    assert asyncio.run(scenario())
+
+
+def test_flight_key_separates_endpoint_and_cache_policy():
+    keys = {
+        flight_key("prompt", "chat", True),
+        flight_key("prompt", "chat", False),
+        flight_key("prompt", "health", False),
+        flight_key("prompt", "quick_advice", True),
+    }
+    assert len(keys) == 4
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = GeminiService()
+    service._configured = True
+    service.cache = None
+    calls = []
+
+    async def fake_generate_chat(full_prompt, key, endpoint, max_retries):
+        calls.append((endpoint, key))
+        await asyncio.sleep(0.01)
+        return f"réponse {endpoint}"
+
+    monkeypatch.setattr(service, "_generate_chat", fake_generate_chat)
+    service.calls = calls
+    return service
+
+
+def test_chat_medical_does_not_coalesce_uncached_probe_with_chat(service):
+    async def scenario():
+        return await asyncio.gather(
+            service.chat_medical("Bonjour"),
+            service.chat_medical("Bonjour", use_cache=False, endpoint="health"),
+        )
+
+    results = asyncio.run(scenario())
+    assert results == ["réponse chat", "réponse health"]
+    assert sorted(endpoint for endpoint, _ in service.calls) == ["chat", "health"]
+    # Le chat (meneur de son propre vol) garde sa clé de cache
+    assert [key is not None for endpoint, key in service.calls if endpoint == "chat"] == [True]
+
+
+def test_chat_medical_coalesces_identical_chats(service):
+    async def scenario():
+        return await asyncio.gather(*(service.chat_medical("Bonjour") for _ in range(3)))
+
+    assert asyncio.run(scenario()) == ["réponse chat"] * 3
+    assert len(service.calls) == 1
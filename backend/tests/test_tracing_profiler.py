@@ -0,0 +1,147 @@
+"""Tests du traçage (spans OTLP), du profileur et des routes admin"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.services import tracing
+from app.services.profiler import sample_stacks
+from app.services.tracing import STATUS_ERROR, Tracer, traced
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    enabled = Tracer("remedia-test", enabled=True, buffer_size=100, export=True)
+    monkeypatch.setattr(tracing, "tracer", enabled)
+    return enabled
+
+
+def test_spans_nest_across_async_calls(tracer):
+    @traced("plants.search")
+    def search():
+        return "ok"
+
+    @traced("gemini.chat")
+    async def chat():
+        await asyncio.sleep(0)
+        return search()
+
+    async def request():
+        with tracer.span("POST /chat", kind=tracing.SPAN_KIND_SERVER):
+            return await asyncio.gather(chat(), chat())
+
+    asyncio.run(request())
+
+    root = tracer.recent[-1]
+    children = [span for span in tracer.recent if span.parent_id == root.span_id]
+    leaves = [span for span in tracer.recent if span.name == "plants.search"]
+    assert [span.name for span in children] == ["gemini.chat", "gemini.chat"]
+    assert {leaf.parent_id for leaf in leaves} == {child.span_id for child in children}
+    assert {span.trace_id for span in tracer.recent} == {root.trace_id}
+    assert all(span.end_ns >= span.start_ns for span in tracer.recent)
+
+
+def test_error_status_and_disabled_tracer(tracer):
+    with pytest.raises(ValueError):
+        with tracer.span("scan.identify"):
+            raise ValueError("image illisible")
+    assert tracer.recent[-1].status == STATUS_ERROR
+    assert tracer.recent[-1].status_message == "ValueError: image illisible"
+
+    disabled = Tracer("remedia-test", enabled=False, buffer_size=10, export=False)
+    with disabled.span("ignored") as span:
+        span.set_attribute("k", "v")
+    assert not disabled.recent
+
+
+def test_otlp_payload_encodes_typed_attributes(tracer):
+    with tracer.span("parent", flag=True, count=3, ratio=0.5, label="neem"):
+        with tracer.span("child"):
+            pass
+
+    payload = tracer.otlp_payload(list(tracer.recent))
+    spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    child, parent = spans
+    assert child["parentSpanId"] == parent["spanId"]
+    assert "parentSpanId" not in parent
+    assert [attribute["value"] for attribute in parent["attributes"]] == [
+        {"boolValue": True}, {"intValue": "3"}, {"doubleValue": 0.5}, {"stringValue": "neem"},
+    ]
+
+
+def test_export_batch_drains_queue_and_counts_errors(tracer):
+    class FakeClient:
+        def __init__(self, fail):
+            self.fail = fail
+            self.payloads = []
+
+        async def post(self, endpoint, json):
+            if self.fail:
+                raise ConnectionError("collecteur absent")
+            self.payloads.append(json)
+            return self
+
+        def raise_for_status(self):
+            pass
+
+    with tracer.span("a"):
+        pass
+    client = FakeClient(fail=False)
+    asyncio.run(tracer._export_batch(client, "http://collector/v1/traces"))
+    assert tracer.exported == 1 and len(client.payloads) == 1
+
+    with tracer.span("b"):
+        pass
+    asyncio.run(tracer._export_batch(FakeClient(fail=True), "http://collector/v1/traces"))
+    assert tracer.export_errors == 1
+    assert not tracer._export_queue
+
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks_folds_busy_and_skips_idle_threads():
+    stop = threading.Event()
+    busy = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+    idle = threading.Thread(target=stop.wait, name="idle-worker")
+    busy.start()
+    idle.start()
+    try:
+        folded, summary = sample_stacks(0.1, 0.005, mode="cpu")
+    finally:
+        stop.set()
+        busy.join()
+        idle.join()
+
+    lines = folded.strip().splitlines()
+    assert any(line.startswith("busy-worker;") and "busy_loop" in line for line in lines)
+    assert not any(line.startswith("idle-worker;") for line in lines)
+    assert summary["samples"] > 0
+    assert summary["idle_samples_skipped"] > 0
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_admin_routes_hidden_then_token_protected(client, monkeypatch):
+    url = "/api/v1/admin/traces"
+    monkeypatch.setattr(settings, "admin_token", "")
+    assert client.get(url).status_code == 404
+
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    assert client.get(url).status_code == 401
+    assert client.get(url, headers={"X-Admin-Token": "mauvais"}).status_code == 401
+
+    response = client.get(url, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert "resourceSpans" in response.json()
+
+    profile = client.get(
+        "/api/v1/admin/profile",
+        params={"seconds": 0.05, "interval_ms": 5},
+        headers={"X-Admin-Token": "secret"},
+    )
+    assert profile.status_code == 200
+    assert int(profile.headers["x-profile-samples"]) > 0
@@ -0,0 +1,65 @@
+"""Tests du plafond de taille des uploads (UploadLimitMiddleware)"""
+
+from fastapi import FastAPI, File, Request, UploadFile
+from fastapi.testclient import TestClient
+
+from app.main import MULTIPART_OVERHEAD, UploadLimitMiddleware, settings
+
+LIMIT = 1024
+
+
+def limited_client() -> TestClient:
+    application = FastAPI()
+
+    @application.post("/upload/raw")
+    async def raw(request: Request):
+        return {"size": len(await request.body())}
+
+    @application.post("/upload/form")
+    async def form(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    @application.post("/other")
+    async def other(request: Request):
+        return {"size": len(await request.body())}
+
+    application.add_middleware(UploadLimitMiddleware, limits={"/upload": LIMIT})
+    return TestClient(application)
+
+
+def chunks(total: int, size: int = 256):
+    for start in range(0, total, size):
+        yield b"x" * min(size, total - start)
+
+
+def test_content_length_over_limit_rejected_upfront():
+    response = limited_client().post("/upload/raw", content=b"x" * (LIMIT + 1))
+
+    assert response.status_code == 413
+    assert "max" in response.json()["detail"]
+
+
+def test_chunked_body_counted_while_streaming():
+    client = limited_client()
+
+    assert client.post("/upload/raw", content=chunks(LIMIT)).json() == {"size": LIMIT}
+    assert client.post("/upload/raw", content=chunks(LIMIT * 4)).status_code == 413
+
+
+def test_multipart_over_limit_rejected():
+    client = limited_client()
+    files = {"file": ("leaf.jpg", b"x" * (LIMIT * 2), "image/jpeg")}
+
+    assert client.post("/upload/form", files=files).status_code == 413
+    assert client.post("/other", content=b"x" * (LIMIT * 2)).json() == {"size": LIMIT * 2}
+
+
+def test_scan_route_rejects_oversized_upload(client):
+    size = settings.max_upload_size + MULTIPART_OVERHEAD + 1
+    response = client.post(
+        "/api/v1/scan/identify",
+        content=b"x" * size,
+        headers={"content-type": "multipart/form-data; boundary=x"},
+    )
+
+    assert response.status_code == 413
@@ -3,15 +3,19 @@
 /**
  * 🌿 Plants Page - Encyclopédie Plantes Médicinales
  * 
- * Fix: Charge plantes par défaut immédiatement si API échoue
+ * Filtres (facettes) et pagination par curseur côté serveur via
+ * plantsAPI.getAll ; les plantes par défaut restent le repli hors ligne.
  * 
- * @version 2.2.0 - Fallback fix
+ * @version 2.3.0 - Facettes serveur
  */
 
-import { useState, useEffect, useMemo } from 'react'
+import { useState, useEffect, useMemo, useCallback } from 'react'
 import { Search, Filter, Leaf, Loader2 } from 'lucide-react'
 import PlantCard from '@/components/plants/PlantCard'
 import { getPlantImagePath } from '@/lib/plant-images'
+import { plantsAPI, type FacetCount, type Plant as ApiPlant } from '@/lib/api'
+
+const PAGE_SIZE = 24
 
 interface Plant {
   id: string
@@ -90,57 +94,106 @@ const DEFAULT_PLANTS: Plant[] = [
   }
 ]
 
+// Propriétés proposées hors ligne (sans facettes serveur)
+const DEFAULT_PROPERTY_OPTIONS = [
+  { value: 'antibactérien', label: 'Antibactérien' },
+  { value: 'antiviral', label: 'Antiviral' },
+  { value: 'anti-inflammatoire', label: 'Anti-inflammatoire' },
+  { value: 'antioxydant', label: 'Antioxydant' },
+  { value: 'digestif', label: 'Digestif' },
+  { value: 'immunité', label: 'Immunité' },
+  { value: 'détoxifiant', label: 'Détoxifiant' },
+]
+
+// Adapte une plante de l'API au format attendu par PlantCard
+function toCardPlant(plant: ApiPlant): Plant {
+  return {
+    id: plant.id,
+    name: plant.common_names?.[0] || plant.scientific_name,
+    scientificName: plant.scientific_name,
+    description: plant.description,
+    properties: plant.medicinal_properties,
+    uses: plant.traditional_uses,
+  }
+}
+
 export default function PlantsPage() {
   // Initialiser avec plantes par défaut (pas vide!)
   const [plants, setPlants] = useState<Plant[]>(DEFAULT_PLANTS)
   const [loading, setLoading] = useState(false) // false car on a déjà les plantes
+  const [loadingMore, setLoadingMore] = useState(false)
   const [searchQuery, setSearchQuery] = useState('')
   const [selectedFilter, setSelectedFilter] = useState<string>('all')
+  const [selectedFamily, setSelectedFamily] = useState<string>('all')
+  // null tant que l'API n'a pas répondu : filtrage local des plantes par défaut
+  const [propertyFacets, setPropertyFacets] = useState<FacetCount[] | null>(null)
+  const [familyFacets, setFamilyFacets] = useState<FacetCount[]>([])
+  const [total, setTotal] = useState<number | null>(null)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+
+  const apiAvailable = propertyFacets !== null
 
-  // Essayer de charger depuis API (optionnel)
+  const buildFilters = useCallback(() => ({
+    property: selectedFilter !== 'all' ? [selectedFilter] : undefined,
+    family: selectedFamily !== 'all' ? [selectedFamily] : undefined,
+  }), [selectedFilter, selectedFamily])
+
+  // Première page : rechargée à chaque changement de facette
   useEffect(() => {
-    loadPlantsFromAPI()
-  }, [])
+    let cancelled = false
 
-  const loadPlantsFromAPI = async () => {
-    // Ne pas mettre loading à true pour éviter skeleton
-    // On a déjà les plantes par défaut affichées
-    
-    try {
-      const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
-      const response = await fetch(`${apiUrl}/api/v1/plants/list`, {
-        method: 'GET',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-      })
-      
-      if (!response.ok) {
-        throw new Error('API response not ok')
-      }
-      
-      const data = await response.json()
-      
-      if (data.success && data.plants && Array.isArray(data.plants) && data.plants.length > 0) {
-        // Si API retourne des plantes, les utiliser
-        console.log('✅ Loaded plants from API:', data.plants.length)
-        setPlants(data.plants)
-      } else {
-        // Sinon garder les plantes par défaut
-        console.log('ℹ️ Using default plants')
+    const loadFirstPage = async () => {
+      try {
+        const result = await plantsAPI.getAll(PAGE_SIZE, 0, buildFilters())
+        if (cancelled) return
+
+        if (result.success && Array.isArray(result.data)) {
+          console.log('✅ Loaded plants from API:', result.data.length, '/', result.pagination.total)
+          setPlants(result.data.map(toCardPlant))
+          setTotal(result.pagination.total)
+          setNextCursor(result.pagination.next_cursor)
+          setPropertyFacets(result.facets.property)
+          setFamilyFacets(result.facets.family)
+        }
+      } catch (error) {
+        // Garder les plantes par défaut (déjà set dans useState)
+        if (!cancelled) console.warn('⚠️ API not available, using default plants:', error)
+      } finally {
+        if (!cancelled) setLoading(false)
       }
+    }
+
+    // Pas de skeleton au premier chargement : les plantes par défaut sont affichées
+    if (apiAvailable) setLoading(true)
+    loadFirstPage()
+
+    return () => {
+      cancelled = true
+    }
+    // apiAvailable volontairement omis : ne recharger que sur changement de filtre
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [buildFilters])
+
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return
+    setLoadingMore(true)
+    try {
+      const result = await plantsAPI.getAll(PAGE_SIZE, 0, { ...buildFilters(), cursor: nextCursor })
+      setPlants(prev => [...prev, ...result.data.map(toCardPlant)])
+      setNextCursor(result.pagination.next_cursor)
     } catch (error) {
-      console.warn('⚠️ API not available, using default plants:', error)
-      // Garder les plantes par défaut (déjà set dans useState)
+      console.warn('⚠️ Failed to load more plants:', error)
+    } finally {
+      setLoadingMore(false)
     }
   }
 
-  // Filtrage et recherche
+  // Les facettes sont appliquées par le serveur ; seul le repli hors ligne
+  // filtre localement. La recherche texte porte sur les pages chargées.
   const filteredPlants = useMemo(() => {
     let filtered = plants
 
-    // Filtre par catégorie
-    if (selectedFilter !== 'all') {
+    if (!apiAvailable && selectedFilter !== 'all') {
       filtered = filtered.filter(plant => 
         plant.properties?.some(prop => 
           prop.toLowerCase().includes(selectedFilter.toLowerCase())
@@ -159,7 +212,9 @@ export default function PlantsPage() {
     }
 
     return filtered
-  }, [plants, searchQuery, selectedFilter])
+  }, [plants, searchQuery, selectedFilter, apiAvailable])
+
+  const resultCount = apiAvailable && !searchQuery && total !== null ? total : filteredPlants.length
 
   return (
     <div className="min-h-screen bg-gradient-to-b from-green-50 to-white">
@@ -203,15 +258,38 @@ export default function PlantsPage() {
                 className="w-full pl-10 pr-4 py-2.5 border border-gray-300 rounded-xl focus:outline-none focus:ring-2 focus:ring-green-500 appearance-none bg-white cursor-pointer"
               >
                 <option value="all">Toutes les propriétés</option>
-                <option value="antibactérien">Antibactérien</option>
-                <option value="antiviral">Antiviral</option>
-                <option value="anti-inflammatoire">Anti-inflammatoire</option>
-                <option value="antioxydant">Antioxydant</option>
-                <option value="digestif">Digestif</option>
-                <option value="immunité">Immunité</option>
-                <option value="détoxifiant">Détoxifiant</option>
+                {propertyFacets
+                  ? propertyFacets.map(facet => (
+                      <option key={facet.value} value={facet.value}>
+                        {facet.value} ({facet.count})
+                      </option>
+                    ))
+                  : DEFAULT_PROPERTY_OPTIONS.map(option => (
+                      <option key={option.value} value={option.value}>
+                        {option.label}
+                      </option>
+                    ))}
               </select>
             </div>
+
+            {/* Family Dropdown (facettes serveur uniquement) */}
+            {familyFacets.length > 0 && (
+              <div className="relative sm:w-64">
+                <Leaf className="absolute left-3 top-1/2 -translate-y-1/2 h-5 w-5 text-gray-400 pointer-events-none" />
+                <select
+                  value={selectedFamily}
+                  onChange={(e) => setSelectedFamily(e.target.value)}
+                  className="w-full pl-10 pr-4 py-2.5 border border-gray-300 rounded-xl focus:outline-none focus:ring-2 focus:ring-green-500 appearance-none bg-white cursor-pointer"
+                >
+                  <option value="all">Toutes les familles</option>
+                  {familyFacets.map(facet => (
+                    <option key={facet.value} value={facet.value}>
+                      {facet.value} ({facet.count})
+                    </option>
+                  ))}
+                </select>
+              </div>
+            )}
           </div>
 
           {/* Results count */}
@@ -223,7 +301,7 @@ export default function PlantsPage() {
               </span>
             ) : (
               <span>
-                {filteredPlants.length} plante{filteredPlants.length > 1 ? 's' : ''} trouvée{filteredPlants.length > 1 ? 's' : ''}
+                {resultCount} plante{resultCount > 1 ? 's' : ''} trouvée{resultCount > 1 ? 's' : ''}
               </span>
             )}
           </div>
@@ -261,7 +339,23 @@ export default function PlantsPage() {
               />
             ))}
           </div>
-        ) : (
+        ) : null}
+
+        {/* Pagination par curseur */}
+        {!loading && nextCursor && (
+          <div className="mt-10 flex justify-center">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="flex items-center gap-2 px-6 py-2.5 bg-green-600 text-white rounded-xl hover:bg-green-700 transition-colors disabled:opacity-60"
+            >
+              {loadingMore && <Loader2 className="h-4 w-4 animate-spin" />}
+              Charger plus de plantes
+            </button>
+          </div>
+        )}
+
+        {!loading && filteredPlants.length === 0 && (
           /* Empty state - seulement si recherche/filtre ne trouve rien */
           <div className="text-center py-16">
             <div className="w-20 h-20 mx-auto mb-4 bg-gray-100 rounded-full flex items-center justify-center">
@@ -277,6 +371,7 @@ export default function PlantsPage() {
               onClick={() => {
                 setSearchQuery('')
                 setSelectedFilter('all')
+                setSelectedFamily('all')
               }}
               className="px-6 py-2 bg-green-600 text-white rounded-xl hover:bg-green-700 transition-colors"
             >
@@ -33,7 +33,8 @@ interface ScanResult {
   plant?: {
     name: string
     scientificName: string
-    confidence: number
+    confidence: number | null
+    similarity?: number | null
     description: string
     properties: string[]
     uses: string[]
@@ -337,7 +338,9 @@ export default function ScanPage() {
                     Plante identifiée !
                   </h2>
                   <p className="text-sm text-gray-600">
-                    Confiance: {result.plant?.confidence}%
+                    {result.plant?.confidence != null
+                      ? `Confiance: ${result.plant.confidence}%`
+                      : 'Correspondance avec une image de référence du catalogue'}
                   </p>
                 </div>
               </div>
@@ -100,6 +100,62 @@ export const chatAPI = {
     return response.data
   },
 
+  /**
+   * Envoie un message et reçoit la réponse au fil de l'eau (Server-Sent Events)
+   *
+   * `onToken` est appelé pour chaque morceau de texte. Passer un AbortSignal
+   * pour interrompre (la génération est alors stoppée côté serveur).
+   */
+  streamMessage: async (
+    message: string,
+    history: ChatMessage[] = [],
+    onToken: (text: string) => void,
+    signal?: AbortSignal
+  ): Promise<string> => {
+    const response = await fetch(`${API_URL}/api/v1/chat/message/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+      body: JSON.stringify({ message, conversation_history: history }),
+      signal,
+    })
+    if (!response.ok || !response.body) {
+      throw new Error(`Chat stream failed (${response.status})`)
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    let fullText = ''
+
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+
+      // Un événement SSE se termine par une ligne vide
+      let boundary = buffer.indexOf('\n\n')
+      while (boundary !== -1) {
+        const rawEvent = buffer.slice(0, boundary)
+        buffer = buffer.slice(boundary + 2)
+        boundary = buffer.indexOf('\n\n')
+
+        const event = rawEvent.match(/^event: (.*)$/m)?.[1]
+        const data = rawEvent.match(/^data: (.*)$/m)?.[1]
+        if (!event || !data) continue
+
+        const payload = JSON.parse(data)
+        if (event === 'token') {
+          fullText += payload.text
+          onToken(payload.text)
+        } else if (event === 'error') {
+          throw new Error(payload.message)
+        }
+      }
+    }
+
+    return fullText
+  },
+
   /**
    * Obtient un conseil médical rapide
    */
@@ -121,15 +177,50 @@ export const chatAPI = {
   },
 }
 
+export interface PlantFilters {
+  family?: string[]
+  country?: string[]
+  property?: string[]
+  has_warnings?: boolean
+  cursor?: string
+}
+
+export interface FacetCount {
+  value: string
+  count: number
+}
+
+export interface PlantsListResult {
+  success: boolean
+  data: Plant[]
+  pagination: {
+    total: number
+    limit: number
+    offset: number | null
+    has_more: boolean
+    next_cursor: string | null
+  }
+  facets?: {
+    family: FacetCount[]
+    country: FacetCount[]
+    property: FacetCount[]
+    has_warnings: { true: number; false: number }
+  }
+}
+
 export const plantsAPI = {
   /**
-   * Récupère la liste de toutes les plantes
+   * Récupère la liste des plantes (filtrage et pagination côté serveur)
+   *
+   * Passer `filters.cursor = pagination.next_cursor` pour la page suivante.
    */
-  getAll: async (limit = 50, offset = 0): Promise<{ success: boolean; data: Plant[]; pagination: any }> => {
-    const response = await apiClient.get<{ success: boolean; data: Plant[]; pagination: any }>(
-      '/api/v1/plants/list',
+  getAll: async (limit = 50, offset = 0, filters: PlantFilters = {}): Promise<PlantsListResult> => {
+    const response = await apiClient.get<PlantsListResult>(
+      '/api/v1/plants/plants/list',
       {
-        params: { limit, offset },
+        params: { limit, offset, ...filters },
+        // family=a&family=b (format attendu par FastAPI)
+        paramsSerializer: { indexes: null },
       }
     )
     return response.data
@@ -140,7 +231,7 @@ export const plantsAPI = {
    */
   search: async (query: string, limit = 10): Promise<{ success: boolean; data: Plant[]; results_count: number }> => {
     const response = await apiClient.get<{ success: boolean; data: Plant[]; results_count: number }>(
-      '/api/v1/plants/search',
+      '/api/v1/plants/plants/search',
       {
         params: { q: query, limit },
       }
@@ -153,7 +244,7 @@ export const plantsAPI = {
    */
   getById: async (id: string): Promise<{ success: boolean; data: Plant }> => {
     const response = await apiClient.get<{ success: boolean; data: Plant }>(
-      `/api/v1/plants/${id}`
+      `/api/v1/plants/plants/${id}`
     )
     return response.data
   },
@@ -163,7 +254,7 @@ export const plantsAPI = {
    */
   getByCondition: async (condition: string): Promise<{ success: boolean; data: any[]; results_count: number }> => {
     const response = await apiClient.get<{ success: boolean; data: any[]; results_count: number }>(
-      `/api/v1/plants/by-condition/${encodeURIComponent(condition)}`
+      `/api/v1/plants/plants/by-condition/${encodeURIComponent(condition)}`
     )
     return response.data
   },
@@ -172,7 +263,7 @@ export const plantsAPI = {
    * Récupère les statistiques de la base de données
    */
   getStats: async () => {
-    const response = await apiClient.get('/api/v1/plants/stats/overview')
+    const response = await apiClient.get('/api/v1/plants/plants/stats/overview')
     return response.data
   },
 }